@@ -1,40 +1,78 @@
-import torch
-from langchain_huggingface import HuggingFaceEmbeddings
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
 from langchain_xai import ChatXAI
 
-# AMD ROCm is not fully implemented for Win yet, will run on CPU
-if torch.backends.mps.is_available():
-    device = "mps"
-elif torch.cuda.is_available():
-    device = "cuda"
-else:
-    device = "cpu"
-
-print(f"Using device: {device}")
+load_dotenv()
 
 model_name = "BAAI/bge-m3"
-model_kwargs = {
-    'device': device,
-    'trust_remote_code': True
-}
-
-encode_kwargs = {
-    'normalize_embeddings': True,
-    'batch_size': 64
-}
-
-# Initialize embeddings
-embeddings = HuggingFaceEmbeddings(
-    model_name=model_name,
-    model_kwargs=model_kwargs,
-    encode_kwargs=encode_kwargs
-)
+
+# Built on first use by get_embeddings(): torch and the model weights are only loaded by
+# processes that actually embed something
+_embeddings = None
+
+def get_embeddings() -> Embeddings:
+    """Load the bge-m3 embedding model once per process (or use the shared inference service)."""
+    global _embeddings
+    if _embeddings is not None:
+        return _embeddings
+
+    from src.inference_service import RemoteEmbeddings, get_service_url
+    if get_service_url():
+        # Shared inference service (src/inference_service.py) holds the model and batches requests
+        print(f"Using inference service: {get_service_url()}")
+        _embeddings = RemoteEmbeddings(get_service_url())
+        return _embeddings
+
+    import torch
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    # AMD ROCm is not fully implemented for Win yet, will run on CPU
+    if torch.backends.mps.is_available():
+        device = "mps"
+    elif torch.cuda.is_available():
+        device = "cuda"
+    else:
+        device = "cpu"
+
+    print(f"Using device: {device}")
+
+    model_kwargs = {
+        'device': device,
+        'trust_remote_code': True
+    }
+
+    encode_kwargs = {
+        'normalize_embeddings': True,
+        'batch_size': 64
+    }
+
+    # Initialize embeddings
+    _embeddings = HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs=model_kwargs,
+        encode_kwargs=encode_kwargs
+    )
+    return _embeddings
+
+
+class LazyEmbeddings(Embeddings):
+    """Importable stand-in for the embedding model; the real one is built on the first call."""
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return get_embeddings().embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return get_embeddings().embed_query(text)
+
+
+embeddings = LazyEmbeddings()
 
 # LLM Configuration (Grok)
 llm_model = ChatXAI(
     model="grok-4-1-fast-reasoning",
     temperature=0,
     streaming=True,
+    stream_usage=True,  # Include token usage in streamed responses (per-node accounting)
     timeout=60,
     max_retries=2,
     verbose=True
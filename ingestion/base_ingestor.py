@@ -3,11 +3,14 @@ from abc import ABC, abstractmethod
 from typing import Optional
 from langchain_chroma import Chroma
 from chromadb.config import Settings
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter, Language
 from langchain_core.documents import Document
+from config.llm_config import embeddings
+from src.hnsw_profiles import get_profile, collection_configuration, apply_search_ef
+from .compaction import record_run
 import hashlib
 import logging
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,16 +18,26 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 class BaseIngestor(ABC):
+    # Metadata field naming the unit a run re-ingests as a whole (see ingestion/compaction.py)
+    scope_field = "url"
+
     def __init__(self, persist_directory: str, collection_name: str):
-        self.embeddings = HuggingFaceEmbeddings(model_name="BAAI/bge-m3")
+        # Same bge-m3 setup as the retrievers (device selection, or the shared inference service)
+        self.embeddings = embeddings
         self.persist_directory = persist_directory
         self.collection_name = collection_name
+        # Stamped on every chunk written by this run, so superseded chunks can be found later
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{os.getpid()}"
+        # HNSW settings from config/hnsw_profiles.json (fixed at creation, except search_ef)
+        self.hnsw_profile = get_profile(collection_name)
         self.vectorstore = Chroma(
             embedding_function=self.embeddings,
             persist_directory=persist_directory,
             collection_name=collection_name,
-            client_settings=Settings(anonymized_telemetry=False)
+            client_settings=Settings(anonymized_telemetry=False),
+            collection_configuration=collection_configuration(self.hnsw_profile)
         )
+        apply_search_ef(self.vectorstore._collection, self.hnsw_profile)
 
     @abstractmethod
     def load_documents(self) -> list[Document]:
@@ -82,11 +95,31 @@ class BaseIngestor(ABC):
 
     def save_to_vectorstore(self, documents: list[Document], ids: Optional[list[str]] = None):
         """Save documents to vectorstore with optional IDs."""
-        if ids:
+        for doc in documents:
+            doc.metadata["ingest_run"] = self.run_id
+        from src.retrievers import RETRIEVAL_MODE
+        if RETRIEVAL_MODE == "bge_m3":
+            self.save_hybrid(documents, ids or self.generate_ids(documents))
+        elif ids:
             self.vectorstore.add_documents(documents, ids=ids)
         else:
             self.vectorstore.add_documents(documents)
 
+    def save_hybrid(self, documents: list[Document], ids: list[str], batch_size: int = 256):
+        """One bge-m3 pass per batch: dense vectors into Chroma, sparse weights into the sparse store."""
+        from src.bge_m3 import get_hybrid_encoder
+        from src.sparse_index import SparseStore
+        encoder = get_hybrid_encoder()
+        store = SparseStore(self.collection_name)
+        for i in range(0, len(documents), batch_size):
+            batch, batch_ids = documents[i:i + batch_size], ids[i:i + batch_size]
+            dense, sparse = encoder.encode([doc.page_content for doc in batch])
+            self.vectorstore._collection.upsert(
+                ids=batch_ids, embeddings=dense,
+                documents=[doc.page_content for doc in batch], metadatas=[doc.metadata for doc in batch]
+            )
+            store.upsert(batch_ids, sparse)
+
     def generate_ids(self, documents: list[Document]) -> list[str]:
         """Generate unique IDs for documents."""
         ids = []
@@ -112,5 +145,43 @@ class BaseIngestor(ABC):
             ids = self.generate_ids(valid_docs)
             self.save_to_vectorstore(valid_docs, ids)
             logger.info(f"Added {len(valid_docs)} chunks to {self.persist_directory}")
+            self.complete_run(valid_docs)
         else:
-            logger.warning("No valid documents to save.")
\ No newline at end of file
+            logger.warning("No valid documents to save.")
+
+    def configured_scopes(self) -> Optional[list[str]]:
+        """Every scope the current config asks for; chunks of other recorded scopes are orphans (None: unknown)."""
+        return None
+
+    def document_scopes(self, doc: Document) -> list[str]:
+        """Scopes a chunk belongs to."""
+        return [doc.metadata[self.scope_field]] if doc.metadata.get(self.scope_field) else []
+
+    def complete_run(self, documents: list[Document]):
+        """Record the scopes this run fully re-ingested (for the GC), then refresh the corpus store and indexes."""
+        scopes = {scope for doc in documents for scope in self.document_scopes(doc)}
+        record_run(self.persist_directory, self.collection_name, type(self).__name__, self.run_id, scopes, self.configured_scopes())
+        self.refresh_corpus_store()
+        self.refresh_vector_index()
+        self.refresh_sparse_index()
+
+    def refresh_corpus_store(self):
+        """Re-export the columnar corpus store that lexical search and repo filters read."""
+        from src.corpus_store import export_corpus
+        export_corpus(self.vectorstore._collection, self.collection_name)
+
+    def refresh_vector_index(self):
+        """Re-export the memory-mapped index when the retrievers read from it (VECTOR_BACKEND=mmap)."""
+        from src.retrievers import VECTOR_BACKEND
+        if VECTOR_BACKEND != "mmap":
+            return
+        from src.mmap_index import export_collection
+        manifest = export_collection(self.persist_directory, self.collection_name)
+        logger.info(f"Exported {manifest['count']} vectors to the mmap index in {manifest['seconds']}s")
+
+    def refresh_sparse_index(self):
+        """Rebuild the bge-m3 sparse index when this collection has one (RETRIEVAL_MODE=bge_m3)."""
+        from src.sparse_index import refresh_sparse_index
+        manifest = refresh_sparse_index(self.vectorstore._collection, self.collection_name)
+        if manifest:
+            logger.info(f"Rebuilt the sparse index ({manifest['count']} chunks) in {manifest['seconds']}s")
@@ -0,0 +1,187 @@
+"""
+Garbage collection and compaction for the Chroma stores.
+
+Chunk ids depend on content, so a re-ingest adds the new version of a changed chunk next
+to the old one instead of replacing it. Every ingestion stamps its chunks with `ingest_run`
+and, once it has finished, records in the ledger (`ingest_runs.json` in the persist
+directory) which scopes (a repo, a page URL) it re-ingested and which scopes its config
+still lists. With that, a chunk is:
+
+    superseded  it was written by an earlier completed run of its scope, and a later
+                completed run re-ingested that scope without producing it again
+    orphaned    its scope was dropped from the ingestor's config (repo or URL removed)
+    untracked   its scope was never recorded by a completed run, or it was written by a
+                run that never completed: kept, only reported
+
+Partial or failed runs never reach the ledger, so they can't cause deletions: the chunks
+they re-stamped are untracked until the next completed run writes them again.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+from typing import Optional
+
+import numpy as np
+
+from src.chunk_dedup import chunk_locations, repo_run
+
+logger = logging.getLogger(__name__)
+
+INGEST_LEDGER = "ingest_runs.json"
+GET_BATCH = 1000
+
+
+# --- LEDGER ---
+
+def load_ledger(persist_dir: str) -> dict:
+    path = os.path.join(persist_dir, INGEST_LEDGER)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def completed_runs(ledger_entry: dict) -> set[str]:
+    """Every run that completed on the collection (ledgers from before `runs` only know the last run per scope)."""
+    return set(ledger_entry.get("runs", [])) | {scope["run"] for scope in ledger_entry.get("scopes", {}).values()}
+
+def record_run(persist_dir: str, collection_name: str, ingestor: str, run_id: str, scopes: set[str], configured: Optional[list[str]]):
+    """Mark `scopes` as fully re-ingested by `run_id` (call only after the run succeeded)."""
+    path = os.path.join(persist_dir, INGEST_LEDGER)
+    ledger = load_ledger(persist_dir)
+    entry = ledger.setdefault(collection_name, {"scopes": {}, "configured": {}})
+    runs = completed_runs(entry)
+    if run_id not in runs:
+        entry["runs"] = sorted(runs | {run_id})
+    completed_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    for scope in scopes:
+        entry["scopes"][scope] = {"run": run_id, "ingestor": ingestor, "completed_at": completed_at}
+    if configured is not None:
+        entry["configured"][ingestor] = sorted(configured)
+    os.makedirs(persist_dir, exist_ok=True)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(ledger, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+# --- FINDING STALE CHUNKS ---
+
+def iter_metadatas(collection):
+    """(id, metadata) of every chunk, read in batches."""
+    total = collection.count()
+    for offset in range(0, total, GET_BATCH):
+        batch = collection.get(include=["metadatas"], limit=GET_BATCH, offset=offset)
+        yield from zip(batch["ids"], batch["metadatas"])
+
+def chunk_scopes(metadata: dict, scope_field: str) -> list[str]:
+    """Scopes of a chunk: every repo of a deduplicated GitHub chunk, else its scope field."""
+    if scope_field == "repo" and metadata.get("locations"):
+        return [location["repo"] for location in chunk_locations(metadata)]
+    return [metadata[scope_field]] if metadata.get(scope_field) else []
+
+def classify_chunks(collection, ledger_entry: dict, scope_field: str) -> dict[str, list[str]]:
+    """
+    Chunk ids grouped into live, superseded, orphaned and untracked.
+
+    A chunk shared by several scopes (deduplicated across repos) stays live while the last
+    completed run of any configured scope produced it, judged by that scope's own run stamp
+    (a later, unrecorded run of another repo re-stamping the chunk doesn't count), and is
+    only orphaned once all its scopes are. It is only superseded when every current scope's
+    stamp is an earlier completed run (or it predates run stamps); a stamp from a run that
+    never completed (interrupted or failed after upserting) leaves it untracked.
+    """
+    scopes = ledger_entry.get("scopes", {})
+    runs = completed_runs(ledger_entry)
+    configured = {name: set(values) for name, values in ledger_entry.get("configured", {}).items()}
+
+    def run_of(metadata: dict, scope: str):
+        # Deduplicated GitHub chunks carry the run that wrote them per repo (run::<repo>)
+        return repo_run(metadata, scope) if scope_field == "repo" else metadata.get("ingest_run")
+
+    def is_orphaned(scope: str) -> bool:
+        ingestor = scopes[scope]["ingestor"]
+        return ingestor in configured and scope not in configured[ingestor]
+
+    groups: dict[str, list[str]] = {"live": [], "superseded": [], "orphaned": [], "untracked": []}
+    for chunk_id, metadata in iter_metadatas(collection):
+        metadata = metadata or {}
+        chunk = chunk_scopes(metadata, scope_field)
+        recorded = [scope for scope in chunk if scope in scopes]
+        current = [scope for scope in recorded if not is_orphaned(scope)]
+        stamps = [run_of(metadata, scope) for scope in current]
+        if any(stamp == scopes[scope]["run"] for stamp, scope in zip(stamps, current)):
+            groups["live"].append(chunk_id)
+        elif len(recorded) < len(chunk) or not chunk or any(stamp and stamp not in runs for stamp in stamps):
+            groups["untracked"].append(chunk_id)
+        elif not current:
+            groups["orphaned"].append(chunk_id)
+        else:
+            groups["superseded"].append(chunk_id)
+    return groups
+
+def delete_chunks(collection, ids: list[str]):
+    for i in range(0, len(ids), GET_BATCH):
+        collection.delete(ids=ids[i:i + GET_BATCH])
+
+
+# --- COMPACTION ---
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+def vacuum(persist_dir: str, timeout: int = 30):
+    """VACUUM chroma.sqlite3 to give pages freed by deletions back to the filesystem."""
+    conn = sqlite3.connect(os.path.join(persist_dir, "chroma.sqlite3"), timeout=timeout)
+    try:
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+def rebuild_collection(client, collection_name: str, configuration: dict):
+    """
+    Copy a collection into a fresh HNSW index and swap it in under the same name.
+
+    Deleted vectors are only marked as such in HNSW, so the index files keep their size
+    and searches still walk past them until the index is rebuilt.
+    """
+    old = client.get_collection(collection_name)
+    tmp_name = f"{collection_name}_rebuild"
+    if tmp_name in [c.name for c in client.list_collections()]:
+        client.delete_collection(tmp_name)  # Left over from an interrupted rebuild
+    new = client.create_collection(tmp_name, configuration=configuration, metadata=old.metadata)
+    total = old.count()
+    for offset in range(0, total, GET_BATCH):
+        batch = old.get(include=["embeddings", "documents", "metadatas"], limit=GET_BATCH, offset=offset)
+        new.add(ids=batch["ids"], embeddings=batch["embeddings"], documents=batch["documents"], metadatas=batch["metadatas"])
+    if new.count() != total:
+        raise RuntimeError(f"Rebuild of {collection_name} copied {new.count()} of {total} chunks, original kept")
+    client.delete_collection(collection_name)
+    new.modify(name=collection_name)
+
+
+# --- MEASURING ---
+
+def sample_queries(collection, ids: list[str], n: int = 50, seed: int = 0) -> np.ndarray:
+    """Stored embeddings of `n` chunks, used as queries before and after the GC."""
+    rng = np.random.default_rng(seed)
+    chosen = [ids[i] for i in rng.choice(len(ids), min(n, len(ids)), replace=False)]
+    return np.asarray(collection.get(ids=chosen, include=["embeddings"])["embeddings"], dtype=np.float32)
+
+def measure_latency(collection, queries: np.ndarray, k: int = 10) -> dict:
+    """p50/p95 dense query latency, and the time to read every document (what a BM25 build does)."""
+    collection.query(query_embeddings=queries[:1], n_results=k)  # Warm-up, not timed
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        collection.query(query_embeddings=[query], n_results=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    start = time.perf_counter()
+    for offset in range(0, collection.count(), GET_BATCH):
+        collection.get(include=["documents", "metadatas"], limit=GET_BATCH, offset=offset)
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "read_all_s": time.perf_counter() - start,
+    }
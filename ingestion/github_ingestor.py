@@ -2,7 +2,6 @@ import os
 import json
 import shutil
 import stat
-import hashlib
 import requests
 import time
 from pathlib import Path
@@ -11,6 +10,8 @@ from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter, Language
 from .base_ingestor import BaseIngestor
 from util.progress import progress_bar
+from src.github_files import GITHUB_MIRROR_DIR, mirror_path, write_mirror_manifest
+from src.chunk_dedup import content_id, chunk_locations, deduplicate_chunks, keep_stored_locations, stamp_repo_runs
 import logging
 
 logger = logging.getLogger(__name__)
@@ -50,27 +51,34 @@ def remove_readonly(func, path, excinfo):
     func(path)
 
 class GitHubIngestor(BaseIngestor):
+    scope_field = "repo"
+
     def __init__(self, config_path: str, persist_directory: str = "./github.db", collection_name: str = "github_repos"):
         super().__init__(persist_directory, collection_name)
         with open(config_path, 'r') as f:
             config = json.load(f)
         self.github_repos = config['github_repos']
         self.temp_dirs = []
+        self.default_branches = {}  # repo -> default branch, for the read_github_file mirror
+
+    def configured_scopes(self) -> list[str]:
+        return list(self.github_repos)
 
     def generate_ids(self, documents: list[Document]) -> list[str]:
-        """Generate unique IDs for documents, including repo for uniqueness."""
-        ids = []
-        for doc in documents:
-            # Extract repo and source from metadata for uniqueness across repositories
-            repo = doc.metadata.get('repo', '')
-            source = doc.metadata.get('source', '')
-            # Create a hash of the full document content to detect changes
-            content_hash = hashlib.md5(doc.page_content.encode()).hexdigest()
-            # Combine repo, source, and content hash into a unique identifier
-            identifier = f"{repo}_{source}_{content_hash}"
-            # Generate an MD5 hash of the identifier for a consistent ID
-            ids.append(hashlib.md5(identifier.encode()).hexdigest())
-        return ids
+        """Content-addressed IDs: a chunk found in several repos (fork, vendored code) is stored once."""
+        return [content_id(doc.page_content) for doc in documents]
+
+    def document_scopes(self, doc: Document) -> list[str]:
+        return [location['repo'] for location in chunk_locations(doc.metadata)]
+
+    def merge_stored_locations(self, documents: list[Document], ids: list[str], reingested_repos: set[str]):
+        """Keep the stored locations of chunks in repos this run didn't re-ingest (an upsert replaces them)."""
+        collection = self.vectorstore._collection
+        for i in range(0, len(ids), 1000):
+            stored = collection.get(ids=ids[i:i+1000], include=["metadatas"])
+            stored_by_id = dict(zip(stored["ids"], stored["metadatas"]))
+            for doc, doc_id in zip(documents[i:i+1000], ids[i:i+1000]):
+                keep_stored_locations(doc, stored_by_id.get(doc_id), reingested_repos)
 
     def split_documents(self, documents: list[Document]) -> list[Document]:
         """Split documents using language-aware splitting with custom chunk size and overlap."""
@@ -139,6 +147,7 @@ class GitHubIngestor(BaseIngestor):
                 response.raise_for_status()
                 repo_data = response.json()
                 default_branch = repo_data['default_branch']
+                self.default_branches[repo] = default_branch
                 print(f"\tDefault branch: {default_branch}, Size: {repo_data.get('size', 'unknown')} KB")
 
                 loader = GitLoader(
@@ -199,7 +208,17 @@ class GitHubIngestor(BaseIngestor):
         valid_docs = [d for d in split_docs if isinstance(d.page_content, str) and d.page_content.strip()]
 
         if valid_docs:
+            # Identical chunks across repos are stored once, with every repo/path they appear in
+            reingested_repos = {d.metadata.get('repo') for d in valid_docs}
+            unique_docs = deduplicate_chunks(valid_docs)
+            logger.info(f"Deduplicated {len(valid_docs)} chunks to {len(unique_docs)} ({len(valid_docs) - len(unique_docs)} copies shared across repos/files)")
+            valid_docs = unique_docs
             ids = self.generate_ids(valid_docs)
+            self.merge_stored_locations(valid_docs, ids, reingested_repos)
+            # Per-repo run stamps: a later run of another repo sharing a chunk must not hide
+            # (for the GC) that this repo's last completed run produced it
+            for doc in valid_docs:
+                stamp_repo_runs(doc, reingested_repos, self.run_id)
             total_docs = len(valid_docs)
             batch_size = 100
 
@@ -214,9 +233,14 @@ class GitHubIngestor(BaseIngestor):
 
             print("\r" + " " * 120 + "\r", end="")
             logger.info(f"GitHub ingestion complete: {total_docs} chunks in {self.persist_directory}")
+            self.complete_run(valid_docs)
         else:
             logger.warning("No valid documents to save.")
 
+        # Keep the fresh clones as the local mirror read_github_file serves files from
+        if GITHUB_MIRROR_DIR:
+            self.update_mirror()
+
         # Cleanup temp directories after all processing
         for temp_dir in self.temp_dirs:
             if os.path.exists(temp_dir):
@@ -229,4 +253,32 @@ class GitHubIngestor(BaseIngestor):
                         if attempt == 2:  # Last attempt
                             print(f"Could not remove {temp_dir} after 3 attempts: {e}")
                         else:
-                            print(f"Attempt {attempt + 1} failed for {temp_dir}, retrying...")
\ No newline at end of file
+                            print(f"Attempt {attempt + 1} failed for {temp_dir}, retrying...")
+
+    def update_mirror(self):
+        """Move each successfully cloned repo into GITHUB_MIRROR_DIR and record branch and commit."""
+        from git import Repo
+
+        entries = {}
+        for repo in self.github_repos:
+            safe_repo_name = repo.replace('/', '_').replace('\\', '_')
+            temp_dir = os.path.abspath(f"./temp_{safe_repo_name}")
+            if repo not in self.default_branches or not os.path.isdir(os.path.join(temp_dir, '.git')):
+                continue
+            try:
+                commit = Repo(temp_dir).head.commit.hexsha
+                target = mirror_path(repo)
+                if os.path.exists(target):
+                    shutil.rmtree(target, onexc=remove_readonly)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(temp_dir, target)
+                entries[repo] = {
+                    "default_branch": self.default_branches[repo],
+                    "commit": commit,
+                    "synced_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                }
+            except Exception as e:
+                print(f"Could not mirror {repo}: {e}")
+        if entries:
+            write_mirror_manifest(entries)
+            logger.info(f"Mirrored {len(entries)} repositories to {GITHUB_MIRROR_DIR}")
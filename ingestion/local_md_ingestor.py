@@ -12,6 +12,10 @@ class LocalMDIngestor(BaseIngestor):
         super().__init__(persist_directory, collection_name)
         self.folder_path = folder_path
 
+    def configured_scopes(self) -> list[str]:
+        """One scope per Markdown file still in the folder."""
+        return [f"local://{file_path.name}" for file_path in Path(self.folder_path).glob("*.md")]
+
     def load_documents(self) -> list[Document]:
         """Load documents from local Markdown files."""
         documents = []
@@ -70,5 +74,6 @@ class LocalMDIngestor(BaseIngestor):
             ids = self.generate_ids(valid_docs)
             self.save_to_vectorstore(valid_docs, ids)
             logger.info(f"Local MD ingestion complete: {len(valid_docs)} chunks in {self.persist_directory}")
+            self.complete_run(valid_docs)
         else:
             logger.warning("No valid documents to save.")
\ No newline at end of file
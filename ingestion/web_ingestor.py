@@ -30,6 +30,9 @@ class WebIngestor(BaseIngestor):
             config = json.load(f)
         self.urls = config.get('comms_docs', [])
 
+    def configured_scopes(self) -> list[str]:
+        return list(self.urls)
+
     def load_documents(self) -> list[Document]:
         """Load documents from web URLs."""
         documents = []
@@ -115,5 +118,6 @@ class WebIngestor(BaseIngestor):
             ids = self.generate_ids(valid_docs)
             self.save_to_vectorstore(valid_docs, ids)
             logger.info(f"Web ingestion complete: {len(valid_docs)} chunks in {self.persist_directory}")
+            self.complete_run(valid_docs)
         else:
             logger.warning("No valid documents to save.")
\ No newline at end of file
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Simulate thousands of Slack/Chainlit threads against each checkpointer mode and report memory usage.
+
+The graph is a stand-in for src/agent.py with the same message state but no LLM calls,
+so only checkpoint storage is measured.
+
+Usage: python scripts/benchmark_checkpointer.py --threads 5000 --turns 3
+"""
+
+import sys
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from typing import Annotated, Sequence, TypedDict
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langgraph.graph import StateGraph, END
+from langgraph.graph.message import add_messages
+
+import src.checkpointer as checkpointer_module
+
+class BenchState(TypedDict):
+    messages: Annotated[Sequence[BaseMessage], add_messages]
+
+def fake_agent(state: BenchState):
+    """Append a tool round and an answer roughly the size of a real retrieval turn."""
+    call_id = f"call_{len(state['messages'])}"
+    return {"messages": [
+        AIMessage(content="", tool_calls=[{"name": "retrieve_github_info", "args": {"query": "x"}, "id": call_id}]),
+        ToolMessage(content="Source: chunk\n" + "lorem ipsum " * 300, tool_call_id=call_id),
+        AIMessage(content="answer " * 80),
+    ]}
+
+def build_app(checkpointer):
+    graph = StateGraph(BenchState)
+    graph.add_node("agent", fake_agent)
+    graph.set_entry_point("agent")
+    graph.add_edge("agent", END)
+    return graph.compile(checkpointer=checkpointer)
+
+def run(mode: str, threads: int, turns: int) -> dict:
+    if mode == "sqlite":
+        checkpointer_module.CHECKPOINTER_SQLITE_PATH = os.path.join(tempfile.mkdtemp(), "bench.sqlite")
+    tracemalloc.start()
+    start = time.perf_counter()
+    checkpointer = checkpointer_module.get_checkpointer(mode)
+    app = build_app(checkpointer)
+    for t in range(threads):
+        config = {"configurable": {"thread_id": f"slack_{t}"}}
+        for turn in range(turns):
+            app.invoke({"messages": [HumanMessage(content=f"question {turn} in thread {t}")]}, config=config)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {"mode": mode, "heap_mb": current / 2**20, "peak_mb": peak / 2**20, "seconds": elapsed}
+    if mode == "sqlite":
+        result["disk_mb"] = os.path.getsize(checkpointer_module.CHECKPOINTER_SQLITE_PATH) / 2**20
+    result["evicted"] = getattr(checkpointer, "evicted_threads", 0)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=5000)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--modes", default="memory,bounded,sqlite")
+    args = parser.parse_args()
+
+    print(f"Simulating {args.threads} threads x {args.turns} turns "
+          f"(bounded: max_threads={checkpointer_module.CHECKPOINTER_MAX_THREADS})")
+    print(f"{'mode':<10}{'heap MB':>10}{'peak MB':>10}{'disk MB':>10}{'evicted':>10}{'seconds':>10}")
+    for mode in args.modes.split(","):
+        r = run(mode, args.threads, args.turns)
+        print(f"{r['mode']:<10}{r['heap_mb']:>10.1f}{r['peak_mb']:>10.1f}{r.get('disk_mb', 0):>10.1f}{r['evicted']:>10}{r['seconds']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Compare first-stage retrieval: dense + BM25 ensemble vs single-pass bge-m3 dense + sparse.
+
+Queries are known-item: a window of words cut from a random chunk, which should bring that
+chunk back (or pass --queries-file, JSONL of {"query", "relevant_ids": [...]}). Reports
+recall@k, MRR@10 and p50/p95 latency per mode; --rerank adds the cross-encoder on top.
+The BM25 index and the sparse index are built/loaded before timing starts.
+
+Usage: python scripts/benchmark_hybrid_retrieval.py --collection github_repos --queries 200 [--rerank]
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import chromadb
+from chromadb.config import Settings
+
+from src.retrievers import get_candidate_retriever, get_hybrid_retriever
+from src.sparse_index import get_sparse_index
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+COLLECTIONS = {
+    "github_repos": os.path.join(PROJECT_ROOT, "github.db"),
+    "comms_docs": os.path.join(PROJECT_ROOT, "planetix_comms.db"),
+}
+MODES = ("ensemble", "bge_m3")
+
+def known_item_queries(persist_dir: str, collection_name: str, n: int, window: int, seed: int) -> list[dict]:
+    collection = chromadb.PersistentClient(path=persist_dir, settings=Settings(anonymized_telemetry=False)).get_collection(collection_name)
+    rng = random.Random(seed)
+    offsets = rng.sample(range(collection.count()), min(n * 2, collection.count()))
+    queries = []
+    for offset in offsets:
+        chunk = collection.get(include=["documents"], limit=1, offset=offset)
+        words = chunk["documents"][0].split()
+        if len(words) < window:
+            continue
+        start = rng.randrange(len(words) - window + 1)
+        queries.append({"query": " ".join(words[start:start + window]), "relevant_ids": chunk["ids"]})
+        if len(queries) == n:
+            break
+    return queries
+
+def evaluate(retriever, queries: list[dict], k: int) -> dict:
+    retriever.invoke(queries[0]["query"])  # Warm-up (loads models and indexes), not timed
+    latencies, hits, reciprocal_ranks = [], [], []
+    for item in queries:
+        start = time.perf_counter()
+        docs = retriever.invoke(item["query"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        ranked = [doc.id for doc in docs]
+        relevant = set(item["relevant_ids"])
+        hits.append(len(relevant & set(ranked[:k])) / len(relevant))
+        rank = next((i for i, chunk_id in enumerate(ranked[:10], 1) if chunk_id in relevant), None)
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+    return {
+        "recall": float(np.mean(hits)),
+        "mrr10": float(np.mean(reciprocal_ranks)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default="github_repos", choices=list(COLLECTIONS))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--queries-file", help="JSONL of {query, relevant_ids} instead of known-item queries")
+    parser.add_argument("--window", type=int, default=8, help="Words per known-item query")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank", action="store_true", help="Also measure each mode behind the cross-encoder")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    persist_dir = COLLECTIONS[args.collection]
+    if get_sparse_index(args.collection) is None:
+        sys.exit(f"❌ No sparse index for {args.collection}, run scripts/build_sparse_index.py first")
+    if args.queries_file:
+        with open(args.queries_file, 'r', encoding='utf-8') as f:
+            queries = [json.loads(line) for line in f if line.strip()][:args.queries]
+    else:
+        queries = known_item_queries(persist_dir, args.collection, args.queries, args.window, args.seed)
+    print(f"🔎 {len(queries)} queries on {args.collection}, k={args.k}")
+
+    print(f"\n{'mode':<20}{'recall@k':>10}{'MRR@10':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for mode in MODES:
+        variants = [(mode, get_candidate_retriever(persist_dir, args.collection, mode=mode))]
+        if args.rerank:
+            variants.append((f"{mode} + rerank", get_hybrid_retriever(persist_dir, args.collection, top_n=args.k, mode=mode)))
+        for label, retriever in variants:
+            result = evaluate(retriever, queries, args.k)
+            print(f"{label:<20}{result['recall']:>10.3f}{result['mrr10']:>10.3f}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark Slack bridge throughput and memory per worker against the number of gunicorn workers.
+
+For each worker count the bridge is started in production mode (models and BM25 indexes
+preloaded in the parent, workers forked copy-on-write) with the benchmark-only
+/bench/retrieve route enabled. Concurrent clients then run hybrid retrievals, the same CPU-bound
+work a Slack question triggers, and /metrics/workers reports memory per process.
+
+Needs the usual .env (Bolt verifies SLACK_BOT_TOKEN at startup) and an ingested github.db.
+
+Usage: python scripts/benchmark_slack_workers.py --workers 1,2,4 --clients 8 --duration 30
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+QUERIES = ["how is the agent graph built", "README installation", "hybrid retriever reranking", "slack server events"]
+
+def wait_until_up(base_url: str, timeout: float = 600) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/", timeout=2).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(1)
+    return False
+
+def run_clients(base_url: str, clients: int, duration: float) -> list[float]:
+    """Hammer /bench/retrieve from `clients` threads for `duration` seconds, return latencies."""
+    end = time.time() + duration
+
+    def client_loop(i: int) -> list[float]:
+        latencies = []
+        with httpx.Client(timeout=120) as client:
+            while time.time() < end:
+                start = time.perf_counter()
+                client.get(f"{base_url}/bench/retrieve", params={"q": QUERIES[(i + len(latencies)) % len(QUERIES)]}).raise_for_status()
+                latencies.append(time.perf_counter() - start)
+        return latencies
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        return [lat for result in pool.map(client_loop, range(clients)) for lat in result]
+
+def bench(workers: int, clients: int, duration: float, port: int) -> dict:
+    env = {**os.environ, "SLACK_BENCH_ROUTES": "1"}
+    cmd = [sys.executable, "src/slack_server.py", "--prod", "--workers", str(workers), "--port", str(port)]
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        if not wait_until_up(base_url):
+            raise RuntimeError("Server did not come up")
+        run_clients(base_url, workers, 5)  # Warm every worker (first Chroma open, first query)
+        latencies = run_clients(base_url, clients, duration)
+        memory = httpx.get(f"{base_url}/metrics/workers", timeout=10).json()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=60)
+
+    return {
+        "workers": workers,
+        "rps": len(latencies) / duration,
+        "p50_s": statistics.median(latencies),
+        "p95_s": sorted(latencies)[int(len(latencies) * 0.95) - 1],
+        "parent_rss_mb": memory["parent"]["rss_mb"],
+        "worker_rss_mb": statistics.mean(w["rss_mb"] for w in memory["workers"]),
+        "worker_uss_mb": statistics.mean(w["uss_mb"] for w in memory["workers"]),
+        "worker_pss_mb": statistics.mean(w["pss_mb"] or 0 for w in memory["workers"]),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--port", type=int, default=3100)
+    args = parser.parse_args()
+
+    os.chdir(os.path.join(os.path.dirname(__file__), '..'))
+    print(f"{'workers':>8}{'req/s':>8}{'p50 s':>8}{'p95 s':>8}{'parent rss':>12}{'rss/worker':>12}{'uss/worker':>12}{'pss/worker':>12}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        r = bench(workers, args.clients, args.duration, args.port)
+        print(f"{r['workers']:>8}{r['rps']:>8.2f}{r['p50_s']:>8.2f}{r['p95_s']:>8.2f}"
+              f"{r['parent_rss_mb']:>12.0f}{r['worker_rss_mb']:>12.0f}{r['worker_uss_mb']:>12.0f}{r['worker_pss_mb']:>12.0f}")
+
+if __name__ == "__main__":
+    main()
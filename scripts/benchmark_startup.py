@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Measure cold-start import time and resident memory of each entry point.
+
+Every target is imported in a fresh interpreter (no shared module cache), so the numbers
+are what a user pays when starting Chainlit, the Slack bridge or an ingestion script.
+Models are loaded lazily on first use and are not part of these numbers.
+
+Usage: python scripts/benchmark_startup.py --runs 5 [--targets agent,app] [--importtime 15]
+"""
+
+import sys
+import os
+import json
+import argparse
+import statistics
+import subprocess
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Target name -> module imported the way its entry point imports it
+TARGETS = {
+    "agent": "agent",
+    "app": "app",
+    "slack_server": "slack_server",
+    "ingest_github": "ingestion.github_ingestor",
+    "ingest_local_md": "ingestion.local_md_ingestor",
+    "ingest_web": "ingestion.web_ingestor",
+}
+
+# Runs in the child interpreter: import the module, report seconds and RSS as JSON
+PROBE = """
+import sys, time, json, importlib, psutil
+sys.path[:0] = [{root!r}, {src!r}]
+start = time.perf_counter()
+importlib.import_module({module!r})
+seconds = time.perf_counter() - start
+print("__BENCH__" + json.dumps({{
+    "seconds": seconds,
+    "rss_mb": psutil.Process().memory_info().rss / 2**20,
+    "modules": len(sys.modules),
+    "torch_loaded": "torch" in sys.modules,
+    "chromadb_loaded": "chromadb" in sys.modules,
+}}))
+"""
+
+def child_env() -> dict:
+    env = dict(os.environ)
+    # slack_server exits without credentials; dummy values are enough to import it
+    env.setdefault("SLACK_SIGNING_SECRET", "benchmark")
+    env.setdefault("SLACK_BOT_TOKEN", "xoxb-benchmark")
+    env.setdefault("XAI_API_KEY", "benchmark")
+    return env
+
+def run_once(module: str) -> dict:
+    code = PROBE.format(root=PROJECT_ROOT, src=os.path.join(PROJECT_ROOT, "src"), module=module)
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, env=child_env(), capture_output=True, text=True
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("__BENCH__"):
+            return json.loads(line[len("__BENCH__"):])
+    raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+def import_profile(module: str, top: int) -> list[tuple[int, str]]:
+    """Slowest modules by cumulative import time (python -X importtime)."""
+    code = f"import sys; sys.path[:0] = [{PROJECT_ROOT!r}, {os.path.join(PROJECT_ROOT, 'src')!r}]; import {module}"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=PROJECT_ROOT, env=child_env(), capture_output=True, text=True
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line or line.endswith("| site"):
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--importtime", type=int, default=0, help="Also show the N slowest imports per target")
+    parser.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.targets.split(","):
+        module = TARGETS[name]
+        try:
+            runs = [run_once(module) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{name}: {e}", file=sys.stderr)
+            continue
+        results.append({
+            "target": name,
+            "import_s_median": statistics.median(r["seconds"] for r in runs),
+            "import_s_min": min(r["seconds"] for r in runs),
+            "rss_mb_median": statistics.median(r["rss_mb"] for r in runs),
+            "modules": runs[-1]["modules"],
+            "torch_loaded": runs[-1]["torch_loaded"],
+            "chromadb_loaded": runs[-1]["chromadb_loaded"],
+        })
+        if args.importtime:
+            print(f"\nSlowest imports for {name}:")
+            for cumulative_us, mod in import_profile(module, args.importtime):
+                print(f"  {cumulative_us / 1000:8.1f} ms  {mod}")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"\n{'target':<16}{'import s (median)':>19}{'min':>8}{'RSS MB':>9}{'modules':>9}{'torch':>7}{'chroma':>8}")
+    for r in results:
+        print(
+            f"{r['target']:<16}{r['import_s_median']:>19.2f}{r['import_s_min']:>8.2f}{r['rss_mb_median']:>9.1f}"
+            f"{r['modules']:>9}{str(r['torch_loaded']):>7}{str(r['chromadb_loaded']):>8}"
+        )
+
+if __name__ == "__main__":
+    main()
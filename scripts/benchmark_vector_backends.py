@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Compare dense search on Chroma and on the memory-mapped IVF index (VECTOR_BACKEND=mmap).
+
+Queries are embeddings sampled from the collection itself (no model needed). Each backend
+runs in its own process and reports open time, p50/p95 latency, recall@k against exact
+brute-force search, and resident memory after opening and after the queries.
+
+Usage: python scripts/benchmark_vector_backends.py --collection github_repos --queries 200 --k 10 [--nprobe 4,8,16]
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import psutil
+
+from src.mmap_index import VECTOR_INDEX_DIR, read_collection, _normalize
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+COLLECTIONS = {
+    "github_repos": os.path.join(PROJECT_ROOT, "github.db"),
+    "comms_docs": os.path.join(PROJECT_ROOT, "planetix_comms.db"),
+}
+
+def rss_mb() -> float:
+    return psutil.Process().memory_info().rss / 2**20
+
+def run_backend(backend: str, persist_dir: str, collection_name: str, queries_path: str, k: int, nprobe: int) -> dict:
+    """Child process: open one backend, run every query, return timings and the ids found."""
+    queries = np.load(queries_path)
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    if backend == "chroma":
+        import chromadb
+        from chromadb.config import Settings
+        collection = chromadb.PersistentClient(path=persist_dir, settings=Settings(anonymized_telemetry=False)).get_collection(collection_name)
+        search = lambda q: collection.query(query_embeddings=[q.tolist()], n_results=k)["ids"][0]
+    else:
+        from src.mmap_index import MmapIVFVectorStore
+        store = MmapIVFVectorStore(os.path.join(VECTOR_INDEX_DIR, collection_name), embedding=None, nprobe=nprobe)
+        search = lambda q: [doc.id for doc, _ in store.similarity_search_by_vector_with_score(q, k=k)]
+    open_seconds = time.perf_counter() - start
+    rss_open = rss_mb()
+
+    search(queries[0])  # Warm-up, not timed
+    latencies, found = [], []
+    for query in queries:
+        start = time.perf_counter()
+        found.append(search(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "open_s": open_seconds,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "rss_open_mb": rss_open - rss_before,
+        "rss_end_mb": rss_mb() - rss_before,
+        "found": found,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default="github_repos", choices=list(COLLECTIONS))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", default="8", help="Comma-separated nprobe values to try on the mmap index")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    persist_dir = COLLECTIONS[args.collection]
+
+    if args.worker:
+        backend, queries_path, nprobe = args.worker.split(":")
+        result = run_backend(backend, persist_dir, args.collection, queries_path, args.k, int(nprobe))
+        print("__BENCH__" + json.dumps(result))
+        return
+
+    if not os.path.exists(os.path.join(VECTOR_INDEX_DIR, args.collection, "manifest.json")):
+        sys.exit(f"No mmap index for {args.collection}: run scripts/export_mmap_index.py first")
+
+    # Ground truth: exact cosine search over every stored embedding
+    ids, vectors, _, _ = read_collection(persist_dir, args.collection)
+    vectors = _normalize(vectors)
+    rng = np.random.default_rng(0)
+    queries = vectors[rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)]
+    exact = [[ids[i] for i in np.argsort(-(vectors @ q))[:args.k]] for q in queries]
+    del vectors
+    queries_path = os.path.join(tempfile.mkdtemp(), "queries.npy")
+    np.save(queries_path, queries)
+
+    runs = [("chroma", 0)] + [("mmap", int(n)) for n in args.nprobe.split(",")]
+    print(f"{args.collection}: {len(ids)} vectors, {len(queries)} queries, k={args.k}\n")
+    print(f"{'backend':<14}{'open s':>8}{'p50 ms':>9}{'p95 ms':>9}{'recall':>8}{'RSS open MB':>13}{'RSS end MB':>12}")
+    for backend, nprobe in runs:
+        output = subprocess.run(
+            [sys.executable, __file__, "--collection", args.collection, "--k", str(args.k), "--worker", f"{backend}:{queries_path}:{nprobe}"],
+            capture_output=True, text=True, cwd=PROJECT_ROOT,
+        )
+        line = next((l for l in output.stdout.splitlines() if l.startswith("__BENCH__")), None)
+        if line is None:
+            print(f"{backend:<14}failed: {output.stderr.strip().splitlines()[-1:]}")
+            continue
+        result = json.loads(line[len("__BENCH__"):])
+        recall = np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(result["found"], exact)])
+        name = backend if backend == "chroma" else f"mmap/{nprobe}"
+        print(f"{name:<14}{result['open_s']:>8.2f}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{recall:>8.3f}"
+              f"{result['rss_open_mb']:>13.1f}{result['rss_end_mb']:>12.1f}")
+
+if __name__ == "__main__":
+    main()
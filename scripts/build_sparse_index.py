@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Backfill the bge-m3 sparse weights of existing collections and build their sparse index.
+
+New ingestions with RETRIEVAL_MODE=bge_m3 write the weights themselves; this encodes the
+chunks already stored in Chroma (their dense vectors are left as they are).
+
+Usage: python scripts/build_sparse_index.py [--collections github_repos,comms_docs] [--batch-size 64] [--missing-only]
+"""
+
+import sys
+import os
+import time
+import argparse
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import chromadb
+from chromadb.config import Settings
+
+from src.bge_m3 import get_hybrid_encoder
+from src.sparse_index import SparseStore, refresh_sparse_index
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+COLLECTIONS = {
+    "github_repos": os.path.join(PROJECT_ROOT, "github.db"),
+    "comms_docs": os.path.join(PROJECT_ROOT, "planetix_comms.db"),
+}
+
+def backfill(collection_name: str, batch_size: int, missing_only: bool):
+    persist_dir = COLLECTIONS[collection_name]
+    if not os.path.exists(persist_dir):
+        print(f"⚠️  Skipping {collection_name}: no Chroma database found")
+        return
+    collection = chromadb.PersistentClient(path=persist_dir, settings=Settings(anonymized_telemetry=False)).get_collection(collection_name)
+    store = SparseStore(collection_name)
+    done = store.ids() if missing_only else set()
+    encoder = get_hybrid_encoder()
+
+    start, encoded = time.perf_counter(), 0
+    total = collection.count()
+    for offset in range(0, total, batch_size):
+        batch = collection.get(include=["documents"], limit=batch_size, offset=offset)
+        todo = [(chunk_id, text) for chunk_id, text in zip(batch["ids"], batch["documents"]) if chunk_id not in done]
+        if not todo:
+            continue
+        _, sparse = encoder.encode([text for _, text in todo])
+        store.upsert([chunk_id for chunk_id, _ in todo], sparse)
+        encoded += len(todo)
+        print(f"   {min(offset + batch_size, total)}/{total}", end="\r")
+
+    manifest = refresh_sparse_index(collection, collection_name)
+    print(f"✅ {collection_name}: encoded {encoded} chunks in {time.perf_counter() - start:.0f}s, "
+          f"index has {manifest['count']} chunks / {manifest['nnz']} postings")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collections", default=",".join(COLLECTIONS))
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--missing-only", action="store_true", help="Only encode chunks without stored weights")
+    args = parser.parse_args()
+    for name in args.collections.split(","):
+        backfill(name, args.batch_size, args.missing_only)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Export Chroma collections to the columnar corpus store read by lexical search and repo filters.
+
+Re-run after ingesting outside the ingestors (they re-export after every run). With --compare,
+also measures the Python heap and time of building the in-memory BM25Retriever from Chroma
+against opening the corpus store, and the p50/p95 latency of both on the same queries.
+
+Usage: python scripts/export_corpus_store.py [--collections github_repos,comms_docs] [--compare] [--queries 100]
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+import tracemalloc
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import chromadb
+from chromadb.config import Settings
+
+from src.corpus_store import CORPUS_STORE_DIR, export_corpus, CorpusStore
+from ingestion.compaction import directory_size
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Collection name -> Chroma directory it is read from
+COLLECTIONS = {
+    "github_repos": os.path.join(PROJECT_ROOT, "github.db"),
+    "comms_docs": os.path.join(PROJECT_ROOT, "planetix_comms.db"),
+}
+
+def measure(label: str, build, queries: list[str]):
+    """Heap allocated while building, build time, and query latency of one lexical search."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    search = build()
+    build_s = time.perf_counter() - start
+    heap_mb = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+
+    search(queries[0])  # Warm-up, not timed
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<16}{heap_mb:>10.1f}{build_s:>10.2f}{np.percentile(latencies, 50):>10.1f}{np.percentile(latencies, 95):>10.1f}")
+
+def compare(collection, collection_name: str, n_queries: int):
+    rng = random.Random(0)
+    sample = collection.get(include=["documents"], limit=n_queries, offset=rng.randrange(max(collection.count() - n_queries, 1)))
+    queries = [" ".join(rng.sample(text.split(), min(6, len(text.split())))) for text in sample["documents"] if text.split()]
+
+    def build_bm25():
+        from langchain_community.retrievers import BM25Retriever
+        from langchain_core.documents import Document
+        data = collection.get(include=["documents", "metadatas"])
+        retriever = BM25Retriever.from_documents([
+            Document(page_content=text, metadata=meta or {}, id=doc_id)
+            for doc_id, text, meta in zip(data["ids"], data["documents"], data["metadatas"])
+        ])
+        retriever.k = 10
+        return retriever.invoke
+
+    def open_store():
+        store = CorpusStore(os.path.join(CORPUS_STORE_DIR, collection_name))
+        return lambda query: store.lexical_search(query, 10)
+
+    print(f"\n{'':<16}{'heap MB':>10}{'build s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    measure("BM25Retriever", build_bm25, queries)
+    measure("corpus store", open_store, queries)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collections", default=",".join(COLLECTIONS), help="Comma-separated collections to export")
+    parser.add_argument("--compare", action="store_true", help="Also compare against the in-memory BM25Retriever")
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    for collection_name in args.collections.split(","):
+        persist_dir = COLLECTIONS.get(collection_name)
+        if not persist_dir or not os.path.exists(persist_dir):
+            print(f"⚠️  Skipping {collection_name}: no Chroma database found")
+            continue
+        client = chromadb.PersistentClient(path=persist_dir, settings=Settings(anonymized_telemetry=False))
+        collection = client.get_collection(collection_name)
+        manifest = export_corpus(collection, collection_name)
+        size_mb = directory_size(os.path.join(CORPUS_STORE_DIR, collection_name)) / 2**20
+        print(f"✅ {collection_name}: {manifest['count']} chunks, {manifest['vocab']} terms, "
+              f"{size_mb:.1f} MB, {manifest['seconds']}s")
+        if args.compare and manifest["count"]:
+            compare(collection, collection_name, args.queries)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Export Chroma collections to the memory-mapped IVF index used by VECTOR_BACKEND=mmap.
+
+Re-run after ingesting outside the ingestors (they re-export themselves when VECTOR_BACKEND=mmap).
+
+Usage: python scripts/export_mmap_index.py [--collections github_repos,comms_docs] [--nlist 256]
+"""
+
+import sys
+import os
+import argparse
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.mmap_index import VECTOR_INDEX_DIR, export_collection
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Collection name -> Chroma directory it is read from
+COLLECTIONS = {
+    "github_repos": os.path.join(PROJECT_ROOT, "github.db"),
+    "comms_docs": os.path.join(PROJECT_ROOT, "planetix_comms.db"),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collections", default=",".join(COLLECTIONS), help="Comma-separated collections to export")
+    parser.add_argument("--nlist", type=int, default=None, help="Inverted lists (default: ~4*sqrt(rows))")
+    args = parser.parse_args()
+
+    for collection_name in args.collections.split(","):
+        persist_dir = COLLECTIONS.get(collection_name)
+        if not persist_dir or not os.path.exists(persist_dir):
+            print(f"⚠️  Skipping {collection_name}: no Chroma database found")
+            continue
+        manifest = export_collection(persist_dir, collection_name, nlist=args.nlist)
+        size_mb = sum(
+            os.path.getsize(os.path.join(VECTOR_INDEX_DIR, collection_name, name))
+            for name in os.listdir(os.path.join(VECTOR_INDEX_DIR, collection_name))
+        ) / 2**20
+        print(f"✅ {collection_name}: {manifest['count']} vectors, {manifest['nlist']} lists, "
+              f"{size_mb:.1f} MB, {manifest['seconds']}s")
+
+if __name__ == "__main__":
+    main()
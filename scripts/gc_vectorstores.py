@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Delete superseded and orphaned chunks from the Chroma stores, then compact them.
+
+Chunks are classified from the ingest ledger (see ingestion/compaction.py); untracked
+chunks are never deleted. After deleting, chroma.sqlite3 is VACUUMed; --rebuild also
+rewrites the HNSW index (deleted vectors are only marked in it), applying the collection's
+current HNSW profile. Disk size, chunk count, dense query latency and the time to read
+every document (what a BM25 build does) are reported before and after.
+
+Stop the Slack bridge and Chainlit first: Chroma must not be written while it is open elsewhere.
+
+Usage: python scripts/gc_vectorstores.py [--collections github_repos,comms_docs] [--dry-run] [--rebuild]
+"""
+
+import sys
+import os
+import argparse
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import chromadb
+from chromadb.config import Settings
+from chromadb.api.client import SharedSystemClient
+
+from ingestion.compaction import (
+    load_ledger, classify_chunks, delete_chunks, vacuum, rebuild_collection,
+    directory_size, sample_queries, measure_latency,
+)
+from src.hnsw_profiles import get_profile, collection_configuration
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Collection name -> (Chroma directory, metadata field the ingestors use as scope)
+COLLECTIONS = {
+    "github_repos": (os.path.join(PROJECT_ROOT, "github.db"), "repo"),
+    "comms_docs": (os.path.join(PROJECT_ROOT, "planetix_comms.db"), "url"),
+}
+
+def open_client(persist_dir: str):
+    SharedSystemClient.clear_system_cache()
+    return chromadb.PersistentClient(path=persist_dir, settings=Settings(anonymized_telemetry=False))
+
+def snapshot(persist_dir: str, collection, queries) -> dict:
+    return {"chunks": collection.count(), "size_mb": directory_size(persist_dir) / 2**20, **measure_latency(collection, queries)}
+
+def gc_collection(collection_name: str, dry_run: bool, rebuild: bool):
+    persist_dir, scope_field = COLLECTIONS[collection_name]
+    if not os.path.exists(persist_dir):
+        print(f"⚠️  Skipping {collection_name}: no Chroma database found")
+        return
+    ledger_entry = load_ledger(persist_dir).get(collection_name)
+    if not ledger_entry:
+        print(f"⚠️  Skipping {collection_name}: no completed ingestion recorded yet, re-ingest once to start tracking")
+        return
+
+    client = open_client(persist_dir)
+    collection = client.get_collection(collection_name)
+    groups = classify_chunks(collection, ledger_entry, scope_field)
+    stale = groups["superseded"] + groups["orphaned"]
+    print(f"\n{collection_name}: " + ", ".join(f"{len(ids)} {name}" for name, ids in groups.items()))
+    if dry_run or (not stale and not rebuild):
+        return
+
+    queries = sample_queries(collection, groups["live"] or groups["untracked"])
+    before = snapshot(persist_dir, collection, queries)
+    delete_chunks(collection, stale)
+    print(f"🗑️  Deleted {len(stale)} chunks")
+    if rebuild:
+        rebuild_collection(client, collection_name, collection_configuration(get_profile(collection_name)))
+        print("🔨 Rebuilt the HNSW index")
+    client = open_client(persist_dir)  # Drop our handles before VACUUM
+    vacuum(persist_dir)
+    after = snapshot(persist_dir, client.get_collection(collection_name), queries)
+
+    print(f"{'':<14}{'before':>10}{'after':>10}")
+    for key, label in (("chunks", "chunks"), ("size_mb", "size MB"), ("p50_ms", "p50 ms"), ("p95_ms", "p95 ms"), ("read_all_s", "read all s")):
+        print(f"{label:<14}{before[key]:>10.2f}{after[key]:>10.2f}")
+    print(f"✅ Reclaimed {before['size_mb'] - after['size_mb']:.1f} MB")
+
+    from src.retrievers import VECTOR_BACKEND
+    if VECTOR_BACKEND == "mmap":
+        from src.mmap_index import export_collection
+        export_collection(persist_dir, collection_name)
+        print("📦 Re-exported the mmap index")
+
+    from src.corpus_store import export_corpus
+    export_corpus(client.get_collection(collection_name), collection_name)
+    print("📦 Re-exported the corpus store")
+
+    from src.sparse_index import refresh_sparse_index
+    if refresh_sparse_index(client.get_collection(collection_name), collection_name):
+        print("📦 Rebuilt the sparse index")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collections", default=",".join(COLLECTIONS))
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+    parser.add_argument("--rebuild", action="store_true", help="Also rewrite the HNSW index")
+    args = parser.parse_args()
+    for collection_name in args.collections.split(","):
+        gc_collection(collection_name, args.dry_run, args.rebuild)
+
+if __name__ == "__main__":
+    main()
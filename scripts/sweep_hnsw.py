@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Sweep HNSW settings on a real collection: recall@k against exact search and query latency.
+
+The collection's stored embeddings are copied into temporary collections, one per
+(space, M, construction_ef); search_ef is changed in place on each of them. Queries are
+stored embeddings held out of the copies, so no embedding model is needed. The fastest
+setting that reaches --target-recall is suggested and, with --save, written to
+config/hnsw_profiles.json (space, M and construction_ef apply to newly created collections,
+search_ef also to existing ones on the next ingestion).
+
+Usage: python scripts/sweep_hnsw.py --collection github_repos --M 8,16,32 --construction-ef 100,200 --search-ef 10,25,50,100,200 [--save]
+"""
+
+import sys
+import os
+import time
+import shutil
+import argparse
+import itertools
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import chromadb
+from chromadb.config import Settings
+from chromadb.api.client import SharedSystemClient
+
+from src.hnsw_profiles import get_profile, save_profile, collection_configuration
+from src.mmap_index import read_collection
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+COLLECTIONS = {
+    "github_repos": os.path.join(PROJECT_ROOT, "github.db"),
+    "comms_docs": os.path.join(PROJECT_ROOT, "planetix_comms.db"),
+    "slack_messages": os.path.join(PROJECT_ROOT, "slack.db"),
+}
+
+def exact_neighbors(vectors: np.ndarray, queries: np.ndarray, space: str, k: int) -> np.ndarray:
+    """Brute-force top-k rows for each query, with the distance Chroma uses for `space`."""
+    if space == "cosine":
+        unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        scores = (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ unit.T
+    elif space == "ip":
+        scores = queries @ vectors.T
+    else:
+        scores = -((queries ** 2).sum(1)[:, None] - 2 * queries @ vectors.T + (vectors ** 2).sum(1)[None, :])
+    return np.argsort(-scores, axis=1)[:, :k]
+
+def open_client(path: str):
+    """Fresh client: a loaded HNSW index keeps its search_ef until the collection is reopened."""
+    SharedSystemClient.clear_system_cache()
+    return chromadb.PersistentClient(path=path, settings=Settings(anonymized_telemetry=False))
+
+def build_copy(client, name: str, profile: dict, ids: list[str], vectors: np.ndarray) -> float:
+    """Temporary collection holding the embeddings with this profile; returns build seconds."""
+    collection = client.create_collection(name, configuration=collection_configuration(profile))
+    batch = client.get_max_batch_size()
+    start = time.perf_counter()
+    for i in range(0, len(ids), batch):
+        collection.add(ids=ids[i:i + batch], embeddings=vectors[i:i + batch])
+    return time.perf_counter() - start
+
+def measure(collection, queries: np.ndarray, exact_ids: list[set], k: int) -> dict:
+    collection.query(query_embeddings=queries[:1], n_results=k)  # Warm-up, not timed
+    latencies, recalls = [], []
+    for query, expected in zip(queries, exact_ids):
+        start = time.perf_counter()
+        found = collection.query(query_embeddings=[query], n_results=k, include=[])["ids"][0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(expected & set(found)) / len(expected))
+    return {"recall": float(np.mean(recalls)), "p50_ms": float(np.percentile(latencies, 50)), "p95_ms": float(np.percentile(latencies, 95))}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default="github_repos", choices=list(COLLECTIONS))
+    parser.add_argument("--queries", type=int, default=200, help="Held-out stored embeddings used as queries")
+    parser.add_argument("--k", type=int, default=None, help="Recall@k (default: the profile's k)")
+    parser.add_argument("--space", default=None, help="Comma-separated spaces (default: the profile's)")
+    parser.add_argument("--M", default="8,16,32")
+    parser.add_argument("--construction-ef", default="100,200")
+    parser.add_argument("--search-ef", default="10,25,50,100,200")
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--save", action="store_true", help="Write the suggested profile to the profiles file")
+    args = parser.parse_args()
+
+    profile = get_profile(args.collection)
+    k = args.k or profile["k"]
+    ids, vectors, _, _ = read_collection(COLLECTIONS[args.collection], args.collection)
+    rng = np.random.default_rng(0)
+    held_out = rng.choice(len(ids), min(args.queries, len(ids) // 10), replace=False)
+    keep = np.setdiff1d(np.arange(len(ids)), held_out)
+    queries, vectors = vectors[held_out], vectors[keep]
+    ids = [ids[i] for i in keep]
+    print(f"{args.collection}: {len(ids)} vectors (dim {vectors.shape[1]}), {len(queries)} queries, recall@{k}\n")
+
+    spaces = (args.space or profile["space"]).split(",")
+    exact = {space: [{ids[i] for i in row} for row in exact_neighbors(vectors, queries, space, k)] for space in spaces}
+
+    work_dir = tempfile.mkdtemp(prefix="hnsw_sweep_")
+    client = open_client(work_dir)
+    results = []
+    print(f"{'space':<8}{'M':>4}{'c_ef':>6}{'s_ef':>6}{'build s':>9}{'recall':>8}{'p50 ms':>8}{'p95 ms':>8}")
+    try:
+        grid = itertools.product(spaces, [int(m) for m in args.M.split(",")], [int(c) for c in args.construction_ef.split(",")])
+        for n, (space, m, construction_ef) in enumerate(grid):
+            candidate = {**profile, "space": space, "M": m, "construction_ef": construction_ef}
+            name = f"sweep_{n}"
+            build_seconds = build_copy(client, name, candidate, ids, vectors)
+            for search_ef in [int(s) for s in args.search_ef.split(",")]:
+                client.get_collection(name).modify(configuration={"hnsw": {"ef_search": search_ef}})
+                client = open_client(work_dir)
+                collection = client.get_collection(name)
+                result = {**candidate, "search_ef": search_ef, "build_s": build_seconds, **measure(collection, queries, exact[space], k)}
+                results.append(result)
+                print(f"{space:<8}{m:>4}{construction_ef:>6}{search_ef:>6}{build_seconds:>9.1f}"
+                      f"{result['recall']:>8.3f}{result['p50_ms']:>8.2f}{result['p95_ms']:>8.2f}")
+            client.delete_collection(name)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    passing = [r for r in results if r["recall"] >= args.target_recall]
+    if not passing:
+        print(f"\n⚠️  No setting reached recall {args.target_recall}; try larger M / search_ef")
+        return
+    best = min(passing, key=lambda r: (r["p95_ms"], r["build_s"]))
+    print(f"\n✅ Suggested for {args.collection}: space={best['space']} M={best['M']} construction_ef={best['construction_ef']} "
+          f"search_ef={best['search_ef']} (recall {best['recall']:.3f}, p95 {best['p95_ms']:.2f} ms)")
+    if args.save:
+        save_profile(args.collection, {**best, "k": profile["k"]})
+        print("💾 Saved; recreate the collection (re-ingest) for space/M/construction_ef to apply")
+
+if __name__ == "__main__":
+    main()
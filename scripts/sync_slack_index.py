@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Sync the local Slack message index used by retrieve_slack_history.
+
+Incremental by default: only messages newer than the last synced ts (plus replies in recently
+active threads) are fetched. Run it from cron to keep the index fresh without the tool ever
+waiting on the Slack API.
+
+Usage: python scripts/sync_slack_index.py [--channels C123,C456] [--full]
+"""
+
+import sys
+import os
+import argparse
+import logging
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from src import slack_index
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", default=",".join(slack_index.SLACK_INDEX_CHANNELS), help="Comma-separated channel IDs")
+    parser.add_argument("--full", action="store_true", help="Re-fetch the whole history instead of only new messages")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    channels = [c.strip() for c in args.channels.split(",") if c.strip()]
+    if not channels:
+        print("❌ No channels: set SLACK_INDEX_CHANNELS or SLACK_CHANNEL_ID, or pass --channels")
+        sys.exit(1)
+    for channel in channels:
+        result = slack_index.sync_channel(channel, full=args.full)
+        print(
+            f"✅ {channel}: {result['fetched']} new messages, {result['thread_replies']} thread replies, "
+            f"{result['threads_reindexed']} threads re-embedded in {result['seconds']}s"
+        )
+
+if __name__ == "__main__":
+    main()
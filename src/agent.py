@@ -1,10 +1,15 @@
 from pydantic import BaseModel, Field
-from typing import Literal, Annotated, Sequence, TypedDict, cast
+from typing import Literal, Annotated, Optional, Sequence, TypedDict, cast
 from pathlib import Path
 import logging
+import os
+import time
 
 from dotenv import load_dotenv
 
+# Load .env before the project modules below read their settings
+load_dotenv()
+
 # Configure logging to file
 logging.basicConfig(
     filename='logs/agent.log', 
@@ -15,19 +20,20 @@ logging.basicConfig(
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("huggingface_hub").setLevel(logging.WARNING)
 
-from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages 
 from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage, SystemMessage, AIMessage
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 
 # Import configuration and tools
 from config.llm_config import llm_model
+from src.checkpointer import get_checkpointer
+from src.history import compact_history
 from src.tools import (
     github_agent_tools, comms_agent_tools,
     github_agent_tool_dict, comms_agent_tool_dict
 )
 
-load_dotenv()
 logger = logging.getLogger(__name__)
 
 # --- SCHEMA FOR STRUCTURED OUTPUT ---
@@ -46,35 +52,68 @@ class AgentState(TypedDict):
     """State for the agent graph, containing messages."""
     messages: Annotated[Sequence[BaseMessage], add_messages]
     next: str  # Tracks the next node for conditional edges
+    deadline: float  # Wall-clock time (epoch seconds) by which the current request must be answered
+    tool_rounds: int  # Tool rounds executed for the current request
+
+# Per-request budgets for the agent <-> tools loops (reset by the supervisor on every new human message)
+REQUEST_DEADLINE_SECONDS = float(os.environ.get("AGENT_REQUEST_DEADLINE_SECONDS", 90))
+MAX_TOOL_ROUNDS = int(os.environ.get("AGENT_MAX_TOOL_ROUNDS", 4))
+# Tool calls issued together in one LLM turn run concurrently, up to this many at once
+MAX_PARALLEL_TOOL_CALLS = int(os.environ.get("AGENT_MAX_PARALLEL_TOOL_CALLS", 4))
+
+FORCE_ANSWER_PROMPT = (
+    "The tool budget for this request is exhausted ({reason}). Do not call any more tools. "
+    "Answer the user now using only the information already retrieved in this conversation, "
+    "and say briefly if the answer may be incomplete."
+)
+
+# How often each budget was hit since startup (logged on every hit)
+budget_limit_hits = {"deadline": 0, "tool_rounds": 0}
 
 # Bind LLMs to specific tool sets
 github_agent_llm = llm_model.bind_tools(github_agent_tools)
 comms_agent_llm = llm_model.bind_tools(comms_agent_tools)
+# Same tool schemas, but the model may not call them; used to force a final answer
+github_agent_final_llm = llm_model.bind_tools(github_agent_tools, tool_choice="none")
+comms_agent_final_llm = llm_model.bind_tools(comms_agent_tools, tool_choice="none")
+
+def _exhausted_budget(state: AgentState) -> Optional[str]:
+    """Return which budget (if any) the current request has run out of."""
+    if state.get("tool_rounds", 0) >= MAX_TOOL_ROUNDS:
+        return "tool_rounds"
+    deadline = state.get("deadline")
+    if deadline and time.time() >= deadline:
+        return "deadline"
+    return None
+
+def _run_tool_call(tool_call: dict, tool_dict: dict) -> ToolMessage:
+    tool_name = tool_call["name"]
+    logger.info(f"Executing tool: {tool_name}")
+    tool = tool_dict.get(tool_name)
+    if not tool:
+        return ToolMessage(content=f"Unknown tool: {tool_name}", tool_call_id=tool_call["id"], status="error")
+    try:
+        result = tool.invoke(tool_call)
+        logger.info(f"Execution result: {str(result)[:200]}")
+        return ToolMessage(content=str(result), tool_call_id=tool_call["id"])
+    except Exception as e:
+        logger.error(f"Tool '{tool_name}' failed: {e}")
+        return ToolMessage(content=f"Error: {str(e)}", tool_call_id=tool_call["id"], status="error")
 
 def _execute_tools(state: AgentState, tool_dict: dict):
-    """Execute tools based on the last message's tool calls."""
+    """Execute tools based on the last message's tool calls (several calls run in parallel)."""
     messages = state["messages"]
     last_message = messages[-1]
     
     # Extract tool calls safely
     tool_calls = getattr(last_message, "tool_calls", [])
-    tool_results = []
-    
-    for tool_call in tool_calls:
-        tool_name = tool_call["name"]
-        logger.info(f"Executing tool: {tool_name}")
-        tool = tool_dict.get(tool_name)
-        if tool:
-            try:
-                result = tool.invoke(tool_call)
-                logger.info(f"Execution result: {str(result)[:200]}")
-                tool_results.append(ToolMessage(content=str(result), tool_call_id=tool_call["id"]))
-            except Exception as e:
-                logger.error(f"Tool '{tool_name}' failed: {e}")
-                tool_results.append(ToolMessage(content=f"Error: {str(e)}", tool_call_id=tool_call["id"], status="error"))
-        else:
-            tool_results.append(ToolMessage(content=f"Unknown tool: {tool_name}", tool_call_id=tool_call["id"], status="error"))
-    return {"messages": tool_results}
+    if len(tool_calls) > 1:
+        # Context-copying pool keeps callbacks (usage tracking, Chainlit steps) attached to each call
+        with ContextThreadPoolExecutor(max_workers=min(len(tool_calls), MAX_PARALLEL_TOOL_CALLS)) as pool:
+            tool_results = list(pool.map(lambda tool_call: _run_tool_call(tool_call, tool_dict), tool_calls))
+    else:
+        tool_results = [_run_tool_call(tool_call, tool_dict) for tool_call in tool_calls]
+    return {"messages": tool_results, "tool_rounds": state.get("tool_rounds", 0) + 1}
 
 # Tool executors
 def github_agent_tool_exec(state: AgentState):
@@ -84,18 +123,36 @@ def comms_agent_tool_exec(state: AgentState):
     return _execute_tools(state, comms_agent_tool_dict)
 
 # Agent call functions
+def _agent_call(state: AgentState, agent_llm, final_llm, prompt: str, agent_name: str):
+    """Invoke an agent LLM, forcing a tool-free final answer once the request budget is spent."""
+    messages = [SystemMessage(content=prompt)] + compact_history(state["messages"])
+    exhausted = _exhausted_budget(state)
+    if exhausted is None:
+        return {"messages": [agent_llm.invoke(messages)]}
+
+    budget_limit_hits[exhausted] += 1
+    logger.warning(
+        f"{agent_name}: {exhausted} budget exhausted after {state.get('tool_rounds', 0)} tool rounds, "
+        f"forcing final answer (hits so far: {budget_limit_hits})"
+    )
+    reason = "time limit reached" if exhausted == "deadline" else f"maximum of {MAX_TOOL_ROUNDS} tool rounds reached"
+    response = final_llm.invoke(messages + [SystemMessage(content=FORCE_ANSWER_PROMPT.format(reason=reason))])
+    if getattr(response, "tool_calls", None):
+        # Never leave unanswered tool calls in the checkpointed history
+        response = AIMessage(content=response.content)
+    return {"messages": [response]}
+
 def github_agent_call(state: AgentState):
     prompt_path = Path('config/github_systemmessage.md')
     prompt = prompt_path.read_text(encoding='utf-8') if prompt_path.exists() else "You are a GitHub assistant."
-    response = github_agent_llm.invoke([SystemMessage(content=prompt)] + list(state["messages"]))
-    logger.info(f"GitHub agent response tool_calls: {getattr(response, 'tool_calls', [])}")
-    return {"messages": [response]}
+    result = _agent_call(state, github_agent_llm, github_agent_final_llm, prompt, "GitHub agent")
+    logger.info(f"GitHub agent response tool_calls: {getattr(result['messages'][0], 'tool_calls', [])}")
+    return result
 
 def comms_agent_call(state: AgentState):
     prompt_path = Path('config/comms_systemmessage.md')
     prompt = prompt_path.read_text(encoding='utf-8') if prompt_path.exists() else "You are a PlanetIX communications assistant."
-    response = comms_agent_llm.invoke([SystemMessage(content=prompt)] + list(state["messages"]))
-    return {"messages": [response]}
+    return _agent_call(state, comms_agent_llm, comms_agent_final_llm, prompt, "Comms agent")
 
 # --- SUPERVISOR WITH STRUCTURED OUTPUT ---
 def supervisor(state: AgentState):
@@ -132,7 +189,8 @@ def supervisor(state: AgentState):
 
     logger.info(f"Supervisor routing to {next_node} (Reason: {reason})")
     
-    return {"next": next_node}
+    # Start the budgets for this request
+    return {"next": next_node, "deadline": time.time() + REQUEST_DEADLINE_SECONDS, "tool_rounds": 0}
 
 # Graph construction
 graph = StateGraph(AgentState)
@@ -172,4 +230,4 @@ graph.add_conditional_edges("comms_agent", should_continue, {"tools": "comms_age
 graph.add_edge("comms_agent_tools", "comms_agent")
 
 # Compile the graph
-app = graph.compile(checkpointer=InMemorySaver())
+app = graph.compile(checkpointer=get_checkpointer())
@@ -3,8 +3,7 @@ import sys
 import logging
 logging.getLogger("httpx").setLevel(logging.WARNING)
 import json
-import asyncio
-from datetime import datetime, timezone
+from collections import OrderedDict
 from typing import cast
 
 # Ensure backend/agent can be found
@@ -12,6 +11,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 import chainlit as cl
 from agent import app as langgraph_app
+from src.metrics import NodeUsageTracker, format_usage_table
+from src.warmup import start_warmup
+from src.conversation_log import log_event
 from langchain_core.messages import HumanMessage
 from langchain_core.runnables import RunnableConfig
 
@@ -23,10 +25,12 @@ AGENT_NAMES = {
     "ambiguous": "Confused Agent"
 }
 
-# --- UTILS ---
-log_lock = asyncio.Lock()
-LOG_FILE_PATH = os.path.join(os.path.dirname(__file__), '..', 'logs', 'conversation_history.log')
+# Tool steps show only this much of the output; full metadata is serialized on request
+TOOL_PREVIEW_CHARS = int(os.environ.get("CHAINLIT_TOOL_PREVIEW_CHARS", 1500))
+# Raw tool event data kept per session for the "Full metadata" button (oldest dropped first)
+TOOL_METADATA_MAX_ENTRIES = int(os.environ.get("CHAINLIT_TOOL_METADATA_MAX_ENTRIES", 20))
 
+# --- UTILS ---
 def serializable_dict(obj):
     """Recursively converts LangChain messages to serializable dicts for JSON logging."""
     if hasattr(obj, "to_json"):
@@ -35,65 +39,78 @@ def serializable_dict(obj):
         return obj.dict()
     return str(obj)
 
-def sanitize_log(message: str) -> str:
-    """Mask sensitive data like tokens and keys in log messages."""
-    import re
-    # Mask Slack bot token (xoxb-)
-    message = re.sub(r'xoxb-[^\s]+', '[SLACK_BOT_TOKEN_MASKED]', message)
-    # Mask xAI API key (xai-)
-    message = re.sub(r'xai-[^\s]+', '[XAI_API_KEY_MASKED]', message)
-    # Mask HuggingFace token (hf_)
-    message = re.sub(r'hf_[^\s]+', '[HF_TOKEN_MASKED]', message)
-    # Mask Slack channel IDs (C0A...)
-    message = re.sub(r'C[0-9A-Z]{8,}', '[SLACK_CHANNEL_MASKED]', message)
-    # Mask user IDs (U0A...)
-    message = re.sub(r'U[0-9A-Z]{8,}', '[SLACK_USER_MASKED]', message)
-    return message
-
-async def log_to_file(message: str):
-    """Asynchronously log a sanitized message to the conversation history file with a timestamp."""
-    sanitized_message = sanitize_log(message)
-    timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
-    log_entry = f"[{timestamp}] {sanitized_message}\n"
-    async with log_lock:
-        os.makedirs(os.path.dirname(LOG_FILE_PATH), exist_ok=True)
-        with open(LOG_FILE_PATH, 'a', encoding='utf-8') as f:
-            f.write(log_entry)
+def preview_text(text: str, max_chars: int = TOOL_PREVIEW_CHARS) -> str:
+    """First `max_chars` of a tool output, with a note on how much was left out."""
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}\n\n... [+{len(text) - max_chars} chars, use 'Full metadata' to see everything]"
+
+def store_tool_metadata(run_id: str, data: dict):
+    """Keep the raw event data for a tool step, bounded per session. Nothing is serialized here."""
+    store = cl.user_session.get("tool_metadata")
+    if store is None:
+        store = OrderedDict()
+        cl.user_session.set("tool_metadata", store)
+    store[run_id] = data
+    while len(store) > TOOL_METADATA_MAX_ENTRIES:
+        store.popitem(last=False)
 
 previous_thread_id = None
 
+# Load models, open collections and build BM25 indexes before the first question arrives
+start_warmup()
+
 # --- CHAINLIT EVENTS ---
 
 @cl.on_stop
 async def on_session_stop():
     """Triggered when the user session ends or the chat is closed."""
-    await log_to_file("=== Conversation End ===")
+    log_event("end", cl.user_session.get("thread_id", "default"))
+
+@cl.action_callback("show_tool_metadata")
+async def on_show_tool_metadata(action: cl.Action):
+    """Serialize and send the full tool event data only when the user asks for it."""
+    store = cl.user_session.get("tool_metadata") or {}
+    data = store.get(action.payload.get("run_id"))
+    if data is None:
+        await cl.Message(content="This tool's metadata is no longer available.", author="System", parent_id=action.forId).send()
+        return
+    safe_data = json.dumps(data, default=serializable_dict, indent=2)
+    details = cl.Text(
+        name="Full Metadata",
+        content=f"```json\n{safe_data}\n```",
+        display="inline"
+    )
+    await cl.Message(content="", author="System", elements=[details], parent_id=action.forId).send()
+    await action.remove()
 
 @cl.on_message
 async def main(message: cl.Message):
     """Handle incoming user messages and stream responses from the LangGraph agent."""
     global previous_thread_id
     
+    current_thread_id = cl.user_session.get("thread_id", "default")
+
+    # Per-node token and latency accounting for this request
+    usage_tracker = NodeUsageTracker(thread_id=current_thread_id, source="chainlit")
+
     # Configuration for LangGraph (manages conversation memory)
     config = cast(RunnableConfig, {
-        "configurable": {"thread_id": cl.user_session.get("thread_id", "default")}
+        "configurable": {"thread_id": current_thread_id},
+        "callbacks": [usage_tracker]
     })
     
-    current_thread_id = config.get("configurable", {}).get("thread_id", "default")
-    
     # New thread detection for logging
     if previous_thread_id and previous_thread_id != current_thread_id:
-        await log_to_file("=== Conversation End ===")
+        log_event("end", previous_thread_id)
     previous_thread_id = current_thread_id
 
-    await log_to_file(f"Human: {message.content}")
+    log_event("human", current_thread_id, content=message.content)
 
     # Input preparation
     inputs = {"messages": [HumanMessage(content=message.content)]}
     ai_msg = None
     tool_steps = {}
-    total_tokens = cl.user_session.get("total_tokens", 0)
-    message_tokens = 0
     ai_response_buffer = []
     
     # Default name before any node is identified
@@ -115,7 +132,7 @@ async def main(message: cl.Message):
             tool_input = event["data"].get("input")
             run_id = event["run_id"]
 
-            await log_to_file(f"Tool Call: {tool_name} - Input: {json.dumps(tool_input)}")
+            log_event("tool_call", current_thread_id, tool=tool_name, input=tool_input)
 
             # Create an expandable UI element for the tool execution
             step = cl.Step(name=f"{tool_name} Execution", type="tool")
@@ -128,20 +145,19 @@ async def main(message: cl.Message):
             if run_id in tool_steps:
                 step = tool_steps[run_id]
                 tool_output = event["data"].get("output")
-                await log_to_file(f"Execution result: {tool_output}")
-
-                # Safely serialize metadata for display
-                safe_data = json.dumps(event["data"], default=serializable_dict, indent=2)
+                log_event("tool_result", current_thread_id, tool=event.get("name"), output=str(tool_output))
 
-                details = cl.Text(
-                    name="Response & Metadata",
-                    content=f"### Tool Response\n{tool_output}\n\n### Full Metadata\n```json\n{safe_data}\n```",
-                    display="inline"
-                )
-
-                step.elements = [details]
-                step.output = "Tool execution completed."
+                # Only a capped preview goes over the websocket; the raw data stays server-side
+                # until the user clicks "Full metadata"
+                store_tool_metadata(run_id, event["data"])
+                step.output = preview_text(str(getattr(tool_output, "content", tool_output)))
                 await step.update()
+                await cl.Action(
+                    name="show_tool_metadata",
+                    payload={"run_id": run_id},
+                    label="Full metadata",
+                    icon="file-json"
+                ).send(for_id=step.id)
 
         # CHAT MODEL STREAMING (Real-time response)
         elif kind == "on_chat_model_stream":
@@ -164,28 +180,20 @@ async def main(message: cl.Message):
         # CHAT MODEL END (Finalizing node execution)
         elif kind == "on_chat_model_end":
             full_ai_response = ''.join(ai_response_buffer)
-            await log_to_file(f"AI ({current_agent_name}): {full_ai_response}")
+            log_event("ai", current_thread_id, agent=current_agent_name, content=full_ai_response)
             ai_response_buffer.clear() 
 
-            # Handle token usage accounting
-            #output = event["data"].get("output")
-            #if output and hasattr(output, 'usage_metadata') and output.usage_metadata:
-            #    usage = output.usage_metadata
-            #    tokens = usage.get("total_tokens", 0)
-            #    message_tokens += tokens
-            #    total_tokens += tokens
-            #    cl.user_session.set("total_tokens", total_tokens)
-
     # 4. Finalize the AI message in the UI
     if ai_msg:
         await ai_msg.update()
 
-    # 5. Token usage report (System message)
-    #if message_tokens > 0:
-    #    await cl.Message(
-    #        content=f"**Tokens used:** {message_tokens} | **Total session:** {total_tokens}", 
-    #        author="System"
-    #    ).send()
+    # 5. Token and latency report per node (System message + logs/metrics.jsonl)
+    usage = usage_tracker.finish()
+    cl.user_session.set("total_tokens", usage["thread"]["total_tokens"])
+    await cl.Message(
+        content=format_usage_table(usage),
+        author="System"
+    ).send()
 
     # Save state reference
-    cl.user_session.set("thread_id", config.get("configurable", {}).get("thread_id", "default"))
+    cl.user_session.set("thread_id", current_thread_id)
@@ -0,0 +1,100 @@
+"""
+bge-m3 dense + learned sparse (lexical) weights from a single forward pass.
+
+bge-m3 ships a small `sparse_linear.pt` head next to its weights: applied to the last
+hidden states it gives one weight per token (relu), kept as the max per token id. The dense
+vector is the normalized CLS state the embedding model already returns, so the dense half
+is identical to the vectors stored in Chroma and both come from one encoder call.
+
+The SentenceTransformer loaded by config.llm_config is reused (no second copy of bge-m3);
+with INFERENCE_SERVICE_URL set, the service's /encode_hybrid endpoint is used instead.
+"""
+
+import os
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+BGE_M3_BATCH_SIZE = int(os.environ.get("BGE_M3_BATCH_SIZE", 32))
+
+# (token ids, weights) of one text
+SparseVector = tuple[list[int], list[float]]
+
+
+class BGEM3HybridEncoder:
+    """encode(texts) -> (dense vectors, sparse vectors) for bge-m3, in one pass."""
+
+    def __init__(self, model):
+        import torch
+        from huggingface_hub import hf_hub_download
+        from config.llm_config import model_name
+
+        self.model = model
+        state = torch.load(hf_hub_download(model_name, "sparse_linear.pt"), map_location="cpu")
+        self.sparse_linear = torch.nn.Linear(model.get_sentence_embedding_dimension(), 1)
+        self.sparse_linear.load_state_dict(state)
+        self.sparse_linear.to(model.device).eval()
+        tokenizer = model.tokenizer
+        self.skip_ids = {tokenizer.cls_token_id, tokenizer.eos_token_id, tokenizer.pad_token_id, tokenizer.unk_token_id}
+
+    def encode(self, texts: list[str]) -> tuple[list[list[float]], list[SparseVector]]:
+        import torch
+        outputs = self.model.encode(
+            texts, output_value=None, batch_size=BGE_M3_BATCH_SIZE,
+            convert_to_numpy=False, convert_to_tensor=False, show_progress_bar=False,
+        )
+        dense, sparse = [], []
+        with torch.inference_mode():
+            for out in outputs:
+                dense.append(torch.nn.functional.normalize(out["sentence_embedding"].float(), dim=-1).cpu().tolist())
+                weights = torch.relu(self.sparse_linear(out["token_embeddings"].float())).squeeze(-1)
+                mask = out["attention_mask"].bool()
+                term_weights: dict[int, float] = {}
+                for token_id, weight in zip(out["input_ids"][mask].tolist(), weights[mask].tolist()):
+                    if token_id not in self.skip_ids and weight > term_weights.get(token_id, 0.0):
+                        term_weights[token_id] = weight
+                sparse.append((list(term_weights), list(term_weights.values())))
+        return dense, sparse
+
+    def encode_query(self, text: str) -> tuple[list[float], SparseVector]:
+        dense, sparse = self.encode([text])
+        return dense[0], sparse[0]
+
+
+class RemoteBGEM3HybridEncoder:
+    """Same interface, backed by the inference service."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    def encode(self, texts: list[str]) -> tuple[list[list[float]], list[SparseVector]]:
+        from src.inference_service import _post, CLIENT_CHUNK_SIZE
+        dense, sparse = [], []
+        for i in range(0, len(texts), CLIENT_CHUNK_SIZE):
+            result = _post(self.base_url, "/encode_hybrid", {"texts": texts[i:i + CLIENT_CHUNK_SIZE]})
+            dense.extend(item["dense"] for item in result["encodings"])
+            sparse.extend((item["terms"], item["weights"]) for item in result["encodings"])
+        return dense, sparse
+
+    def encode_query(self, text: str) -> tuple[list[float], SparseVector]:
+        dense, sparse = self.encode([text])
+        return dense[0], sparse[0]
+
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+def get_hybrid_encoder():
+    """The bge-m3 hybrid encoder of this process (sharing the embedding model), built once."""
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            from src.inference_service import get_service_url
+            if get_service_url():
+                _encoder = RemoteBGEM3HybridEncoder(get_service_url())
+            else:
+                from config.llm_config import get_embeddings
+                _encoder = BGEM3HybridEncoder(get_embeddings()._client)
+                logger.info("bge-m3 sparse head loaded")
+        return _encoder
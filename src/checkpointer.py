@@ -0,0 +1,154 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.memory import InMemorySaver
+
+logger = logging.getLogger(__name__)
+
+# Checkpointer selection (.env): "memory" (unbounded, old behaviour), "bounded" (LRU/TTL) or "sqlite"
+CHECKPOINTER_MODE = os.environ.get("CHECKPOINTER", "bounded")
+# Bounded mode: maximum number of threads kept in RAM and idle time before a thread is evicted
+CHECKPOINTER_MAX_THREADS = int(os.environ.get("CHECKPOINTER_MAX_THREADS", 1000))
+CHECKPOINTER_TTL_SECONDS = float(os.environ.get("CHECKPOINTER_TTL_SECONDS", 24 * 3600))
+# SQLite mode: database file (TTL above also applies to idle threads in the database)
+CHECKPOINTER_SQLITE_PATH = os.environ.get("CHECKPOINTER_SQLITE_PATH", "logs/checkpoints.sqlite")
+
+
+class _ThreadEvictionMixin:
+    """
+    Tracks last access per thread_id and evicts idle or least recently used threads.
+
+    Subclasses must implement `delete_thread(thread_id)`; eviction runs on every write so no
+    background thread is needed.
+    """
+
+    def _init_eviction(self, max_threads: Optional[int], ttl_seconds: Optional[float]):
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.evicted_threads = 0
+        self._last_access: OrderedDict[str, float] = OrderedDict()
+        self._eviction_lock = threading.Lock()
+
+    def _touch(self, config: RunnableConfig):
+        thread_id = config.get("configurable", {}).get("thread_id")
+        if thread_id is None:
+            return
+        with self._eviction_lock:
+            self._last_access[thread_id] = time.monotonic()
+            self._last_access.move_to_end(thread_id)
+
+    def _evict(self, keep: Optional[str] = None):
+        """Drop threads over the TTL, then the least recently used ones over max_threads."""
+        now = time.monotonic()
+        victims = []
+        with self._eviction_lock:
+            for thread_id, last_access in self._last_access.items():
+                over_ttl = self.ttl_seconds is not None and now - last_access > self.ttl_seconds
+                over_size = self.max_threads is not None and len(self._last_access) - len(victims) > self.max_threads
+                if not (over_ttl or over_size):
+                    break  # Ordered by access time, everything after is newer
+                if thread_id != keep:
+                    victims.append(thread_id)
+            for thread_id in victims:
+                del self._last_access[thread_id]
+        for thread_id in victims:
+            self.delete_thread(thread_id)  # type: ignore[attr-defined]
+        if victims:
+            self.evicted_threads += len(victims)
+            logger.info(f"Checkpointer evicted {len(victims)} idle thread(s), {len(self._last_access)} active")
+
+
+class BoundedInMemorySaver(_ThreadEvictionMixin, InMemorySaver):
+    """InMemorySaver that forgets threads after `ttl_seconds` idle or beyond `max_threads` (LRU)."""
+
+    def __init__(self, max_threads: Optional[int] = CHECKPOINTER_MAX_THREADS, ttl_seconds: Optional[float] = CHECKPOINTER_TTL_SECONDS, **kwargs):
+        super().__init__(**kwargs)
+        self._init_eviction(max_threads, ttl_seconds)
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        self._touch(config)
+        return super().get_tuple(config)
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        self._touch(config)
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        self._evict(keep=config["configurable"]["thread_id"])
+        return next_config
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        self._touch(config)
+        super().put_writes(config, writes, task_id, task_path)
+
+    @property
+    def thread_count(self) -> int:
+        return len(self.storage)
+
+
+def _sqlite_saver_class():
+    """Build the SQLite saver lazily so the optional dependency is only needed in sqlite mode."""
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    class ThreadedSqliteSaver(_ThreadEvictionMixin, SqliteSaver):
+        """
+        SqliteSaver with TTL eviction and async support.
+
+        The upstream sync saver raises on async calls (Chainlit uses astream_events); its
+        connection is opened with check_same_thread=False and guarded by a lock, so the
+        async methods simply run the sync ones in a worker thread.
+        """
+
+        def put(self, config, checkpoint, metadata, new_versions):
+            self._touch(config)
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+            self._evict(keep=config["configurable"]["thread_id"])
+            return next_config
+
+        def get_tuple(self, config):
+            self._touch(config)
+            return super().get_tuple(config)
+
+        async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+            return await asyncio.to_thread(self.get_tuple, config)
+
+        async def alist(self, config, *, filter=None, before=None, limit=None) -> AsyncIterator[CheckpointTuple]:
+            items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+            for item in items:
+                yield item
+
+        async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+        async def aput_writes(self, config, writes, task_id, task_path: str = "") -> None:
+            await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+        async def adelete_thread(self, thread_id: str) -> None:
+            await asyncio.to_thread(self.delete_thread, thread_id)
+
+    return ThreadedSqliteSaver
+
+
+def get_checkpointer(mode: str = CHECKPOINTER_MODE) -> BaseCheckpointSaver:
+    """Create the checkpointer configured by CHECKPOINTER (memory | bounded | sqlite)."""
+    if mode == "memory":
+        logger.info("Checkpointer: unbounded in-memory")
+        return InMemorySaver()
+    if mode == "bounded":
+        logger.info(f"Checkpointer: bounded in-memory (max_threads={CHECKPOINTER_MAX_THREADS}, ttl={CHECKPOINTER_TTL_SECONDS}s)")
+        return BoundedInMemorySaver()
+    if mode == "sqlite":
+        import sqlite3
+        os.makedirs(os.path.dirname(CHECKPOINTER_SQLITE_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(CHECKPOINTER_SQLITE_PATH, check_same_thread=False)
+        saver = _sqlite_saver_class()(conn)
+        # Idle threads are only tracked from process start; no size cap for the on-disk store
+        saver._init_eviction(max_threads=None, ttl_seconds=CHECKPOINTER_TTL_SECONDS)
+        logger.info(f"Checkpointer: SQLite at {CHECKPOINTER_SQLITE_PATH} (ttl={CHECKPOINTER_TTL_SECONDS}s)")
+        return saver
+    raise ValueError(f"Unknown CHECKPOINTER mode: {mode!r} (expected memory, bounded or sqlite)")
@@ -0,0 +1,127 @@
+"""
+Content-addressed chunks for the GitHub collection.
+
+Forks, vendored libraries and shared config files produce identical chunks in several
+repos. Each unique chunk is stored once (id = hash of its text); the repos it appears in are
+recorded as `repo::<owner/name>: True` metadata flags, which Chroma can filter on, and every
+repo/path as a JSON list in `locations`. `repo` and `source` keep the first location, so
+chunks still read like before. `run::<owner/name>` holds the ingestion run that last wrote
+the chunk for that repo (the GC checks it per repo, see ingestion/compaction.py).
+"""
+
+import json
+import hashlib
+from typing import Iterable, Optional
+
+from langchain_core.documents import Document
+
+REPO_MEMBER_PREFIX = "repo::"
+REPO_RUN_PREFIX = "run::"
+
+
+def content_id(text: str) -> str:
+    return hashlib.sha1(text.encode()).hexdigest()
+
+def chunk_locations(metadata: dict) -> list[dict]:
+    """Every {repo, source} a chunk appears in (chunks stored before deduplication have one)."""
+    if metadata.get("locations"):
+        return json.loads(metadata["locations"])
+    return [{"repo": metadata.get("repo", "unknown"), "source": metadata.get("source", "unknown")}]
+
+def chunk_repos(metadata: dict) -> list[str]:
+    """Every repo a chunk belongs to (none for chunks without a repo, e.g. comms pages)."""
+    if metadata.get("locations"):
+        return [location["repo"] for location in chunk_locations(metadata)]
+    return [metadata["repo"]] if metadata.get("repo") else []
+
+def _set_locations(metadata: dict, locations: list[dict]):
+    repos = {location["repo"] for location in locations}
+    for key in [key for key in metadata if key.startswith(REPO_MEMBER_PREFIX)]:
+        del metadata[key]
+    for key in [key for key in metadata if key.startswith(REPO_RUN_PREFIX) and key[len(REPO_RUN_PREFIX):] not in repos]:
+        del metadata[key]
+    for location in locations:
+        metadata[f"{REPO_MEMBER_PREFIX}{location['repo']}"] = True
+    metadata["locations"] = json.dumps(locations)
+    metadata["repo"], metadata["source"] = locations[0]["repo"], locations[0]["source"]
+
+def _add_location(locations: list[dict], location: dict):
+    if location not in locations:
+        locations.append(location)
+
+def deduplicate_chunks(docs: list[Document]) -> list[Document]:
+    """One document per distinct text, carrying the locations of all its copies (first one wins the metadata)."""
+    unique: dict[str, Document] = {}
+    locations: dict[str, list[dict]] = {}
+    for doc in docs:
+        key = content_id(doc.page_content)
+        if key not in unique:
+            unique[key] = Document(page_content=doc.page_content, metadata=dict(doc.metadata))
+            locations[key] = []
+        _add_location(locations[key], {"repo": doc.metadata.get("repo", "unknown"), "source": doc.metadata.get("source", "unknown")})
+    for key, doc in unique.items():
+        _set_locations(doc.metadata, locations[key])
+    return list(unique.values())
+
+def keep_stored_locations(doc: Document, stored_metadata: Optional[dict], reingested_repos: set[str]):
+    """
+    Add the locations already stored for this chunk in repos this run didn't re-ingest.
+
+    An upsert replaces the metadata, so without this a chunk shared with a repo that failed
+    to load (or wasn't part of this run) would lose that membership.
+    """
+    if not stored_metadata:
+        return
+    locations = chunk_locations(doc.metadata)
+    for location in chunk_locations(stored_metadata):
+        if location["repo"] not in reingested_repos:
+            _add_location(locations, location)
+            # Keep the run that wrote it for that repo (chunks stored before per-repo stamps have ingest_run)
+            run = stored_metadata.get(f"{REPO_RUN_PREFIX}{location['repo']}", stored_metadata.get("ingest_run"))
+            if run:
+                doc.metadata[f"{REPO_RUN_PREFIX}{location['repo']}"] = run
+    _set_locations(doc.metadata, locations)
+
+def stamp_repo_runs(doc: Document, repos: set[str], run_id: str):
+    """Record `run_id` as the run that wrote this chunk for each of its locations in `repos`."""
+    for location in chunk_locations(doc.metadata):
+        if location["repo"] in repos:
+            doc.metadata[f"{REPO_RUN_PREFIX}{location['repo']}"] = run_id
+
+def repo_run(metadata: dict, repo: str) -> Optional[str]:
+    """The run that last wrote the chunk for `repo` (ingest_run for chunks without per-repo stamps)."""
+    return metadata.get(f"{REPO_RUN_PREFIX}{repo}", metadata.get("ingest_run"))
+
+def repo_where(repos: Iterable[str]) -> Optional[dict]:
+    """Chroma filter for chunks in any of `repos`, by first location or by membership flag."""
+    clauses = [clause for repo in repos for clause in ({"repo": repo}, {f"{REPO_MEMBER_PREFIX}{repo}": True})]
+    return {"$or": clauses} if clauses else None
+
+def collapse_duplicates(docs: list[Document]) -> list[Document]:
+    """
+    Merge retrieved documents with identical text into the best-ranked one.
+
+    Covers chunks stored before deduplication and other stores; the merged document lists
+    every location of its copies.
+    """
+    collapsed: dict[str, Document] = {}
+    for doc in docs:
+        key = content_id(doc.page_content)
+        if key not in collapsed:
+            collapsed[key] = Document(page_content=doc.page_content, metadata=dict(doc.metadata), id=doc.id)
+            continue
+        kept = collapsed[key]
+        if "repo" not in doc.metadata:
+            continue
+        locations = chunk_locations(kept.metadata)
+        for location in chunk_locations(doc.metadata):
+            _add_location(locations, location)
+        _set_locations(kept.metadata, locations)
+    return list(collapsed.values())
+
+def prefer_repos(doc: Document, repos: list[str]):
+    """Make the first location one of `repos` (the repos asked about), so links point there."""
+    locations = chunk_locations(doc.metadata)
+    preferred = [location for location in locations if location["repo"] in repos]
+    if preferred and locations[0] not in preferred and "repo" in doc.metadata:
+        _set_locations(doc.metadata, preferred + [location for location in locations if location not in preferred])
@@ -0,0 +1,88 @@
+import os
+import logging
+from typing import Callable, Hashable
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# Per-tool character budgets for the context string handed back to the LLM
+GITHUB_CONTEXT_MAX_CHARS = int(os.environ.get("GITHUB_CONTEXT_MAX_CHARS", 8000))
+COMMS_CONTEXT_MAX_CHARS = int(os.environ.get("COMMS_CONTEXT_MAX_CHARS", 6000))
+
+# Overlap detection: splitters use 100-150 chars overlap, look a bit further to be safe
+MIN_OVERLAP_CHARS = 20
+MAX_OVERLAP_CHARS = 400
+# Don't bother appending a truncated group when less than this much budget is left
+MIN_TAIL_CHARS = 200
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of `left` that is also a prefix of `right`."""
+    limit = min(len(left), len(right), MAX_OVERLAP_CHARS)
+    for size in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+def _merge_chunks(chunks: list[str]) -> list[str]:
+    """
+    Merge chunks that overlap (text splitter overlap) into contiguous passages.
+
+    Chunks arrive in relevance order, so each one is tried on both ends of the existing
+    passages; chunks that don't touch any passage start a new one.
+    """
+    passages: list[str] = []
+    for chunk in chunks:
+        chunk = chunk.strip()
+        if any(chunk in passage for passage in passages):
+            continue  # Fully contained (duplicate from dense + BM25 or repeated overlap)
+        for i, passage in enumerate(passages):
+            if size := _overlap(passage, chunk):
+                passages[i] = passage + chunk[size:]
+                break
+            if size := _overlap(chunk, passage):
+                passages[i] = chunk + passage[size:]
+                break
+        else:
+            passages.append(chunk)
+    return passages
+
+def pack_context(
+    docs: list[Document],
+    group_key: Callable[[Document], Hashable],
+    header: Callable[[Document], str],
+    max_chars: int,
+) -> str:
+    """
+    Pack retrieved documents into a compact context string within a character budget.
+
+    Documents from the same source are grouped under one header (in order of their best
+    rank), adjacent chunks are merged with their overlap removed, and groups are added
+    until `max_chars` is reached; the last group that doesn't fit is truncated.
+    """
+    groups: dict[Hashable, list[Document]] = {}
+    for doc in docs:
+        groups.setdefault(group_key(doc), []).append(doc)
+
+    # Chunk text only: headers are built per packed group below, not for every chunk
+    raw_chars = sum(len(doc.page_content) + 2 for doc in docs)
+    sections = []
+    used = 0
+    for group_docs in groups.values():
+        body = "\n...\n".join(_merge_chunks([doc.page_content for doc in group_docs]))
+        section = f"{header(group_docs[0])}\n{body}"
+        remaining = max_chars - used
+        if len(section) > remaining:
+            if remaining >= MIN_TAIL_CHARS:
+                sections.append(section[:remaining].rstrip() + "\n[... truncated to fit context budget]")
+                used = max_chars
+            break
+        sections.append(section)
+        used += len(section) + 2
+
+    context = "\n\n".join(sections)
+    logger.info(
+        f"Context packing: {len(docs)} chunks in {len(groups)} sources, "
+        f"{raw_chars} chars of chunk text -> {len(context)} chars (budget {max_chars})"
+    )
+    return context
@@ -0,0 +1,150 @@
+import os
+import re
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_LOG_PATH = os.environ.get(
+    "CONVERSATION_LOG_PATH", os.path.join(os.path.dirname(__file__), '..', 'logs', 'conversation_history.jsonl')
+)
+# String fields longer than this are cut (full tool outputs don't belong in the log)
+CONVERSATION_LOG_MAX_FIELD_CHARS = int(os.environ.get("CONVERSATION_LOG_MAX_FIELD_CHARS", 2000))
+# Rotate when the file exceeds this size or is older than the interval (0 disables the time trigger)
+CONVERSATION_LOG_MAX_BYTES = int(os.environ.get("CONVERSATION_LOG_MAX_BYTES", 10 * 2**20))
+CONVERSATION_LOG_ROTATE_SECONDS = float(os.environ.get("CONVERSATION_LOG_ROTATE_SECONDS", 24 * 3600))
+CONVERSATION_LOG_BACKUPS = int(os.environ.get("CONVERSATION_LOG_BACKUPS", 5))
+
+# One precompiled pass for all secrets/identifiers that must never reach the log
+_MASK_PATTERN = re.compile(
+    r'(?P<slack_token>xoxb-\S+)'
+    r'|(?P<xai_key>xai-\S+)'
+    r'|(?P<hf_token>hf_\S+)'
+    r'|(?P<slack_channel>C[0-9A-Z]{8,})'
+    r'|(?P<slack_user>U[0-9A-Z]{8,})'
+)
+_MASKS = {
+    "slack_token": "[SLACK_BOT_TOKEN_MASKED]",
+    "xai_key": "[XAI_API_KEY_MASKED]",
+    "hf_token": "[HF_TOKEN_MASKED]",
+    "slack_channel": "[SLACK_CHANNEL_MASKED]",
+    "slack_user": "[SLACK_USER_MASKED]",
+}
+
+def sanitize_log(message: str) -> str:
+    """Mask sensitive data like tokens, keys and Slack IDs in log messages."""
+    return _MASK_PATTERN.sub(lambda m: _MASKS[m.lastgroup or ""], message)
+
+def _cap(value: Any, max_chars: int) -> Any:
+    """Sanitize and size-cap string fields, recursing into lists and dicts."""
+    if isinstance(value, str):
+        value = sanitize_log(value)
+        if len(value) > max_chars:
+            return f"{value[:max_chars]}... [+{len(value) - max_chars} chars]"
+        return value
+    if isinstance(value, dict):
+        return {k: _cap(v, max_chars) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_cap(v, max_chars) for v in value]
+    return value
+
+
+class BufferedJsonlWriter:
+    """
+    Non-blocking JSONL log writer.
+
+    `write` only puts the record on a queue; a background thread masks, caps and serializes
+    records and appends them in batches every `flush_interval` seconds, rotating the file by
+    size or age (path -> path.1 -> ... -> path.N). When the queue is full records are dropped
+    and counted rather than blocking the caller.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 1.0,
+        max_queue: int = 10000,
+        max_field_chars: int = CONVERSATION_LOG_MAX_FIELD_CHARS,
+        max_bytes: int = CONVERSATION_LOG_MAX_BYTES,
+        rotate_seconds: float = CONVERSATION_LOG_ROTATE_SECONDS,
+        backup_count: int = CONVERSATION_LOG_BACKUPS,
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_field_chars = max_field_chars
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=max_queue)
+        self._opened_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="conversation-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, record: dict):
+        record = {"ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"), **record}
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Flush what is queued and stop the background thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            lines = [json.dumps(_cap(record, self.max_field_chars), default=str) for record in batch if record is not None]
+            if lines:
+                self._append("\n".join(lines) + "\n")
+            if stop:
+                return
+
+    def _append(self, data: str):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._rotate_if_needed(len(data))
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(data)
+        except OSError as e:
+            logger.error(f"Conversation log write failed: {e}")
+
+    def _rotate_if_needed(self, incoming: int):
+        if not os.path.exists(self.path):
+            self._opened_at = time.time()
+            return
+        too_big = os.path.getsize(self.path) + incoming > self.max_bytes
+        too_old = self.rotate_seconds > 0 and time.time() - self._opened_at > self.rotate_seconds
+        if not (too_big or too_old):
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        self._opened_at = time.time()
+
+
+conversation_log = BufferedJsonlWriter(CONVERSATION_LOG_PATH)
+
+def log_event(event: str, thread_id: Optional[str] = None, **fields: Any):
+    """Record one conversation event (human, tool_call, tool_result, ai, end) without blocking."""
+    conversation_log.write({"event": event, "thread_id": thread_id, **fields})
@@ -0,0 +1,186 @@
+"""
+Columnar, memory-mapped corpus store: chunk text, ids and metadata outside Chroma.
+
+Layout of an exported collection (`CORPUS_STORE_DIR/<collection>/`):
+
+    corpus.arrow     Arrow IPC file (uncompressed): id, text, repo, source, repos, metadata (JSON)
+    vocab.npy        sorted 64-bit hashes of every token, row = term id (memory-mapped)
+    bm25/            CSR BM25 weights per chunk and term (src/sparse_index.py layout, no ids.json)
+    manifest.json    row count, vocabulary size, export time
+
+Lexical search and repo filters work on the mapped columns and arrays; `Document` objects
+are only built for the rows a query returns, instead of the whole collection being read
+from Chroma's SQLite into Python for every BM25 index. BM25 weights are precomputed with
+the same formula and tokenization as `BM25Retriever` (rank_bm25's BM25Okapi, whitespace split).
+
+IDF and average chunk length are collection-wide, so scores equal BM25Retriever's only without
+a repo filter: a filter restricts which chunks are ranked, not the statistics, whereas the
+in-memory path built one index per repo (and fused several repos per repo).
+
+Written by the ingestors after every run and by the GC, or with `python scripts/export_corpus_store.py`.
+"""
+
+import os
+import json
+import math
+import time
+import hashlib
+import logging
+import threading
+from collections import Counter
+from typing import Iterable, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from langchain_core.documents import Document
+
+from src.chunk_dedup import chunk_repos
+from src.mmap_index import replace_directory
+from src.sparse_index import SparseIndex, write_csr_index
+
+logger = logging.getLogger(__name__)
+
+CORPUS_STORE_DIR = os.environ.get("CORPUS_STORE_DIR", "./corpus_store")
+EXPORT_BATCH = 1000
+# rank_bm25 BM25Okapi defaults
+BM25_K1, BM25_B, BM25_EPSILON = 1.5, 0.75, 0.25
+
+SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("text", pa.large_string()),
+    ("repo", pa.string()),
+    ("source", pa.string()),
+    ("repos", pa.list_(pa.string())),
+    ("metadata", pa.string()),
+])
+
+
+def tokenize(text: str) -> list[str]:
+    """Same tokens as BM25Retriever's default preprocessing."""
+    return text.split()
+
+def token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+
+
+# --- EXPORT ---
+
+def _bm25_weights(chunk_terms: list[np.ndarray], chunk_tfs: list[np.ndarray], lengths: np.ndarray, vocab_size: int) -> list[np.ndarray]:
+    """BM25Okapi term weight of every (chunk, term): idf x saturated, length-normalized tf."""
+    n = len(chunk_terms)
+    df = np.bincount(np.concatenate(chunk_terms), minlength=vocab_size) if n else np.zeros(0)
+    idf = np.log((n - df + 0.5) / (df + 0.5))
+    # BM25Okapi floors negative idf (terms in more than half the chunks) at epsilon x mean idf
+    idf[idf < 0] = BM25_EPSILON * (idf.mean() if len(idf) else 0.0)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / (lengths.mean() or 1.0))
+    return [idf[terms] * tfs * (BM25_K1 + 1) / (tfs + norm[row]) for row, (terms, tfs) in enumerate(zip(chunk_terms, chunk_tfs))]
+
+def export_corpus(collection, collection_name: str, base_dir: str = CORPUS_STORE_DIR) -> dict:
+    """Write the corpus store of a Chroma collection (to a temp dir, then swapped in)."""
+    started = time.perf_counter()
+    out_dir = os.path.join(base_dir, collection_name)
+    tmp_dir = out_dir + ".tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    chunk_hashes, chunk_tfs, lengths = [], [], []
+    with pa.OSFile(os.path.join(tmp_dir, "corpus.arrow"), "wb") as sink, pa.ipc.new_file(sink, SCHEMA) as writer:
+        for offset in range(0, collection.count(), EXPORT_BATCH):
+            batch = collection.get(include=["documents", "metadatas"], limit=EXPORT_BATCH, offset=offset)
+            metadatas = [m or {} for m in batch["metadatas"]]
+            writer.write_batch(pa.record_batch([
+                batch["ids"],
+                batch["documents"],
+                [m.get("repo") for m in metadatas],
+                [m.get("source") for m in metadatas],
+                [chunk_repos(m) for m in metadatas],
+                [json.dumps(m) for m in metadatas],
+            ], schema=SCHEMA))
+            for text in batch["documents"]:
+                tokens = tokenize(text or "")
+                counts = Counter(tokens)
+                chunk_hashes.append(np.fromiter((token_hash(t) for t in counts), dtype=np.uint64, count=len(counts)))
+                chunk_tfs.append(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+                lengths.append(len(tokens))
+
+    vocab = np.unique(np.concatenate(chunk_hashes)) if chunk_hashes else np.zeros(0, dtype=np.uint64)
+    chunk_terms = [np.searchsorted(vocab, hashes).astype(np.int32) for hashes in chunk_hashes]
+    weights = _bm25_weights(chunk_terms, chunk_tfs, np.asarray(lengths, dtype=np.float32), len(vocab))
+    np.save(os.path.join(tmp_dir, "vocab.npy"), vocab)
+    write_csr_index(os.path.join(tmp_dir, "bm25"), None, chunk_terms, weights)
+
+    manifest = {"count": len(lengths), "vocab": len(vocab), "exported_at": time.time()}
+    with open(os.path.join(tmp_dir, "manifest.json"), 'w') as f:
+        json.dump(manifest, f)
+    replace_directory(tmp_dir, out_dir)
+    manifest["seconds"] = round(time.perf_counter() - started, 2)
+    logger.info(f"Corpus store {collection_name}: {manifest['count']} chunks, {manifest['vocab']} terms in {manifest['seconds']}s")
+    return manifest
+
+
+# --- READING ---
+
+class CorpusStore:
+    """Read-only view of an exported collection; the Arrow file is mapped, not loaded."""
+
+    def __init__(self, store_dir: str):
+        self.table = pa.ipc.open_file(pa.memory_map(os.path.join(store_dir, "corpus.arrow"))).read_all()
+        self.vocab = np.load(os.path.join(store_dir, "vocab.npy"), mmap_mode="r")
+        self.bm25 = SparseIndex(os.path.join(store_dir, "bm25"))
+
+    def count(self) -> int:
+        return self.table.num_rows
+
+    def repo_mask(self, repos: Iterable[str]) -> Optional[np.ndarray]:
+        """Rows whose first location or any deduplicated location is in `repos` (None: no filter)."""
+        repos = list(repos)
+        if not repos:
+            return None
+        value_set = pa.array(repos, pa.string())
+        mask = pc.is_in(self.table["repo"], value_set=value_set).fill_null(False).to_numpy(zero_copy_only=False)
+        members = self.table["repos"]
+        hits = pc.is_in(pc.list_flatten(members), value_set=value_set).to_numpy(zero_copy_only=False)
+        mask[pc.list_parent_indices(members).to_numpy()[hits]] = True
+        return mask
+
+    def documents(self, rows: list[int]) -> list[Document]:
+        """Materialize only the given rows."""
+        return [
+            Document(page_content=row["text"], metadata=json.loads(row["metadata"]), id=row["id"])
+            for row in self.table.take(rows).select(["id", "text", "metadata"]).to_pylist()
+        ]
+
+    def query_terms(self, query: str) -> tuple[list[int], list[float]]:
+        """Term ids of the query tokens found in the vocabulary, weighted by how often they occur."""
+        counts = Counter(tokenize(query))
+        terms, weights = [], []
+        for token, count in counts.items():
+            key = np.uint64(token_hash(token))
+            pos = int(np.searchsorted(self.vocab, key))
+            if pos < len(self.vocab) and self.vocab[pos] == key:
+                terms.append(pos)
+                weights.append(float(count))
+        return terms, weights
+
+    def lexical_search(self, query: str, k: int = 10, repos: Iterable[str] = ()) -> list[Document]:
+        """BM25 top-k, restricted to `repos` when given (scored with collection-wide IDF and length)."""
+        terms, weights = self.query_terms(query)
+        hits = self.bm25.search_rows(terms, weights, k, mask=self.repo_mask(repos))
+        return self.documents([row for row, _ in hits])
+
+
+_stores: dict[str, tuple[float, CorpusStore]] = {}
+_stores_lock = threading.Lock()
+
+def get_corpus_store(collection_name: str, base_dir: str = CORPUS_STORE_DIR) -> Optional[CorpusStore]:
+    """The collection's corpus store (reopened after a re-export), or None if it was never exported."""
+    store_dir = os.path.join(base_dir, collection_name)
+    try:
+        mtime = os.path.getmtime(os.path.join(store_dir, "manifest.json"))
+    except OSError:
+        return None
+    with _stores_lock:
+        cached = _stores.get(collection_name)
+        if cached is None or cached[0] != mtime:
+            cached = _stores[collection_name] = (mtime, CorpusStore(store_dir))
+        return cached[1]
@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Clones kept by the GitHub ingestor ("" disables the mirror, clones are then deleted as before)
+GITHUB_MIRROR_DIR = os.environ.get("GITHUB_MIRROR_DIR", "./github_mirror")
+MIRROR_MANIFEST = "manifest.json"
+# On-disk cache of raw.githubusercontent.com responses, revalidated with ETag / If-None-Match
+GITHUB_FILE_CACHE_DIR = os.environ.get("GITHUB_FILE_CACHE_DIR", "./.cache/github_files")
+# Cached files younger than this are served without asking GitHub at all
+GITHUB_FILE_CACHE_FRESH_SECONDS = float(os.environ.get("GITHUB_FILE_CACHE_FRESH_SECONDS", 300))
+# Default branches rarely change; resolved once and kept this long
+GITHUB_DEFAULT_BRANCH_TTL_SECONDS = float(os.environ.get("GITHUB_DEFAULT_BRANCH_TTL_SECONDS", 24 * 3600))
+# After a failed lookup (GitHub down, rate limited) 'main' is assumed for this long before asking again
+GITHUB_DEFAULT_BRANCH_RETRY_SECONDS = float(os.environ.get("GITHUB_DEFAULT_BRANCH_RETRY_SECONDS", 300))
+
+# Where reads were served from: mirror and fresh skip the network, not_modified is a 304
+github_file_stats = {"mirror": 0, "fresh": 0, "not_modified": 0, "fetched": 0, "not_found": 0, "errors": 0}
+_stats_lock = threading.Lock()
+
+_manifest: Optional[dict] = None
+_manifest_mtime = None
+_default_branches: dict[str, tuple[float, str]] = {}  # repo -> (expires_at, branch)
+_client: Optional[httpx.Client] = None
+
+
+def _count(source: str):
+    with _stats_lock:
+        github_file_stats[source] += 1
+
+def network_skip_ratio() -> float:
+    """Share of reads answered without a round trip to GitHub (mirror or fresh cache)."""
+    total = sum(github_file_stats.values())
+    return (github_file_stats["mirror"] + github_file_stats["fresh"]) / total if total else 0.0
+
+def _http() -> httpx.Client:
+    """One pooled keep-alive client per process for the GitHub API and raw file host."""
+    global _client
+    if _client is None:
+        # trust_env=False avoids the 'getaddrinfo' error seen with system proxies
+        _client = httpx.Client(timeout=15.0, trust_env=False, follow_redirects=True)
+    return _client
+
+def _headers() -> dict:
+    token = os.getenv("GITHUB_TOKEN")
+    headers = {"User-Agent": "langchain-agent"}
+    if token:
+        headers["Authorization"] = f"token {token}"
+    return headers
+
+
+# --- LOCAL MIRROR ---
+
+def mirror_path(repo: str) -> str:
+    return os.path.join(GITHUB_MIRROR_DIR, repo.replace('/', '__'))
+
+def load_mirror_manifest() -> dict:
+    """repo -> {default_branch, commit, synced_at}, reloaded when the ingestor rewrites it."""
+    global _manifest, _manifest_mtime
+    path = os.path.join(GITHUB_MIRROR_DIR, MIRROR_MANIFEST)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    if _manifest is None or mtime != _manifest_mtime:
+        with open(path, 'r', encoding='utf-8') as f:
+            _manifest = json.load(f)
+        _manifest_mtime = mtime
+    return _manifest or {}
+
+def write_mirror_manifest(entries: dict):
+    """Merge `entries` into the manifest (called by the ingestor after moving clones into place)."""
+    os.makedirs(GITHUB_MIRROR_DIR, exist_ok=True)
+    path = os.path.join(GITHUB_MIRROR_DIR, MIRROR_MANIFEST)
+    manifest = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    manifest.update(entries)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def read_from_mirror(repo: str, file_path: str) -> Optional[tuple[str, dict]]:
+    """File content and manifest entry if the repo is mirrored and has the file, else None."""
+    entry = load_mirror_manifest().get(repo)
+    if not entry:
+        return None
+    root = os.path.realpath(mirror_path(repo))
+    full_path = os.path.realpath(os.path.join(root, file_path.lstrip('/')))
+    # Never serve anything outside the clone (../ in file_path) or from .git
+    if not full_path.startswith(root + os.sep) or f"{os.sep}.git{os.sep}" in full_path[len(root):] + os.sep:
+        return None
+    if not os.path.isfile(full_path):
+        return None
+    with open(full_path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read(), entry
+
+
+# --- DEFAULT BRANCH ---
+
+def get_default_branch(repo: str) -> str:
+    """
+    The repo's real default branch: mirror manifest, then GitHub API (cached); 'main' if unknown.
+
+    A failed lookup is cached too, for GITHUB_DEFAULT_BRANCH_RETRY_SECONDS, so an outage or
+    rate limit costs one request per repo instead of one per call.
+    """
+    branch = load_mirror_manifest().get(repo, {}).get("default_branch")
+    if branch:
+        return branch
+    cached = _default_branches.get(repo)
+    if cached and time.time() < cached[0]:
+        return cached[1]
+
+    try:
+        response = _http().get(f"https://api.github.com/repos/{repo}", headers=_headers())
+        response.raise_for_status()
+        branch = response.json()["default_branch"]
+        _default_branches[repo] = (time.time() + GITHUB_DEFAULT_BRANCH_TTL_SECONDS, branch)
+    except Exception as e:
+        logger.warning(f"Could not resolve default branch of {repo}, assuming 'main' for {GITHUB_DEFAULT_BRANCH_RETRY_SECONDS:g}s: {e}")
+        branch = "main"
+        _default_branches[repo] = (time.time() + GITHUB_DEFAULT_BRANCH_RETRY_SECONDS, branch)
+    return branch
+
+
+# --- HTTP CACHE ---
+
+def _cache_paths(url: str) -> tuple[str, str]:
+    key = hashlib.sha1(url.encode()).hexdigest()
+    return os.path.join(GITHUB_FILE_CACHE_DIR, f"{key}.json"), os.path.join(GITHUB_FILE_CACHE_DIR, f"{key}.body")
+
+def fetch_raw(url: str) -> tuple[int, Optional[str], str]:
+    """
+    GET a raw file through the on-disk cache.
+
+    Returns (status, text, source) where source is fresh, not_modified or fetched. Fresh
+    cache entries are served without a request; older ones are revalidated with their ETag.
+    """
+    meta_path, body_path = _cache_paths(url)
+    meta = None
+    if os.path.exists(meta_path) and os.path.exists(body_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if time.time() - meta["checked_at"] < GITHUB_FILE_CACHE_FRESH_SECONDS:
+            with open(body_path, 'r', encoding='utf-8') as f:
+                return 200, f.read(), "fresh"
+
+    headers = _headers()
+    if meta and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    response = _http().get(url, headers=headers)
+
+    if response.status_code == 304 and meta:
+        meta["checked_at"] = time.time()
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        with open(body_path, 'r', encoding='utf-8') as f:
+            return 200, f.read(), "not_modified"
+    if response.status_code != 200:
+        return response.status_code, None, "fetched"
+
+    os.makedirs(GITHUB_FILE_CACHE_DIR, exist_ok=True)
+    with open(body_path, 'w', encoding='utf-8') as f:
+        f.write(response.text)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump({"url": url, "etag": response.headers.get("etag"), "checked_at": time.time()}, f)
+    return 200, response.text, "fetched"
+
+
+def read_file(repo: str, file_path: str) -> str:
+    """Full content of a file: local mirror first, then GitHub's raw host through the ETag cache."""
+    mirrored = read_from_mirror(repo, file_path)
+    if mirrored:
+        content, entry = mirrored
+        _count("mirror")
+        logger.info(f"read_github_file {repo}/{file_path}: mirror ({network_skip_ratio():.0%} of reads skipped the network)")
+        commit = (entry.get("commit") or "")[:7]
+        return f"Full content of {file_path} from {repo} (local mirror, {entry.get('default_branch')}@{commit}, synced {entry.get('synced_at')}):\n\n{content}"
+
+    branch = get_default_branch(repo)
+    raw_url = f"https://raw.githubusercontent.com/{repo}/{branch}/{file_path.lstrip('/')}"
+    try:
+        status, content, source = fetch_raw(raw_url)
+    except Exception as e:
+        _count("errors")
+        return f"Request failed: {str(e)}. This might be a local network or DNS issue."
+
+    if status == 200:
+        _count(source)
+        logger.info(f"read_github_file {repo}/{file_path}: {source} ({network_skip_ratio():.0%} of reads skipped the network)")
+        return f"Full content of {file_path} from {repo}:\n\n{content}"
+    if status == 404:
+        _count("not_found")
+        return f"Error: File '{file_path}' not found on '{branch}' branch in '{repo}'. Check path and repo name."
+    _count("errors")
+    return f"Error: GitHub API returned status code {status}."
+
+def github_file_metrics() -> dict:
+    with _stats_lock:
+        return {**github_file_stats, "network_skip_ratio": network_skip_ratio()}
@@ -0,0 +1,91 @@
+import os
+import logging
+from typing import Sequence
+
+from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
+
+logger = logging.getLogger(__name__)
+
+# Token budget for the conversation history sent to the agent LLMs (system prompt excluded)
+HISTORY_MAX_TOKENS = int(os.environ.get("HISTORY_MAX_TOKENS", 12000))
+# Number of most recent turns (HumanMessage and everything after it) that are always kept verbatim
+HISTORY_KEEP_TURNS = int(os.environ.get("HISTORY_KEEP_TURNS", 2))
+# Old tool outputs are cut down to this many characters before whole turns are dropped
+HISTORY_TOOL_PREVIEW_CHARS = int(os.environ.get("HISTORY_TOOL_PREVIEW_CHARS", 300))
+
+# Rough chars-per-token ratio; good enough for budgeting without loading a tokenizer
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Approximate the token count of a message list (content plus tool call arguments)."""
+    chars = 0
+    for msg in messages:
+        chars += len(str(msg.content))
+        for tool_call in getattr(msg, "tool_calls", None) or []:
+            chars += len(tool_call.get("name", "")) + len(str(tool_call.get("args", "")))
+    return chars // CHARS_PER_TOKEN
+
+def _split_turns(messages: Sequence[BaseMessage]) -> list[list[BaseMessage]]:
+    """Group messages into turns, each starting at a HumanMessage."""
+    turns: list[list[BaseMessage]] = []
+    for msg in messages:
+        if isinstance(msg, HumanMessage) or not turns:
+            turns.append([msg])
+        else:
+            turns[-1].append(msg)
+    return turns
+
+def _stub_tool_output(msg: ToolMessage, preview_chars: int) -> ToolMessage:
+    """Replace a tool output with a short preview, keeping the tool_call_id pairing intact."""
+    content = str(msg.content)
+    if len(content) <= preview_chars:
+        return msg
+    preview = content[:preview_chars].rstrip()
+    stub = f"{preview}\n[... older tool output truncated, {len(content) - preview_chars} chars omitted]"
+    return msg.model_copy(update={"content": stub})
+
+def compact_history(
+    messages: Sequence[BaseMessage],
+    max_tokens: int = HISTORY_MAX_TOKENS,
+    keep_turns: int = HISTORY_KEEP_TURNS,
+    preview_chars: int = HISTORY_TOOL_PREVIEW_CHARS,
+) -> list[BaseMessage]:
+    """
+    Trim the conversation history to fit a token budget before it is sent to an LLM.
+
+    The checkpointed state is left untouched; only the list handed to the model is compacted.
+    1. Tool outputs in turns older than the last `keep_turns` are truncated to a short preview.
+    2. If still over budget, the oldest turns are dropped whole, so AIMessage tool calls
+       and their ToolMessages are never separated.
+    The current turn is always kept, even when it alone exceeds the budget.
+    """
+    messages = list(messages)
+    before = estimate_tokens(messages)
+    if before <= max_tokens:
+        logger.debug(f"History compaction: {before} tokens within budget {max_tokens}, nothing saved")
+        return messages
+
+    turns = _split_turns(messages)
+    recent_start = max(len(turns) - max(keep_turns, 1), 0)
+
+    # Step 1: Shrink tool outputs of older turns
+    for i in range(recent_start):
+        turns[i] = [
+            _stub_tool_output(msg, preview_chars) if isinstance(msg, ToolMessage) else msg
+            for msg in turns[i]
+        ]
+
+    # Step 2: Drop oldest turns until we fit (never the current turn)
+    turn_tokens = [estimate_tokens(turn) for turn in turns]
+    total = sum(turn_tokens)
+    dropped = 0
+    while total > max_tokens and dropped < len(turns) - 1:
+        total -= turn_tokens[dropped]
+        dropped += 1
+
+    compacted = [msg for turn in turns[dropped:] for msg in turn]
+    logger.info(
+        f"History compaction: {before} -> {total} tokens "
+        f"(saved {before - total}, dropped {dropped} of {len(turns)} turns, budget {max_tokens})"
+    )
+    return compacted
@@ -0,0 +1,77 @@
+import os
+import json
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Per-collection HNSW settings and dense candidate count (k); pick values with scripts/sweep_hnsw.py
+HNSW_PROFILES_PATH = os.environ.get(
+    "HNSW_PROFILES_PATH", os.path.join(os.path.dirname(__file__), '..', 'config', 'hnsw_profiles.json')
+)
+# Chroma's defaults, used for anything a profile leaves out
+DEFAULT_PROFILE = {"space": "l2", "M": 16, "construction_ef": 100, "search_ef": 100, "k": 10}
+SPACES = ("l2", "cosine", "ip")
+
+
+def load_profiles(path: str = HNSW_PROFILES_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+_profiles: dict[str, tuple[Optional[float], dict]] = {}
+_profiles_lock = threading.Lock()
+
+def _cached_profiles(path: str) -> dict:
+    """`load_profiles`, parsed again only when the file's mtime changes (read on every retrieval)."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+    with _profiles_lock:
+        cached = _profiles.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = _profiles[path] = (mtime, load_profiles(path) if mtime is not None else {})
+        return cached[1]
+
+def get_profile(collection_name: str, path: str = HNSW_PROFILES_PATH) -> dict:
+    """The collection's profile, falling back to the file's "default" entry, then to Chroma's defaults."""
+    profiles = _cached_profiles(path)
+    profile = {**DEFAULT_PROFILE, **profiles.get("default", {}), **profiles.get(collection_name, {})}
+    if profile["space"] not in SPACES:
+        raise ValueError(f"{collection_name}: unknown HNSW space '{profile['space']}' (expected one of {SPACES})")
+    return profile
+
+def collection_configuration(profile: dict) -> dict:
+    """Chroma `configuration` for creating a collection with this profile."""
+    return {"hnsw": {
+        "space": profile["space"],
+        "max_neighbors": profile["M"],
+        "ef_construction": profile["construction_ef"],
+        "ef_search": profile["search_ef"],
+    }}
+
+def save_profile(collection_name: str, profile: dict, path: str = HNSW_PROFILES_PATH):
+    profiles = load_profiles(path)
+    profiles[collection_name] = {key: profile[key] for key in DEFAULT_PROFILE}
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, indent=4)
+    os.replace(path + ".tmp", path)
+
+def apply_search_ef(collection, profile: dict):
+    """
+    Bring an existing collection's search_ef in line with its profile.
+
+    space, M and construction_ef are fixed when the HNSW index is built: changing them in a
+    profile only takes effect for a collection created (or re-ingested) after the change.
+    Processes that already have the collection open keep the old search_ef until restarted.
+    """
+    hnsw = (collection.configuration or {}).get("hnsw") or {}
+    for key, current in (("space", "space"), ("M", "max_neighbors"), ("construction_ef", "ef_construction")):
+        if hnsw.get(current) is not None and hnsw[current] != profile[key]:
+            logger.warning(f"{collection.name}: built with {key}={hnsw[current]}, profile asks for {profile[key]} (recreate the collection to apply)")
+    if hnsw.get("ef_search") != profile["search_ef"]:
+        collection.modify(configuration={"hnsw": {"ef_search": profile["search_ef"]}})
+        logger.info(f"{collection.name}: search_ef set to {profile['search_ef']}")
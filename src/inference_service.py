@@ -0,0 +1,230 @@
+"""
+Local inference service for bge-m3 embeddings (dense, or dense + sparse) and bge-reranker-v2-m3 scoring.
+
+One process loads the models and serves every front end (Chainlit, Slack bridge, ingestors)
+over loopback HTTP. Concurrent requests are merged into micro-batches, so N users searching
+at the same time cost one forward pass instead of N.
+
+Run:    python src/inference_service.py [--port 8765]
+Use:    set INFERENCE_SERVICE_URL=http://127.0.0.1:8765 for the clients; config.llm_config and
+        src.retrievers then return RemoteEmbeddings / RemoteCrossEncoder transparently.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+
+import httpx
+from langchain_core.embeddings import Embeddings
+from langchain.retrievers.document_compressors.cross_encoder import BaseCrossEncoder
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_SERVICE_TIMEOUT = float(os.environ.get("INFERENCE_SERVICE_TIMEOUT", 120))
+# Micro-batching: a batch is run when it has MAX_BATCH items or MAX_WAIT_MS after its first item
+INFERENCE_MAX_BATCH = int(os.environ.get("INFERENCE_MAX_BATCH", 64))
+INFERENCE_MAX_WAIT_MS = float(os.environ.get("INFERENCE_MAX_WAIT_MS", 10))
+# Client side: texts per /embed request when embedding documents (ingestion)
+CLIENT_CHUNK_SIZE = 256
+
+
+# --- SERVER ---
+
+class MicroBatcher:
+    """
+    Collects items from concurrent callers and runs `fn` on them in batches.
+
+    `fn` maps a list of items to a list of results of the same length. Each caller gets a
+    Future for its own slice. Batches never split a caller's request.
+    """
+
+    def __init__(self, fn: Callable[[list], list], name: str, max_batch: int = INFERENCE_MAX_BATCH, max_wait_ms: float = INFERENCE_MAX_WAIT_MS):
+        self.fn = fn
+        self.name = name
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[tuple[list, Future]]" = queue.Queue()
+        self.stats = {"requests": 0, "items": 0, "batches": 0, "busy_s": 0.0}
+        threading.Thread(target=self._loop, name=f"batcher-{name}", daemon=True).start()
+
+    def submit(self, items: list) -> Future:
+        future: Future = Future()
+        self._queue.put((items, future))
+        return future
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                try:
+                    request = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request[0])
+
+            items = [item for request_items, _ in batch for item in request_items]
+            started = time.perf_counter()
+            try:
+                results = self.fn(items)
+            except Exception as e:
+                logger.exception(f"{self.name} batch of {len(items)} failed")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.stats["busy_s"] += time.perf_counter() - started
+            self.stats["requests"] += len(batch)
+            self.stats["items"] += len(items)
+            self.stats["batches"] += 1
+
+            offset = 0
+            for request_items, future in batch:
+                future.set_result(results[offset:offset + len(request_items)])
+                offset += len(request_items)
+
+    def metrics(self) -> dict:
+        stats = dict(self.stats)
+        stats["avg_batch_items"] = stats["items"] / stats["batches"] if stats["batches"] else 0
+        stats["avg_requests_per_batch"] = stats["requests"] / stats["batches"] if stats["batches"] else 0
+        return stats
+
+
+def build_batchers() -> dict[str, MicroBatcher]:
+    """Load the local models (never remote, even if INFERENCE_SERVICE_URL is set) and wrap them."""
+    os.environ.pop("INFERENCE_SERVICE_URL", None)
+    from config.llm_config import embeddings
+    from src.retrievers import get_reranker_model
+
+    reranker = get_reranker_model()
+
+    def encode_hybrid(texts: list[str]) -> list[dict]:
+        # bge-m3 dense + sparse in one pass (sparse head loaded on the first request)
+        from src.bge_m3 import get_hybrid_encoder
+        dense, sparse = get_hybrid_encoder().encode(texts)
+        return [{"dense": d, "terms": terms, "weights": weights} for d, (terms, weights) in zip(dense, sparse)]
+
+    return {
+        "embed": MicroBatcher(embeddings.embed_documents, "embed"),
+        "rerank": MicroBatcher(lambda pairs: [float(s) for s in reranker.score([tuple(p) for p in pairs])], "rerank"),
+        "encode_hybrid": MicroBatcher(encode_hybrid, "encode_hybrid"),
+    }
+
+
+def make_handler(batchers: dict[str, MicroBatcher]):
+    class InferenceHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive for the pooled clients
+
+        def _reply(self, status: int, payload: dict):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._reply(200, {"status": "ok"})
+            elif self.path == "/metrics":
+                self._reply(200, {name: batcher.metrics() for name, batcher in batchers.items()})
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                if self.path == "/embed":
+                    result = {"embeddings": batchers["embed"].submit(payload["texts"]).result()}
+                elif self.path == "/rerank":
+                    result = {"scores": batchers["rerank"].submit(payload["pairs"]).result()}
+                elif self.path == "/encode_hybrid":
+                    result = {"encodings": batchers["encode_hybrid"].submit(payload["texts"]).result()}
+                else:
+                    return self._reply(404, {"error": "not found"})
+                self._reply(200, result)
+            except Exception as e:
+                self._reply(500, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return InferenceHandler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765):
+    batchers = build_batchers()
+    server = ThreadingHTTPServer((host, port), make_handler(batchers))
+    server.daemon_threads = True
+    print(f"✅ Inference service listening on http://{host}:{port} (max_batch={INFERENCE_MAX_BATCH}, max_wait={INFERENCE_MAX_WAIT_MS}ms)")
+    server.serve_forever()
+
+
+# --- CLIENTS ---
+
+_clients: dict[str, httpx.Client] = {}
+
+def _client(base_url: str) -> httpx.Client:
+    """One pooled keep-alive client per service URL and process."""
+    client = _clients.get(base_url)
+    if client is None:
+        client = _clients[base_url] = httpx.Client(base_url=base_url, timeout=INFERENCE_SERVICE_TIMEOUT, trust_env=False)
+    return client
+
+def _post(base_url: str, path: str, payload: dict) -> dict:
+    response = _client(base_url).post(path, json=payload)
+    if response.status_code != 200:
+        raise RuntimeError(f"Inference service {path} failed ({response.status_code}): {response.text[:200]}")
+    return response.json()
+
+
+class RemoteEmbeddings(Embeddings):
+    """LangChain Embeddings backed by the inference service."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors = []
+        for i in range(0, len(texts), CLIENT_CHUNK_SIZE):
+            vectors.extend(_post(self.base_url, "/embed", {"texts": texts[i:i + CLIENT_CHUNK_SIZE]})["embeddings"])
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+class RemoteCrossEncoder(BaseCrossEncoder):
+    """Cross-encoder for CrossEncoderReranker backed by the inference service."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    def score(self, text_pairs: list[tuple[str, str]]) -> list[float]:
+        return _post(self.base_url, "/rerank", {"pairs": [list(pair) for pair in text_pairs]})["scores"]
+
+
+def get_service_url() -> Optional[str]:
+    """URL of the shared inference service, or None to load models in-process."""
+    return os.environ.get("INFERENCE_SERVICE_URL") or None
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    from dotenv import load_dotenv
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Shared embedding/reranking service with dynamic micro-batching")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    serve(args.host, args.port)
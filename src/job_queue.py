@@ -0,0 +1,141 @@
+import os
+import time
+import weakref
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+# Number of recent wait times kept for the percentile metrics
+WAIT_TIME_WINDOW = 500
+
+
+class KeyedJobQueue:
+    """
+    Bounded worker pool that runs jobs in submission order per key and in parallel across keys.
+
+    Used by the Slack bridge with the Slack thread as key: messages in one thread are answered
+    one after the other (so the checkpointed conversation stays consistent), while different
+    threads are processed concurrently by up to `max_workers` threads.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 100, name: str = "jobs"):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.name = name
+        self._pending: dict[Hashable, deque] = {}  # Per-key FIFO of (enqueued_at, fn, args, kwargs)
+        self._ready: deque = deque()  # Keys with pending jobs and no job running
+        self._depth = 0
+        self._running = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._wait_times: deque = deque(maxlen=WAIT_TIME_WINDOW)
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+        self._workers: list[threading.Thread] = []
+        self._pid = None
+        self._start_lock = threading.Lock()
+        # Locks held by another thread at fork() time would stay locked forever in the child
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: (queue := ref()) and queue._reset_after_fork())
+
+    def _reset_after_fork(self):
+        self._start_lock = threading.Lock()
+        self._cond = threading.Condition()
+
+    def _ensure_workers(self):
+        """
+        Start the worker threads lazily, once per process.
+
+        Threads don't survive fork(), so a queue created in a preloading parent process
+        (see src/prefork.py) starts its own fresh pool inside every forked worker. The
+        check-and-start is locked so concurrent first submits start a single pool.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._workers = [
+                threading.Thread(target=self._worker, name=f"{self.name}-worker-{i}", daemon=True)
+                for i in range(self.max_workers)
+            ]
+            for worker in self._workers:
+                worker.start()
+            self._pid = os.getpid()
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> bool:
+        """Queue `fn(*args, **kwargs)` behind earlier jobs with the same key. Returns False when full."""
+        self._ensure_workers()
+        with self._cond:
+            if self._stopped or self._depth >= self.max_pending:
+                self.stats["rejected"] += 1
+                logger.warning(f"{self.name}: queue full ({self._depth} pending), rejecting job for {key}")
+                return False
+            jobs = self._pending.get(key)
+            if jobs is None:
+                # New key: nothing queued or running for it, so it can be picked up right away
+                jobs = self._pending[key] = deque()
+                self._ready.append(key)
+            jobs.append((time.monotonic(), fn, args, kwargs))
+            self._depth += 1
+            self.stats["submitted"] += 1
+            self._cond.notify()
+        return True
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._ready and not self._stopped:
+                    self._cond.wait()
+                if self._stopped and not self._ready:
+                    return
+                key = self._ready.popleft()
+                enqueued_at, fn, args, kwargs = self._pending[key].popleft()
+                self._depth -= 1
+                self._running += 1
+                self._wait_times.append(time.monotonic() - enqueued_at)
+
+            try:
+                fn(*args, **kwargs)
+                outcome = "completed"
+            except Exception as e:
+                logger.exception(f"{self.name}: job for {key} failed: {e}")
+                outcome = "failed"
+
+            with self._cond:
+                self._running -= 1
+                self.stats[outcome] += 1
+                if self._pending[key]:
+                    self._ready.append(key)  # Next job of this key, behind other waiting keys
+                    self._cond.notify()
+                else:
+                    del self._pending[key]
+
+    def metrics(self) -> dict:
+        """Queue depth, worker usage and wait-time statistics (seconds) for monitoring."""
+        with self._cond:
+            waits = sorted(self._wait_times)
+            metrics = {
+                "depth": self._depth,
+                "running": self._running,
+                "active_keys": len(self._pending),
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                **self.stats,
+            }
+        if waits:
+            metrics["wait_avg_s"] = sum(waits) / len(waits)
+            metrics["wait_p95_s"] = waits[min(int(len(waits) * 0.95), len(waits) - 1)]
+            metrics["wait_max_s"] = waits[-1]
+        return metrics
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs; workers exit once the queue is drained."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
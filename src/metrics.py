@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Optional
+from uuid import UUID, uuid4
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+logger = logging.getLogger(__name__)
+
+METRICS_LOG_PATH = os.environ.get(
+    "METRICS_LOG_PATH", os.path.join(os.path.dirname(__file__), '..', 'logs', 'metrics.jsonl')
+)
+# Per-thread running totals kept in memory (oldest threads are dropped first)
+MAX_TRACKED_THREADS = 1000
+
+_metrics_log_lock = threading.Lock()
+_thread_totals: "OrderedDict[str, dict]" = OrderedDict()
+
+def _empty_stats() -> dict:
+    return {"calls": 0, "latency_s": 0.0, "input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+
+def _usage_from_result(response: LLMResult) -> dict:
+    """Pull token usage from a chat model result (usage_metadata first, then llm_output)."""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage
+    token_usage = (response.llm_output or {}).get("token_usage") or {}
+    return {
+        "input_tokens": token_usage.get("prompt_tokens", 0),
+        "output_tokens": token_usage.get("completion_tokens", 0),
+        "total_tokens": token_usage.get("total_tokens", 0),
+    }
+
+
+class NodeUsageTracker(BaseCallbackHandler):
+    """
+    Callback handler collecting wall time and token usage per LangGraph node for one request.
+
+    Pass it in the RunnableConfig callbacks of `invoke`/`astream_events`. Graph nodes are keyed
+    by node name ("supervisor", "github_agent", ...), LLM calls by "llm:<node>" and tool calls
+    by "tool:<name>" so the expensive paths stand out.
+    """
+
+    run_inline = True  # Cheap bookkeeping, no need for an executor hop in async runs
+
+    def __init__(self, thread_id: str, source: str):
+        self.thread_id = thread_id
+        self.source = source
+        self.request_id = uuid4().hex
+        self.started = time.perf_counter()
+        self.nodes: dict[str, dict] = {}
+        self._starts: dict[UUID, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, key: str):
+        with self._lock:
+            self._starts[run_id] = (key, time.perf_counter())
+
+    def _end(self, run_id: UUID, usage: Optional[dict] = None) -> None:
+        with self._lock:
+            started = self._starts.pop(run_id, None)
+            if started is None:
+                return
+            key, start = started
+            stats = self.nodes.setdefault(key, _empty_stats())
+            stats["calls"] += 1
+            stats["latency_s"] += time.perf_counter() - start
+            for field in ("input_tokens", "output_tokens", "total_tokens"):
+                stats[field] += (usage or {}).get(field, 0) or 0
+
+    # Graph nodes: the node's own run has the node name as run name
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, metadata: Optional[dict] = None, **kwargs: Any) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node and not node.startswith("__"):
+            self._start(run_id, node)
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    # LLM calls, attributed to the node that made them
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata: Optional[dict] = None, **kwargs: Any) -> None:
+        self._start(run_id, f"llm:{(metadata or {}).get('langgraph_node', 'unknown')}")
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, _usage_from_result(response))
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    # Tool calls
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, f"tool:{kwargs.get('name') or (serialized or {}).get('name', 'unknown')}")
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def summary(self) -> dict:
+        """Per-node stats plus request totals (tokens are only counted on LLM entries)."""
+        with self._lock:
+            nodes = {key: dict(stats) for key, stats in self.nodes.items()}
+        return {
+            "request_id": self.request_id,
+            "thread_id": self.thread_id,
+            "source": self.source,
+            "wall_time_s": time.perf_counter() - self.started,
+            "total_tokens": sum(stats["total_tokens"] for stats in nodes.values()),
+            "nodes": nodes,
+        }
+
+    def finish(self, **extra: Any) -> dict:
+        """Close the request: update the per-thread totals and append to the metrics log."""
+        summary = {**self.summary(), **extra}
+        summary["thread"] = record_thread_usage(self.thread_id, summary)
+        write_metrics_log(summary)
+        return summary
+
+
+def record_thread_usage(thread_id: str, summary: dict) -> dict:
+    """Add a request summary to the running totals of its thread and return those totals."""
+    with _metrics_log_lock:
+        totals = _thread_totals.pop(thread_id, None) or {"requests": 0, "wall_time_s": 0.0, "total_tokens": 0}
+        totals["requests"] += 1
+        totals["wall_time_s"] += summary["wall_time_s"]
+        totals["total_tokens"] += summary["total_tokens"]
+        _thread_totals[thread_id] = totals
+        while len(_thread_totals) > MAX_TRACKED_THREADS:
+            _thread_totals.popitem(last=False)
+        return dict(totals)
+
+def write_metrics_log(summary: dict):
+    """Append one request summary as a JSON line to the machine-readable metrics log."""
+    record = {"timestamp": datetime.now(timezone.utc).isoformat(), **summary}
+    try:
+        with _metrics_log_lock:
+            os.makedirs(os.path.dirname(METRICS_LOG_PATH), exist_ok=True)
+            with open(METRICS_LOG_PATH, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        logger.error(f"Failed to write metrics log: {e}")
+
+def format_usage_table(summary: dict) -> str:
+    """Render a request summary as a Markdown table, most expensive entries first."""
+    rows = sorted(summary["nodes"].items(), key=lambda item: item[1]["latency_s"], reverse=True)
+    lines = [
+        "| Step | Calls | Time (s) | Tokens in | Tokens out |",
+        "|------|------:|---------:|----------:|-----------:|",
+    ]
+    for key, stats in rows:
+        lines.append(
+            f"| {key} | {stats['calls']} | {stats['latency_s']:.2f} | {stats['input_tokens']} | {stats['output_tokens']} |"
+        )
+    thread = summary.get("thread", {})
+    lines.append("")
+    lines.append(
+        f"**Request:** {summary['wall_time_s']:.2f}s, {summary['total_tokens']} tokens"
+        + (f" | **Session:** {thread['requests']} requests, {thread['total_tokens']} tokens" if thread else "")
+    )
+    return "\n".join(lines)
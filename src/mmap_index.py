@@ -0,0 +1,307 @@
+"""
+Read-only, memory-mapped IVF vector index (VECTOR_BACKEND=mmap).
+
+Layout of an exported collection (`VECTOR_INDEX_DIR/<collection>/`):
+
+    manifest.json    dimensions, row count, list count, coded filter fields, export time
+    centroids.npy    [nlist, dim] k-means centroids (small, read fully)
+    offsets.npy      [nlist + 1] start row of each inverted list
+    vectors.npy      [n, dim] float32 embeddings, rows grouped by list (memory-mapped)
+    codes_<field>.npy  [n] int32 code of a metadata field, for filters like {"repo": {"$in": [...]}}
+    docs.sqlite      row -> id, document text, metadata JSON
+
+A query scores the centroids, then reads only the `nprobe` closest lists from vectors.npy.
+The file is mapped, not loaded: pages come from the OS page cache, so every process serving
+the same index shares one copy and only the lists that are actually searched become resident.
+
+Export from Chroma with `python scripts/export_mmap_index.py` after each ingestion.
+"""
+
+import os
+import json
+import time
+import shutil
+import sqlite3
+import logging
+from typing import Any, Iterable, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from src.chunk_dedup import REPO_MEMBER_PREFIX
+
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_DIR = os.environ.get("VECTOR_INDEX_DIR", "./vector_index")
+# Inverted lists searched per query: higher is slower and closer to exact search
+VECTOR_MMAP_NPROBE = int(os.environ.get("VECTOR_MMAP_NPROBE", 8))
+# Metadata fields exported as integer codes so they can be filtered without touching SQLite
+FILTER_FIELDS = ("repo",)
+EXPORT_BATCH = 1000
+
+
+class ReadOnlyVectorStoreError(RuntimeError):
+    """A write was attempted on the mmap index; writers must open the Chroma backend."""
+
+
+# --- EXPORT ---
+
+def read_collection(persist_dir: str, collection_name: str) -> tuple[list[str], np.ndarray, list[str], list[dict]]:
+    """ids, embeddings, documents and metadatas of a Chroma collection, read in batches."""
+    import chromadb
+    from chromadb.config import Settings
+
+    client = chromadb.PersistentClient(path=persist_dir, settings=Settings(anonymized_telemetry=False))
+    collection = client.get_collection(collection_name)
+    ids, vectors, documents, metadatas = [], [], [], []
+    total = collection.count()
+    for offset in range(0, total, EXPORT_BATCH):
+        batch = collection.get(include=["embeddings", "documents", "metadatas"], limit=EXPORT_BATCH, offset=offset)
+        ids.extend(batch["ids"])
+        vectors.extend(batch["embeddings"])
+        documents.extend(batch["documents"])
+        metadatas.extend(m or {} for m in batch["metadatas"])
+    return ids, np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1), documents, metadatas
+
+def _kmeans(vectors: np.ndarray, nlist: int, iterations: int = 12, sample: int = 50000, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on a sample (vectors are L2-normalized, so inner product = cosine)."""
+    rng = np.random.default_rng(seed)
+    train = vectors[rng.choice(len(vectors), min(sample, len(vectors)), replace=False)]
+    centroids = train[rng.choice(len(train), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(train @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = train[assign == c]
+            if len(members):
+                centroid = members.sum(axis=0)
+                centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+            else:
+                centroids[c] = train[rng.integers(len(train))]  # Re-seed empty lists
+    return centroids
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def replace_directory(tmp_dir: str, out_dir: str):
+    """Swap a freshly written index directory in, so readers never see a half-written one."""
+    if os.path.exists(out_dir):
+        old_dir = out_dir + ".old"
+        os.replace(out_dir, old_dir)
+        os.replace(tmp_dir, out_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    else:
+        os.replace(tmp_dir, out_dir)
+
+def export_collection(persist_dir: str, collection_name: str, out_dir: Optional[str] = None, nlist: Optional[int] = None) -> dict:
+    """Build the mmap IVF index of a Chroma collection (written to a temp dir, then swapped in)."""
+    started = time.perf_counter()
+    out_dir = out_dir or os.path.join(VECTOR_INDEX_DIR, collection_name)
+    ids, vectors, documents, metadatas = read_collection(persist_dir, collection_name)
+    if not ids:
+        raise ValueError(f"{collection_name} in {persist_dir} is empty")
+    vectors = _normalize(vectors)
+    nlist = nlist or max(1, min(len(ids) // 39, int(4 * np.sqrt(len(ids)))))
+
+    centroids = _kmeans(vectors, nlist)
+    assign = np.argmax(vectors @ centroids.T, axis=1)
+    order = np.argsort(assign, kind="stable")
+    offsets = np.searchsorted(assign[order], np.arange(nlist + 1)).astype(np.int64)
+
+    tmp_dir = out_dir + ".tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    np.save(os.path.join(tmp_dir, "centroids.npy"), centroids.astype(np.float32))
+    np.save(os.path.join(tmp_dir, "offsets.npy"), offsets)
+    np.save(os.path.join(tmp_dir, "vectors.npy"), vectors[order])
+
+    fields = {}
+    for field in FILTER_FIELDS:
+        values = [str(metadatas[i].get(field, "")) for i in order]
+        if not any(values):
+            continue
+        mapping = {value: code for code, value in enumerate(sorted(set(values)))}
+        np.save(os.path.join(tmp_dir, f"codes_{field}.npy"), np.array([mapping[v] for v in values], dtype=np.int32))
+        fields[field] = mapping
+
+    # repo::<name> membership flags of deduplicated chunks, one boolean column per repo
+    members = sorted({key for metadata in metadatas for key in metadata if key.startswith(REPO_MEMBER_PREFIX)})
+    if members:
+        matrix = np.zeros((len(ids), len(members)), dtype=bool)
+        for row, i in enumerate(order):
+            for column, key in enumerate(members):
+                matrix[row, column] = bool(metadatas[i].get(key))
+        np.save(os.path.join(tmp_dir, "members.npy"), matrix)
+
+    db_path = os.path.join(tmp_dir, "docs.sqlite")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE docs (row INTEGER PRIMARY KEY, id TEXT, document TEXT, metadata TEXT)")
+        conn.executemany(
+            "INSERT INTO docs VALUES (?, ?, ?, ?)",
+            ((row, ids[i], documents[i], json.dumps(metadatas[i])) for row, i in enumerate(order)),
+        )
+    conn.close()
+
+    manifest = {
+        "count": len(ids),
+        "dim": int(vectors.shape[1]),
+        "nlist": nlist,
+        "metric": "cosine",
+        "fields": fields,
+        "members": {key: column for column, key in enumerate(members)},
+        "source": {"persist_dir": os.path.abspath(persist_dir), "collection": collection_name},
+        "exported_at": time.time(),
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), 'w') as f:
+        json.dump(manifest, f)
+
+    replace_directory(tmp_dir, out_dir)
+    manifest["seconds"] = round(time.perf_counter() - started, 2)
+    logger.info(f"Exported {collection_name}: {len(ids)} vectors in {nlist} lists to {out_dir}")
+    return manifest
+
+
+# --- SEARCH ---
+
+class MmapIVFVectorStore(VectorStore):
+    """LangChain VectorStore over an exported index; read-only (re-export to update)."""
+
+    def __init__(self, index_dir: str, embedding: Embeddings, nprobe: int = VECTOR_MMAP_NPROBE):
+        self.index_dir = index_dir
+        self.collection_name = os.path.basename(os.path.normpath(index_dir))
+        self._embedding = embedding
+        self.nprobe = nprobe
+        with open(os.path.join(index_dir, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        self.persist_directory = self.manifest["source"]["persist_dir"]
+        self.centroids = np.load(os.path.join(index_dir, "centroids.npy"))
+        self.offsets = np.load(os.path.join(index_dir, "offsets.npy"))
+        self.vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode="r")
+        self.codes = {
+            field: np.load(os.path.join(index_dir, f"codes_{field}.npy"), mmap_mode="r")
+            for field in self.manifest["fields"]
+        }
+        members_path = os.path.join(index_dir, "members.npy")
+        self.members = np.load(members_path, mmap_mode="r") if os.path.exists(members_path) else None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid = None
+
+        chroma_db = os.path.join(self.persist_directory, "chroma.sqlite3")
+        if os.path.exists(chroma_db) and os.path.getmtime(chroma_db) > self.manifest["exported_at"]:
+            logger.warning(f"{self.collection_name}: Chroma changed after the mmap export, re-run scripts/export_mmap_index.py")
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def count(self) -> int:
+        return self.manifest["count"]
+
+    def _db(self) -> sqlite3.Connection:
+        """Read-only connection per process."""
+        if self._conn is None or self._conn_pid != os.getpid():
+            uri = f"file:{os.path.abspath(os.path.join(self.index_dir, 'docs.sqlite'))}?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _documents(self, rows: Iterable[int]) -> list[Document]:
+        rows = [int(r) for r in rows]
+        if not rows:
+            return []
+        found = {
+            row: Document(page_content=document, metadata=json.loads(metadata), id=doc_id)
+            for row, doc_id, document, metadata in self._db().execute(
+                f"SELECT row, id, document, metadata FROM docs WHERE row IN ({','.join('?' * len(rows))})", rows
+            )
+        }
+        return [found[row] for row in rows]
+
+    def _filter_mask(self, filter: Optional[dict], start: int, end: int) -> Optional[np.ndarray]:
+        """
+        Boolean mask for rows start:end of a Chroma-style filter: {"field": value},
+        {"field": {"$in": [...]}}, {"repo::<name>": True} and $and / $or of those.
+        """
+        if not filter:
+            return None
+        mask = np.ones(end - start, dtype=bool)
+        for field, condition in filter.items():
+            if field in ("$and", "$or"):
+                masks = [self._filter_mask(clause, start, end) for clause in condition]
+                mask &= np.logical_and.reduce(masks) if field == "$and" else np.logical_or.reduce(masks)
+            elif field.startswith(REPO_MEMBER_PREFIX):
+                column = self.manifest.get("members", {}).get(field)
+                member = np.zeros(end - start, dtype=bool) if column is None else self.members[start:end, column]
+                mask &= member == bool(condition)
+            elif field in self.codes:
+                values = condition["$in"] if isinstance(condition, dict) else [condition]
+                mapping = self.manifest["fields"][field]
+                wanted = np.array([mapping[str(v)] for v in values if str(v) in mapping], dtype=np.int32)
+                mask &= np.isin(self.codes[field][start:end], wanted)
+            else:
+                raise ValueError(f"Field '{field}' is not filterable in the mmap index (exported: {list(self.codes)})")
+        return mask
+
+    def search_rows(self, query: np.ndarray, k: int = 4, filter: Optional[dict] = None, nprobe: Optional[int] = None) -> tuple[np.ndarray, np.ndarray]:
+        """Row numbers and cosine similarities of the k best matches in the nprobe closest lists."""
+        query = _normalize(np.asarray(query, dtype=np.float32))
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+
+        rows, scores = [], []
+        for c in lists:
+            start, end = int(self.offsets[c]), int(self.offsets[c + 1])
+            if start == end:
+                continue
+            list_scores = self.vectors[start:end] @ query
+            mask = self._filter_mask(filter, start, end)
+            list_rows = np.arange(start, end)
+            if mask is not None:
+                list_scores, list_rows = list_scores[mask], list_rows[mask]
+            rows.append(list_rows)
+            scores.append(list_scores)
+        if not rows:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+        top = np.argsort(-scores)[:k] if len(scores) <= k else np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return rows[top], scores[top]
+
+    def similarity_search_by_vector_with_score(self, embedding: list[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> list[tuple[Document, float]]:
+        rows, scores = self.search_rows(np.asarray(embedding), k=k, filter=filter)
+        # Cosine distance, like Chroma's scores (lower is closer)
+        return list(zip(self._documents(rows), (1.0 - scores).tolist()))
+
+    def similarity_search_by_vector(self, embedding: list[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> list[tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k=k, filter=filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def _select_relevance_score_fn(self):
+        return lambda distance: 1.0 - distance
+
+    def get(self, where: Optional[dict] = None) -> dict:
+        """All documents and metadatas (optionally filtered), in the shape Chroma's get() returns."""
+        mask = self._filter_mask(where, 0, self.count())
+        rows = np.arange(self.count()) if mask is None else np.nonzero(mask)[0]
+        docs = self._documents(rows)
+        return {"ids": [d.id for d in docs], "documents": [d.page_content for d in docs], "metadatas": [d.metadata for d in docs]}
+
+    # Read-only: writers open Chroma with get_vectorstore(..., backend="chroma") and the
+    # index is re-exported afterwards (ingestors do this when VECTOR_BACKEND=mmap)
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[list[dict]] = None, **kwargs: Any) -> list[str]:
+        raise ReadOnlyVectorStoreError(f"The mmap index of {self.collection_name} is read-only: write to Chroma, then run scripts/export_mmap_index.py")
+
+    def delete(self, ids: Optional[list[str]] = None, **kwargs: Any) -> Optional[bool]:
+        raise ReadOnlyVectorStoreError(f"The mmap index of {self.collection_name} is read-only: delete from Chroma, then run scripts/export_mmap_index.py")
+
+    @classmethod
+    def from_texts(cls, texts: list[str], embedding: Embeddings, metadatas: Optional[list[dict]] = None, **kwargs: Any) -> "MmapIVFVectorStore":
+        raise ReadOnlyVectorStoreError("The mmap index is built from a Chroma collection with scripts/export_mmap_index.py")
@@ -0,0 +1,114 @@
+import os
+import gc
+import logging
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# Production serving settings for the Slack bridge (.env)
+SLACK_SERVER_WORKERS = int(os.environ.get("SLACK_SERVER_WORKERS", 2))
+SLACK_SERVER_TIMEOUT = int(os.environ.get("SLACK_SERVER_TIMEOUT", 120))
+
+def preload_shared_state():
+    """
+    Load everything that is read-only and expensive in the parent process, before forking.
+
+    Workers inherit the bge-m3 / reranker weights and the BM25 indexes copy-on-write (corpus
+    stores are file mappings, shared as is). Only weights are loaded (no inference): torch's
+    OpenMP pool is not fork-safe once started.
+    Chroma clients are closed again so each worker opens its own SQLite handles.
+    """
+    from config.llm_config import get_embeddings
+    from src.retrievers import get_reranker_model, get_lexical_retriever, close_vectorstores
+
+    get_embeddings()
+    get_reranker_model()
+    for persist_dir, collection_name in (("./github.db", "github_repos"), ("./planetix_comms.db", "comms_docs")):
+        if os.path.exists(persist_dir):
+            get_lexical_retriever(persist_dir, collection_name)
+    close_vectorstores()
+
+    # Move everything allocated so far out of the GC's reach: collections would otherwise
+    # touch (and so copy) every page holding these objects in each worker
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preloaded shared state in parent {os.getpid()} ({gc.get_freeze_count()} objects frozen)")
+
+def post_fork(server, worker):
+    """Per-worker setup: fresh checkpointer connection and warm-up (queue threads start lazily)."""
+    from agent import app as langgraph_app
+    from src.checkpointer import get_checkpointer
+    from src.warmup import start_warmup
+    langgraph_app.checkpointer = get_checkpointer()
+    # Dummy queries run here, not in the parent, so inference threads are per worker
+    start_warmup()
+    logger.info(f"Worker {worker.pid} started")
+
+def worker_memory_report() -> dict:
+    """
+    Memory of the parent and every worker process.
+
+    uss is memory private to a process; pss splits shared pages evenly, so the copy-on-write
+    sharing shows up as pss being well below rss (pss is Linux-only, None elsewhere).
+    """
+    current = psutil.Process()
+    parent = current.parent() if os.environ.get("SLACK_SERVER_PREFORK") == "1" else current
+    workers = parent.children() if parent.pid != current.pid else []
+
+    def mem(proc):
+        info = proc.memory_full_info()
+        return {
+            "pid": proc.pid,
+            "rss_mb": info.rss / 2**20,
+            "uss_mb": info.uss / 2**20,
+            "pss_mb": getattr(info, "pss", None) and info.pss / 2**20,
+        }
+
+    return {
+        "worker_count": len(workers) or 1,
+        "parent": mem(parent),
+        "workers": [mem(proc) for proc in workers],
+    }
+
+def serve(flask_app, port: int, workers: int = SLACK_SERVER_WORKERS):
+    """Run the Flask app under gunicorn with `workers` forked processes sharing preloaded state."""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise RuntimeError("Production mode needs gunicorn (Linux/macOS only): pip install gunicorn")
+
+    class SlackBridgeApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"0.0.0.0:{port}")
+            self.cfg.set("workers", workers)
+            # Threads per worker only serve HTTP; agent runs happen on the KeyedJobQueue threads
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("threads", 4)
+            self.cfg.set("timeout", SLACK_SERVER_TIMEOUT)
+            self.cfg.set("preload_app", True)
+            self.cfg.set("post_fork", post_fork)
+
+        def load(self):
+            return flask_app
+
+    from src.checkpointer import CHECKPOINTER_MODE
+    if workers > 1 and CHECKPOINTER_MODE != "sqlite":
+        logger.warning(
+            f"CHECKPOINTER={CHECKPOINTER_MODE} keeps conversation state per worker process; "
+            "use CHECKPOINTER=sqlite so every worker sees the same Slack thread history"
+        )
+
+    from src.slack_dedup import SLACK_DEDUP_BACKEND
+    if workers > 1 and SLACK_DEDUP_BACKEND != "sqlite":
+        logger.warning(
+            "SLACK_DEDUP_BACKEND=memory de-duplicates Slack retries per worker only; "
+            "use SLACK_DEDUP_BACKEND=sqlite when running several workers"
+        )
+
+    os.environ["SLACK_SERVER_PREFORK"] = "1"
+    # Slack rate limits are per workspace: each worker's buckets take an equal share
+    os.environ.setdefault("SLACK_RATE_LIMIT_PROCESSES", str(workers))
+    preload_shared_state()
+    logger.info(f"Starting gunicorn with {workers} workers on port {port}")
+    SlackBridgeApplication().run()
@@ -0,0 +1,104 @@
+import os
+import json
+import logging
+import threading
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+GITHUB_REPOS_CONFIG = os.path.join(os.path.dirname(__file__), '..', 'config', 'github_repositories.json')
+
+
+def repo_aliases(repo: str) -> set[str]:
+    """Lowercase spellings that count as a mention: owner/repo, repo and repo without hyphens."""
+    repo_short = repo.split('/')[-1].lower()
+    return {repo.lower(), repo_short, repo_short.replace('-', '')}
+
+
+class RepoMatcher:
+    """
+    Aho-Corasick automaton over the aliases of all tracked repos.
+
+    `find` scans the query once, whatever the number of repos, and returns every repo that
+    is mentioned. Matches must start and end at a word boundary, and a match inside a longer
+    one (e.g. "repo-test" inside "ai-agentic-repo-test") is ignored.
+    """
+
+    def __init__(self, repos: list[str]):
+        self.repos = list(repos)
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[int, str]]] = [[]]  # (alias length, repo) ending at this state
+        for repo in self.repos:
+            for alias in repo_aliases(repo):
+                self._add(alias, repo)
+        self._build_failure_links()
+
+    def _add(self, alias: str, repo: str):
+        state = 0
+        for char in alias:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append((len(alias), repo))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find(self, text: str) -> list[str]:
+        """All repos mentioned in `text`, in order of first mention."""
+        text = text.lower()
+        spans = []
+        state = 0
+        for end, char in enumerate(text, start=1):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, repo in self._out[state]:
+                start = end - length
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    spans.append((start, end, repo))
+
+        # Longest matches win; shorter ones overlapping them are part of another name
+        kept: list[tuple[int, int, str]] = []
+        for start, end, repo in sorted(spans, key=lambda s: s[0] - s[1]):
+            if all(end <= k_start or start >= k_end for k_start, k_end, _ in kept):
+                kept.append((start, end, repo))
+        found = []
+        for _, _, repo in sorted(kept):
+            if repo not in found:
+                found.append(repo)
+        return found
+
+
+_matcher: Optional[RepoMatcher] = None
+_matcher_mtime = None
+_matcher_lock = threading.Lock()
+
+def get_repo_matcher(config_path: str = GITHUB_REPOS_CONFIG) -> RepoMatcher:
+    """Matcher for the tracked repos, rebuilt only when the config file changes."""
+    global _matcher, _matcher_mtime
+    mtime = os.path.getmtime(config_path)
+    with _matcher_lock:
+        if _matcher is None or mtime != _matcher_mtime:
+            with open(config_path, 'r') as f:
+                repos = json.load(f)['github_repos']
+            _matcher = RepoMatcher(repos)
+            _matcher_mtime = mtime
+            logger.info(f"Repo matcher built for {len(repos)} repositories")
+        return _matcher
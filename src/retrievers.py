@@ -1,71 +1,260 @@
-from langchain_chroma import Chroma
-from chromadb.config import Settings
+import os
+import logging
+from typing import TYPE_CHECKING, Any, Optional
 from config.llm_config import embeddings
 from langchain_core.documents import Document
-from langchain_community.retrievers import BM25Retriever
-from langchain.retrievers.ensemble import EnsembleRetriever
-from langchain.retrievers.contextual_compression import ContextualCompressionRetriever
-from langchain.retrievers.document_compressors import CrossEncoderReranker
-from langchain_community.cross_encoders import HuggingFaceCrossEncoder
+from langchain_core.retrievers import BaseRetriever
+from src.hnsw_profiles import get_profile, collection_configuration
+from src.chunk_dedup import repo_where
+
+# Chroma, rank_bm25 and the cross-encoder are imported on first use, not when the tools load
+if TYPE_CHECKING:
+    from langchain_core.vectorstores import VectorStore
+    from langchain_community.retrievers import BM25Retriever
 
 # Global cache for reranker model to avoid reloading
 _reranker_model = None
+# Open Chroma collections and built BM25 indexes, reused across tool calls
+_vectorstores: dict[tuple[str, str, str], "VectorStore"] = {}
+_bm25_cache: dict[tuple, tuple[int, "BM25Retriever"]] = {}
+
+# Dense search backend (.env): "chroma", or "mmap" for the exported memory-mapped IVF index
+# (src/mmap_index.py), shared through the page cache by every worker process.
+# Collections that have not been exported stay on Chroma.
+VECTOR_BACKEND = os.environ.get("VECTOR_BACKEND", "chroma")
+
+# First-stage retrieval (.env): "ensemble" (dense + BM25) or "bge_m3" (dense + learned sparse
+# weights from one bge-m3 pass, src/bge_m3.py; needs the sparse index, src/sparse_index.py)
+RETRIEVAL_MODE = os.environ.get("RETRIEVAL_MODE", "ensemble")
+BGE_M3_WEIGHTS = tuple(float(w) for w in os.environ.get("BGE_M3_WEIGHTS", "1.0,0.3").split(","))
+BGE_M3_SPARSE_CANDIDATES = int(os.environ.get("BGE_M3_SPARSE_CANDIDATES", 100))
+
+logger = logging.getLogger(__name__)
 
-def get_hybrid_retriever(persist_dir, collection_name, repo_filter=None, top_n=5):
+def get_reranker_model():
+    """Load the cross-encoder once per process (or use the shared inference service)."""
+    global _reranker_model
+    if _reranker_model is None:
+        from src.inference_service import RemoteCrossEncoder, get_service_url
+        if get_service_url():
+            _reranker_model = RemoteCrossEncoder(get_service_url())
+        else:
+            from langchain_community.cross_encoders import HuggingFaceCrossEncoder
+            _reranker_model = HuggingFaceCrossEncoder(model_name="BAAI/bge-reranker-v2-m3")
+    return _reranker_model
+
+def get_vectorstore(persist_dir, collection_name, backend=None):
     """
-    Creates a hybrid retriever for either GitHub or Comms agents.
-    
-    Args:
-        persist_dir (str): Path to the Chroma DB (e.g., "./github.db" or "./planetix_comms.db")
-        collection_name (str): Name of the collection (e.g., "github_repos" or "comms_docs")
-        repo_filter (str, optional): Metadata filter for a specific repository.
-        top_n (int): Number of final documents to return after reranking.
+    Open a collection once per process, on VECTOR_BACKEND unless `backend` is given.
+
+    The mmap backend is read-only (writes raise ReadOnlyVectorStoreError): code that writes
+    must pass backend="chroma", or use get_writable_vectorstore().
     """
-    vectorstore = Chroma(
-        persist_directory=persist_dir, 
-        embedding_function=embeddings, 
-        collection_name=collection_name,
-        client_settings=Settings(anonymized_telemetry=False)
-    )
+    backend = backend or VECTOR_BACKEND
+    if backend == "mmap":
+        from src.mmap_index import VECTOR_INDEX_DIR, MmapIVFVectorStore
+        index_dir = os.path.join(VECTOR_INDEX_DIR, collection_name)
+        if not os.path.exists(os.path.join(index_dir, "manifest.json")):
+            backend = "chroma"
+    elif backend != "chroma":
+        raise ValueError(f"Unknown vector backend '{backend}' (expected chroma or mmap)")
 
-    # Apply filter if provided (specific to GitHub logic)
-    if repo_filter:
-        all_data = vectorstore.get(where={"repo": repo_filter})
-        dense_filter = {"repo": repo_filter}
+    key = (os.path.abspath(persist_dir), collection_name, backend)
+    if key in _vectorstores:
+        return _vectorstores[key]
+    if backend == "mmap":
+        _vectorstores[key] = MmapIVFVectorStore(index_dir, embeddings)
     else:
-        all_data = vectorstore.get()
-        dense_filter = None
+        from langchain_chroma import Chroma
+        from chromadb.config import Settings
+        _vectorstores[key] = Chroma(
+            persist_directory=persist_dir, 
+            embedding_function=embeddings, 
+            collection_name=collection_name,
+            client_settings=Settings(anonymized_telemetry=False),
+            # Only used if the collection doesn't exist yet
+            collection_configuration=collection_configuration(get_profile(collection_name))
+        )
+    return _vectorstores[key]
+
+def get_writable_vectorstore(persist_dir, collection_name):
+    """The Chroma store of a collection, whatever VECTOR_BACKEND is (for code that writes)."""
+    return get_vectorstore(persist_dir, collection_name, backend="chroma")
+
+def _store_identity(vectorstore):
+    """(persist dir, collection name, row count) of a Chroma or mmap store."""
+    if hasattr(vectorstore, "_collection"):
+        return vectorstore._persist_directory, vectorstore._collection.name, vectorstore._collection.count()
+    return vectorstore.persist_directory, vectorstore.collection_name, vectorstore.count()
+
+def get_bm25_retriever(vectorstore, repo_filter=None):
+    """Build (or reuse) the BM25 index for a collection, rebuilt when the collection size changes."""
+    persist_dir, collection_name, count = _store_identity(vectorstore)
+    key = (persist_dir, collection_name, repo_filter)
+    cached = _bm25_cache.get(key)
+    if cached and cached[0] == count:
+        return cached[1]
 
-    # 1. Prepare BM25
+    from langchain_community.retrievers import BM25Retriever
+    all_data = vectorstore.get(where=repo_where([repo_filter])) if repo_filter else vectorstore.get()
     bm25_docs = [
-        Document(page_content=content, metadata=meta) 
-        for content, meta in zip(all_data['documents'], all_data['metadatas'])
+        Document(page_content=content, metadata=meta, id=doc_id)
+        for doc_id, content, meta in zip(all_data['ids'], all_data['documents'], all_data['metadatas'])
     ]
     bm25_retriever = BM25Retriever.from_documents(bm25_docs)
     bm25_retriever.k = 10
+    _bm25_cache[key] = (count, bm25_retriever)
+    return bm25_retriever
+
+def close_vectorstores():
+    """
+    Drop open Chroma clients (BM25 indexes and models are kept).
+
+    Called before forking workers: SQLite handles must not be shared across processes,
+    so every worker reopens its own collections on first use.
+    """
+    _vectorstores.clear()
+    from chromadb.api.client import SharedSystemClient
+    SharedSystemClient.clear_system_cache()
+
+class BGEM3HybridRetriever(BaseRetriever):
+    """
+    Dense + learned sparse retrieval from one bge-m3 call (RETRIEVAL_MODE=bge_m3).
+
+    Candidates are the dense top-k and the sparse top BGE_M3_SPARSE_CANDIDATES (both within
+    `repos`); every candidate gets both scores and is ranked by BGE_M3_WEIGHTS (dense, sparse).
+    """
+    vectorstore: Any
+    sparse_index: Any
+    k: int = 10
+    filter: Optional[dict] = None
+    repos: list[str] = []
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> list[Document]:
+        import numpy as np
+        from src.bge_m3 import get_hybrid_encoder
+
+        dense, (terms, weights) = get_hybrid_encoder().encode_query(query)
+        collection = self.vectorstore._collection
+        include = ["documents", "metadatas", "embeddings"]
+        hits = collection.query(query_embeddings=[dense], n_results=self.k, where=self.filter, include=include)
+        ids, documents, metadatas, vectors = hits["ids"][0], hits["documents"][0], hits["metadatas"][0], list(hits["embeddings"][0])
 
-    # 2. Prepare Dense Vector Search
+        # Sparse-only candidates: top-k among the repos' rows, fetched through the same filter
+        # (indexes built before repo columns can only be filtered after the top-k)
+        mask = self.sparse_index.repo_mask(self.repos)
+        sparse_ids = [chunk_id for chunk_id, _ in self.sparse_index.search(terms, weights, BGE_M3_SPARSE_CANDIDATES, mask)]
+        seen = set(ids)
+        missing = [chunk_id for chunk_id in sparse_ids if chunk_id not in seen]
+        if missing:
+            extra = collection.get(ids=missing, where=self.filter, include=include)
+            ids += extra["ids"]
+            documents += extra["documents"]
+            metadatas += extra["metadatas"]
+            vectors += list(extra["embeddings"])
+        if not ids:
+            return []
+
+        dense_scores = np.asarray(vectors, dtype=np.float32) @ np.asarray(dense, dtype=np.float32)
+        sparse_scores = np.asarray(self.sparse_index.score(ids, terms, weights), dtype=np.float32)
+        combined = BGE_M3_WEIGHTS[0] * dense_scores + BGE_M3_WEIGHTS[1] * sparse_scores
+        return [
+            Document(page_content=documents[i], metadata=metadatas[i] or {}, id=ids[i])
+            for i in np.argsort(-combined)[:self.k]
+        ]
+
+class CorpusBM25Retriever(BaseRetriever):
+    """BM25 over the memory-mapped corpus store (src/corpus_store.py), filtered to `repos`."""
+    store: Any
+    repos: list[str] = []
+    k: int = 10
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> list[Document]:
+        return self.store.lexical_search(query, self.k, self.repos)
+
+def get_lexical_retriever(persist_dir, collection_name, repos=()):
+    """
+    BM25 from the collection's corpus store when it was exported; otherwise one in-memory
+    BM25Retriever per repository (fused when several), built from the whole collection.
+    """
+    from src.corpus_store import get_corpus_store
+    repos = list(repos)
+    store = get_corpus_store(collection_name)
+    if store is not None:
+        return CorpusBM25Retriever(store=store, repos=repos)
+
+    vectorstore = get_vectorstore(persist_dir, collection_name)
+    if len(repos) > 1:
+        from langchain.retrievers.ensemble import EnsembleRetriever
+        return EnsembleRetriever(
+            retrievers=[get_bm25_retriever(vectorstore, repo) for repo in repos],
+            weights=[1 / len(repos)] * len(repos)
+        )
+    return get_bm25_retriever(vectorstore, repos[0] if repos else None)
+
+def get_candidate_retriever(persist_dir, collection_name, repo_filter=None, mode=None):
+    """
+    First-stage retriever (before reranking): bge-m3 dense + sparse in one pass when
+    `mode` (default RETRIEVAL_MODE) is bge_m3 and the sparse index exists, else dense + BM25.
+    """
+    from langchain.retrievers.ensemble import EnsembleRetriever
+
+    # Apply filter if provided (specific to GitHub logic)
+    # (chunks shared by several repos are stored once, with a repo::<name> flag per repo)
+    repos = [repo_filter] if isinstance(repo_filter, str) else list(repo_filter or [])
+    dense_filter = repo_where(repos)
+    k = get_profile(collection_name)["k"]
+
+    if (mode or RETRIEVAL_MODE) == "bge_m3":
+        from src.sparse_index import get_sparse_index
+        sparse_index = get_sparse_index(collection_name)
+        if sparse_index is not None:
+            return BGEM3HybridRetriever(
+                vectorstore=get_vectorstore(persist_dir, collection_name, backend="chroma"),
+                sparse_index=sparse_index, k=k, filter=dense_filter, repos=repos
+            )
+        logger.warning(f"No sparse index for {collection_name}, using dense + BM25 (run scripts/build_sparse_index.py)")
+
+    vectorstore = get_vectorstore(persist_dir, collection_name)
+
+    # 1. Prepare BM25 (corpus store, or an in-memory index per collection and repository)
+    bm25_retriever = get_lexical_retriever(persist_dir, collection_name, repos)
+
+    # 2. Prepare Dense Vector Search (candidate count from the collection's HNSW profile)
     dense_retriever = vectorstore.as_retriever(
         search_type="similarity", 
-        search_kwargs={"k": 10, "filter": dense_filter}
+        search_kwargs={"k": k, "filter": dense_filter}
     )
 
     # 3. Combine in Ensemble
     # For Comms (text), BM25 is great for names/dates. For GitHub, it's great for filenames.
-    ensemble = EnsembleRetriever(
+    return EnsembleRetriever(
         retrievers=[dense_retriever, bm25_retriever], 
         weights=[0.5, 0.5]
     )
 
-    # 4. Reranking Layer (Cached Model)
-    global _reranker_model
-    if _reranker_model is None:
-        _reranker_model = HuggingFaceCrossEncoder(model_name="BAAI/bge-reranker-v2-m3")
+def get_hybrid_retriever(persist_dir, collection_name, repo_filter=None, top_n=5, mode=None):
+    """
+    Creates a hybrid retriever for either GitHub or Comms agents.
     
-    reranker_compressor = CrossEncoderReranker(model=_reranker_model, top_n=top_n)
+    Args:
+        persist_dir (str): Path to the Chroma DB (e.g., "./github.db" or "./planetix_comms.db")
+        collection_name (str): Name of the collection (e.g., "github_repos" or "comms_docs")
+        repo_filter (str | list[str], optional): Repository, or repositories, to search in.
+        top_n (int): Number of final documents to return after reranking.
+        mode (str, optional): First-stage retrieval, "ensemble" or "bge_m3" (default RETRIEVAL_MODE).
+    """
+    from langchain.retrievers.contextual_compression import ContextualCompressionRetriever
+    from langchain.retrievers.document_compressors import CrossEncoderReranker
+
+    # 1-3. Candidates: dense + BM25 ensemble, or single-pass bge-m3 dense + sparse
+    candidates = get_candidate_retriever(persist_dir, collection_name, repo_filter, mode)
+
+    # 4. Reranking Layer (Cached Model)
+    reranker_compressor = CrossEncoderReranker(model=get_reranker_model(), top_n=top_n)
 
     # 5. Final Compressed Retriever
     return ContextualCompressionRetriever(
         base_compressor=reranker_compressor, 
-        base_retriever=ensemble
+        base_retriever=candidates
     )
@@ -0,0 +1,202 @@
+import os
+import io
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from email.message import Message
+from typing import Optional
+from urllib.error import HTTPError
+from urllib.request import Request
+
+import httpx
+from slack_sdk import WebClient
+from slack_sdk.http_retry.builtin_handlers import ConnectionErrorRetryHandler, RateLimitErrorRetryHandler
+from slack_sdk.web.slack_response import SlackResponse
+
+logger = logging.getLogger(__name__)
+
+# Slack Web API endpoint; point it at a local stand-in to run the bridge and tools offline
+SLACK_API_BASE_URL = os.environ.get("SLACK_API_BASE_URL", "https://slack.com/api/")
+# conversations.history / conversations.replies responses are reused for this long (0 disables)
+SLACK_HISTORY_CACHE_SECONDS = float(os.environ.get("SLACK_HISTORY_CACHE_SECONDS", 30))
+SLACK_HTTP_TIMEOUT = float(os.environ.get("SLACK_HTTP_TIMEOUT", 30))
+
+# Requests per minute of Slack's rate limit tiers (https://api.slack.com/apis/rate-limits)
+TIER_LIMITS = {1: 1, 2: 20, 3: 50, 4: 100, "post": 60}
+METHOD_TIERS = {
+    "chat.postMessage": "post",  # "Special": about one message per second per channel
+    "chat.update": 3,
+    "chat.delete": 3,
+    "conversations.history": 3,
+    "conversations.replies": 3,
+    "conversations.info": 3,
+    "conversations.list": 2,
+    "users.info": 4,
+    "auth.test": 4,
+}
+DEFAULT_TIER = 3
+# Per-method overrides, e.g. "conversations.history=1" for apps on the stricter history limit
+RATE_LIMIT_OVERRIDES = {
+    method.strip(): float(limit)
+    for method, limit in (item.split("=") for item in os.environ.get("SLACK_RATE_LIMITS", "").split(",") if "=" in item)
+}
+CACHEABLE_METHODS = ("conversations.history", "conversations.replies")
+
+
+def process_share(rate_per_min: float) -> float:
+    """
+    This process's share of a per-workspace limit.
+
+    Buckets live in one process, so with several gunicorn workers on the same token each gets
+    an equal part (SLACK_RATE_LIMIT_PROCESSES, set by the prefork server) to stay under it together.
+    """
+    return rate_per_min / max(1, int(os.environ.get("SLACK_RATE_LIMIT_PROCESSES", 1)))
+
+
+class TokenBucket:
+    """Allows `rate_per_min` calls per minute on average with bursts of up to `burst` calls."""
+
+    def __init__(self, rate_per_min: float, burst: Optional[float] = None):
+        self.rate = rate_per_min / 60
+        self.capacity = burst or max(1.0, rate_per_min / 6)  # ~10 seconds worth of calls
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns the time waited."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def try_acquire(self) -> bool:
+        """Take one token if one is available right now, without waiting."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class PooledSlackClient(WebClient):
+    """
+    WebClient shared by the bridge's workers, the stream writer and the Slack tools.
+
+    Bolt injects a plain WebClient of its own into handlers (`client`, `say`), so Slack calls
+    must go through `get_slack_client()` to be pooled, rate limited and counted.
+
+    - HTTP goes through one keep-alive httpx pool instead of a new urllib connection per call
+    - every method waits on the token bucket of its rate limit tier before calling Slack,
+      and 429 responses are still retried after Retry-After
+    - conversations.history/replies responses are cached for SLACK_HISTORY_CACHE_SECONDS
+    """
+
+    def __init__(self, token: Optional[str] = None, base_url: str = SLACK_API_BASE_URL, history_cache_seconds: float = SLACK_HISTORY_CACHE_SECONDS, **kwargs):
+        kwargs.setdefault("timeout", int(SLACK_HTTP_TIMEOUT))
+        kwargs.setdefault("retry_handlers", [ConnectionErrorRetryHandler(), RateLimitErrorRetryHandler(max_retry_count=2)])
+        super().__init__(token=token, base_url=base_url, **kwargs)
+        self.history_cache_seconds = history_cache_seconds
+        self._buckets: dict[str, TokenBucket] = {}
+        self._cache: dict[tuple, tuple[float, SlackResponse]] = {}
+        self._lock = threading.Lock()
+        self._http: Optional[httpx.Client] = None
+        self._http_pid = None
+        self._local = threading.local()
+        self.stats: dict[str, dict] = {}
+
+    def _method_stats(self, method: str) -> dict:
+        return self.stats.setdefault(method, {"calls": 0, "cache_hits": 0, "throttled": 0, "throttle_wait_s": 0.0, "rate_limited": 0})
+
+    def _bucket(self, method: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(method)
+            if bucket is None:
+                limit = RATE_LIMIT_OVERRIDES.get(method, TIER_LIMITS[METHOD_TIERS.get(method, DEFAULT_TIER)])
+                bucket = self._buckets[method] = TokenBucket(process_share(limit))
+            return bucket
+
+    def api_call(self, api_method: str, *, params: Optional[dict] = None, **kwargs) -> SlackResponse:  # type: ignore[override]
+        cache_key = None
+        if api_method in CACHEABLE_METHODS and self.history_cache_seconds > 0 and not getattr(self._local, "bypass_cache", False):
+            cache_key = (api_method, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+            with self._lock:
+                cached = self._cache.get(cache_key)
+                if cached and time.monotonic() - cached[0] < self.history_cache_seconds:
+                    self._method_stats(api_method)["cache_hits"] += 1
+                    return cached[1]
+
+        wait = self._bucket(api_method).acquire()
+        with self._lock:
+            stats = self._method_stats(api_method)
+            stats["calls"] += 1
+            if wait:
+                stats["throttled"] += 1
+                stats["throttle_wait_s"] += wait
+
+        response = super().api_call(api_method, params=params, **kwargs)
+
+        if cache_key:
+            with self._lock:
+                now = time.monotonic()
+                self._cache = {k: v for k, v in self._cache.items() if now - v[0] < self.history_cache_seconds}
+                self._cache[cache_key] = (now, response)
+        return response
+
+    @contextmanager
+    def uncached(self):
+        """Calls made in this block (on this thread) always go to Slack, e.g. for index syncs."""
+        self._local.bypass_cache = True
+        try:
+            yield self
+        finally:
+            self._local.bypass_cache = False
+
+    def _pool(self) -> httpx.Client:
+        """One keep-alive pool per process (connections must not be shared across fork())."""
+        if self._http is None or self._http_pid != os.getpid():
+            self._http = httpx.Client(timeout=self.timeout, trust_env=False, proxy=self.proxy, verify=self.ssl or True)
+            self._http_pid = os.getpid()
+        return self._http
+
+    def _perform_urllib_http_request_internal(self, url: str, req: Request) -> dict:
+        """Send the request prepared by WebClient through the httpx pool, mirroring urllib's results."""
+        response = self._pool().post(url, content=req.data, headers=dict(req.header_items()))
+        headers = Message()
+        for key, value in response.headers.multi_items():
+            headers[key] = value
+        if response.status_code >= 400:
+            # Same exception urllib raises, so WebClient's retry handlers (Retry-After) apply unchanged
+            if response.status_code == 429:
+                with self._lock:
+                    self._method_stats(url.rsplit("/", 1)[-1])["rate_limited"] += 1
+            raise HTTPError(url, response.status_code, response.reason_phrase, headers, io.BytesIO(response.content))  # type: ignore[arg-type]
+        if response.headers.get("content-type", "").startswith("application/gzip"):
+            return {"status": response.status_code, "headers": headers, "body": response.content}
+        return {"status": response.status_code, "headers": headers, "body": response.text}
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {"cached_responses": len(self._cache), "methods": {m: dict(s) for m, s in self.stats.items()}}
+
+
+_clients: dict[str, PooledSlackClient] = {}
+_clients_lock = threading.Lock()
+
+def get_slack_client(token: Optional[str] = None) -> PooledSlackClient:
+    """Shared client per bot token (SLACK_BOT_TOKEN by default), so all callers share one rate limit."""
+    token = token or os.environ.get("SLACK_BOT_TOKEN", "")
+    with _clients_lock:
+        client = _clients.get(token)
+        if client is None:
+            client = _clients[token] = PooledSlackClient(token=token)
+        return client
@@ -0,0 +1,133 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Idempotency store for Slack events (.env): "memory" (per process) or "sqlite" (shared by all
+# --prod workers on one host)
+SLACK_DEDUP_BACKEND = os.environ.get("SLACK_DEDUP_BACKEND", "memory")
+SLACK_DEDUP_SQLITE_PATH = os.environ.get("SLACK_DEDUP_SQLITE_PATH", "logs/slack_events.sqlite")
+# Slack retries for up to ~5 minutes, so keys only need to outlive that window
+SLACK_DEDUP_TTL_SECONDS = float(os.environ.get("SLACK_DEDUP_TTL_SECONDS", 3600))
+SLACK_DEDUP_MAX_ENTRIES = int(os.environ.get("SLACK_DEDUP_MAX_ENTRIES", 10000))
+
+
+def event_keys(event: dict, body: Optional[dict] = None) -> list[str]:
+    """
+    Idempotency keys of a Slack event.
+
+    A retry re-sends the same event_id; an @mention in a DM arrives both as `app_mention` and
+    as `message` with different event_ids but the same channel and ts.
+    """
+    keys = []
+    event_id = (body or {}).get("event_id")
+    if event_id:
+        keys.append(f"event:{event_id}")
+    if event.get("channel") and event.get("ts"):
+        keys.append(f"msg:{event['channel']}:{event['ts']}")
+    return keys
+
+
+class EventDeduplicator:
+    """
+    Remembers recently seen Slack events and reports repeats.
+
+    `check_and_mark` is atomic: of two concurrent deliveries of one event exactly one is
+    accepted. Keys expire after `ttl_seconds`; the in-memory store also drops the oldest keys
+    beyond `max_entries`. With `sqlite_path` the keys live in a SQLite table instead, so
+    forked workers see each other's events.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = SLACK_DEDUP_TTL_SECONDS,
+        max_entries: int = SLACK_DEDUP_MAX_ENTRIES,
+        sqlite_path: Optional[str] = None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.sqlite_path = sqlite_path
+        self._seen: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid = None
+        self._inserts = 0
+        self.stats = {"accepted": 0, "suppressed": 0, "suppressed_retries": 0}
+
+    def check_and_mark(self, keys: list[str], retry_num: Optional[int] = None) -> bool:
+        """Record the keys and return True if any of them was already seen (a duplicate)."""
+        if not keys:
+            return False
+        with self._lock:
+            duplicate = self._mark_sqlite(keys) if self.sqlite_path else self._mark_memory(keys)
+            if duplicate:
+                self.stats["suppressed"] += 1
+                if retry_num:
+                    self.stats["suppressed_retries"] += 1
+            else:
+                self.stats["accepted"] += 1
+        return duplicate
+
+    def _mark_memory(self, keys: list[str]) -> bool:
+        now = time.time()
+        while self._seen:
+            oldest_key, seen_at = next(iter(self._seen.items()))
+            if now - seen_at <= self.ttl_seconds and len(self._seen) <= self.max_entries:
+                break
+            del self._seen[oldest_key]
+        duplicate = any(key in self._seen for key in keys)
+        for key in keys:
+            self._seen.setdefault(key, now)
+        return duplicate
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per process (SQLite handles must not cross fork())."""
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.sqlite_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.sqlite_path, timeout=10, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS slack_events (key TEXT PRIMARY KEY, seen_at REAL NOT NULL)")
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _mark_sqlite(self, keys: list[str]) -> bool:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")  # Serializes the check across worker processes
+        try:
+            conn.execute("DELETE FROM slack_events WHERE key IN ({}) AND seen_at < ?".format(",".join("?" * len(keys))), (*keys, now - self.ttl_seconds))
+            inserted = sum(
+                conn.execute("INSERT OR IGNORE INTO slack_events (key, seen_at) VALUES (?, ?)", (key, now)).rowcount
+                for key in keys
+            )
+            self._inserts += 1
+            if self._inserts % 500 == 0:
+                conn.execute("DELETE FROM slack_events WHERE seen_at < ?", (now - self.ttl_seconds,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return inserted < len(keys)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "sqlite" if self.sqlite_path else "memory",
+                "tracked_keys": len(self._seen) if not self.sqlite_path else None,
+                "ttl_seconds": self.ttl_seconds,
+                **self.stats,
+            }
+
+
+def get_deduplicator(backend: str = SLACK_DEDUP_BACKEND) -> EventDeduplicator:
+    if backend == "sqlite":
+        logger.info(f"Slack event de-duplication: SQLite ({SLACK_DEDUP_SQLITE_PATH})")
+        return EventDeduplicator(sqlite_path=SLACK_DEDUP_SQLITE_PATH)
+    if backend != "memory":
+        raise ValueError(f"Unknown SLACK_DEDUP_BACKEND '{backend}' (expected memory or sqlite)")
+    return EventDeduplicator()
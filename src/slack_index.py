@@ -0,0 +1,311 @@
+"""
+Local, incrementally synced index of Slack channel history.
+
+Messages and thread replies are stored in SQLite with an FTS5 table for BM25 keyword
+search; every thread (or standalone message) is also embedded into a Chroma collection.
+retrieve_slack_history searches both locally and fuses the results, so questions about
+older discussions don't page through conversations.history on every call.
+
+Sync: `python scripts/sync_slack_index.py` builds the index (the first sync of a channel
+fetches its whole history) and keeps it fresh. Only messages newer than the last synced ts
+are fetched; threads active within SLACK_INDEX_THREAD_LOOKBACK_DAYS are re-checked for new
+replies. The tool only starts such incremental syncs, in the background, for channels that
+were synced before and are older than SLACK_INDEX_REFRESH_SECONDS. Until a channel is synced,
+its latest messages are fetched live (one conversations.history call), topic search needs the index.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Optional
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+SLACK_INDEX_PATH = os.environ.get("SLACK_INDEX_PATH", "./slack_index.sqlite")
+SLACK_VECTOR_DIR = os.environ.get("SLACK_VECTOR_DIR", "./slack.db")
+SLACK_VECTOR_COLLECTION = "slack_messages"
+# Channels to index (comma separated); defaults to the channel the tool used to read live
+SLACK_INDEX_CHANNELS = [
+    c.strip() for c in os.environ.get("SLACK_INDEX_CHANNELS", os.environ.get("SLACK_CHANNEL_ID", "")).split(",") if c.strip()
+]
+# The tool starts a background incremental sync when the last one is older than this (0: only the sync script syncs)
+SLACK_INDEX_REFRESH_SECONDS = float(os.environ.get("SLACK_INDEX_REFRESH_SECONDS", 300))
+SLACK_INDEX_THREAD_LOOKBACK_DAYS = float(os.environ.get("SLACK_INDEX_THREAD_LOOKBACK_DAYS", 7))
+# Message subtypes that carry no conversation content
+SKIPPED_SUBTYPES = {"channel_join", "channel_leave", "channel_topic", "channel_purpose", "channel_name"}
+RRF_K = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    channel TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    thread_ts TEXT NOT NULL,
+    user TEXT,
+    text TEXT NOT NULL,
+    ts_epoch REAL NOT NULL,
+    UNIQUE (channel, ts)
+);
+CREATE INDEX IF NOT EXISTS messages_thread ON messages (channel, thread_ts, ts);
+CREATE INDEX IF NOT EXISTS messages_time ON messages (ts_epoch);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5 (text, tokenize = 'unicode61');
+CREATE TABLE IF NOT EXISTS sync_state (channel TEXT PRIMARY KEY, latest_ts TEXT, synced_at REAL);
+"""
+
+_conn: Optional[sqlite3.Connection] = None
+_conn_pid = None
+_db_lock = threading.RLock()
+_sync_lock = threading.Lock()
+
+
+def _connection() -> sqlite3.Connection:
+    """One connection per process, shared by threads under _db_lock."""
+    global _conn, _conn_pid
+    if _conn is None or _conn_pid != os.getpid():
+        os.makedirs(os.path.dirname(os.path.abspath(SLACK_INDEX_PATH)), exist_ok=True)
+        _conn = sqlite3.connect(SLACK_INDEX_PATH, timeout=30, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.executescript(_SCHEMA)
+        _conn_pid = os.getpid()
+    return _conn
+
+def _vectorstore():
+    from src.retrievers import get_writable_vectorstore
+    return get_writable_vectorstore(SLACK_VECTOR_DIR, SLACK_VECTOR_COLLECTION)  # Written by sync
+
+def _format_time(ts_epoch: float) -> str:
+    return datetime.fromtimestamp(ts_epoch).strftime("%Y-%m-%d %H:%M")
+
+
+# --- SYNC ---
+
+def _fetch_pages(method, **kwargs) -> list[dict]:
+    """All messages of a cursor-paginated Slack history call."""
+    messages, cursor = [], None
+    while True:
+        response = method(limit=200, cursor=cursor, **kwargs)
+        messages.extend(response.get("messages", []))
+        cursor = (response.get("response_metadata") or {}).get("next_cursor")
+        if not cursor:
+            return messages
+
+def _store_messages(conn: sqlite3.Connection, channel: str, messages: list[dict]) -> set[str]:
+    """Upsert messages and their FTS rows; returns the thread keys (thread_ts) that changed."""
+    changed = set()
+    for msg in messages:
+        text = msg.get("text", "")
+        if not text or msg.get("subtype") in SKIPPED_SUBTYPES:
+            continue
+        thread_ts = msg.get("thread_ts", msg["ts"])
+        row = conn.execute("SELECT id, text FROM messages WHERE channel = ? AND ts = ?", (channel, msg["ts"])).fetchone()
+        if row and row[1] == text:
+            continue
+        if row:
+            conn.execute("UPDATE messages SET text = ? WHERE id = ?", (text, row[0]))
+            conn.execute("DELETE FROM messages_fts WHERE rowid = ?", (row[0],))
+            rowid = row[0]
+        else:
+            rowid = conn.execute(
+                "INSERT INTO messages (channel, ts, thread_ts, user, text, ts_epoch) VALUES (?, ?, ?, ?, ?, ?)",
+                (channel, msg["ts"], thread_ts, msg.get("user") or msg.get("bot_id", "Unknown User"), text, float(msg["ts"])),
+            ).lastrowid
+        conn.execute("INSERT INTO messages_fts (rowid, text) VALUES (?, ?)", (rowid, text))
+        changed.add(thread_ts)
+    return changed
+
+def _thread_document(conn: sqlite3.Connection, channel: str, thread_ts: str) -> Optional[Document]:
+    rows = conn.execute(
+        "SELECT user, text, ts_epoch FROM messages WHERE channel = ? AND thread_ts = ? ORDER BY ts_epoch",
+        (channel, thread_ts),
+    ).fetchall()
+    if not rows:
+        return None
+    content = "\n".join(f"[{_format_time(ts_epoch)}] User {user}: {text}" for user, text, ts_epoch in rows)
+    return Document(
+        page_content=content,
+        metadata={"channel": channel, "thread_ts": thread_ts, "latest_epoch": rows[-1][2], "replies": len(rows) - 1},
+    )
+
+def sync_channel(channel: str, client=None, full: bool = False) -> dict:
+    """Fetch messages newer than the last sync (all with full=True) plus recent thread replies."""
+    from src.slack_client import get_slack_client
+    client = client or get_slack_client()
+    started = time.perf_counter()
+
+    with _db_lock:
+        conn = _connection()
+        state = conn.execute("SELECT latest_ts FROM sync_state WHERE channel = ?", (channel,)).fetchone()
+        oldest = None if full or not state else state[0]
+        lookback = time.time() - SLACK_INDEX_THREAD_LOOKBACK_DAYS * 86400
+        active_threads = {
+            ts for (ts,) in conn.execute(
+                "SELECT DISTINCT thread_ts FROM messages WHERE channel = ? AND thread_ts != ts AND ts_epoch >= ?",
+                (channel, lookback),
+            )
+        }
+
+    with client.uncached():
+        history = _fetch_pages(client.conversations_history, channel=channel, oldest=oldest)
+        threads = active_threads | {msg["ts"] for msg in history if msg.get("reply_count")}
+        replies = []
+        for thread_ts in threads:
+            replies.extend(_fetch_pages(client.conversations_replies, channel=channel, ts=thread_ts))
+
+    with _db_lock:
+        conn = _connection()
+        with conn:
+            changed = _store_messages(conn, channel, history + replies)
+            latest_ts = max((msg["ts"] for msg in history), key=float, default=oldest)
+            conn.execute(
+                "INSERT INTO sync_state (channel, latest_ts, synced_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(channel) DO UPDATE SET latest_ts = excluded.latest_ts, synced_at = excluded.synced_at",
+                (channel, latest_ts, time.time()),
+            )
+        documents = [doc for doc in (_thread_document(conn, channel, ts) for ts in changed) if doc]
+
+    if documents:
+        # Same id per thread, so a thread with new replies replaces its old embedding
+        _vectorstore().add_documents(documents, ids=[f"{channel}:{doc.metadata['thread_ts']}" for doc in documents])
+
+    result = {
+        "channel": channel,
+        "fetched": len(history),
+        "thread_replies": len(replies),
+        "threads_reindexed": len(documents),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    logger.info(f"Slack index sync: {result}")
+    return result
+
+def synced_channels(channels: Optional[list[str]] = None) -> set[str]:
+    """Channels that have been synced at least once (have a sync_state row)."""
+    channels = channels or SLACK_INDEX_CHANNELS
+    if not channels:
+        return set()
+    with _db_lock:
+        rows = _connection().execute(
+            f"SELECT channel FROM sync_state WHERE channel IN ({','.join('?' * len(channels))})", channels
+        ).fetchall()
+    return {channel for (channel,) in rows}
+
+def _refresh(channels: list[str]):
+    try:
+        for channel in channels:
+            try:
+                sync_channel(channel)
+            except Exception as e:
+                # A stale index is still useful; the tool says when it was last synced
+                logger.warning(f"Slack index sync failed for {channel}: {e}")
+    finally:
+        _sync_lock.release()
+
+def refresh_in_background(channels: Optional[list[str]] = None) -> bool:
+    """
+    Start an incremental sync of the already-synced channels whose last sync is older than
+    SLACK_INDEX_REFRESH_SECONDS, without waiting for it. Never-synced channels are left to
+    scripts/sync_slack_index.py (their first sync fetches the whole history). Returns
+    whether a sync was started (False too when one is already running).
+    """
+    if SLACK_INDEX_REFRESH_SECONDS <= 0:
+        return False
+    channels = channels or SLACK_INDEX_CHANNELS
+    with _db_lock:
+        rows = _connection().execute(
+            f"SELECT channel, synced_at FROM sync_state WHERE channel IN ({','.join('?' * len(channels))})", channels
+        ).fetchall() if channels else []
+    stale = [channel for channel, synced_at in rows if time.time() - synced_at >= SLACK_INDEX_REFRESH_SECONDS]
+    if not stale or not _sync_lock.acquire(blocking=False):
+        return False
+    threading.Thread(target=_refresh, args=(stale,), name="slack-index-sync", daemon=True).start()
+    return True
+
+
+# --- SEARCH ---
+
+def _fts_query(query: str) -> str:
+    """Quote every word so user input never hits FTS5 query syntax."""
+    words = re.findall(r"\w+", query.lower())
+    return " OR ".join(f'"{word}"' for word in words)
+
+def search_threads(query: str, days: Optional[float] = None, channels: Optional[list[str]] = None, k: int = 5) -> list[tuple[str, str]]:
+    """
+    Best matching threads as (channel, thread_ts): BM25 over single messages (FTS5) and
+    vector search over whole threads, fused with reciprocal rank fusion.
+    """
+    channels = channels or SLACK_INDEX_CHANNELS
+    if not channels:
+        return []
+    cutoff = time.time() - days * 86400 if days else 0.0
+    scores: dict[tuple[str, str], float] = {}
+
+    fts_query = _fts_query(query)
+    if fts_query:
+        with _db_lock:
+            rows = _connection().execute(
+                f"SELECT m.channel, m.thread_ts FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid "
+                f"WHERE messages_fts MATCH ? AND m.ts_epoch >= ? AND m.channel IN ({','.join('?' * len(channels))}) "
+                f"ORDER BY bm25(messages_fts) LIMIT 50",
+                (fts_query, cutoff, *channels),
+            ).fetchall()
+        ranked = list(dict.fromkeys(rows))  # Best rank per thread
+        for rank, key in enumerate(ranked):
+            scores[key] = scores.get(key, 0.0) + 1 / (RRF_K + rank)
+
+    where = {"$and": [{"latest_epoch": {"$gte": cutoff}}, {"channel": {"$in": channels}}]}
+    for rank, doc in enumerate(_vectorstore().similarity_search(query, k=20, filter=where)):
+        key = (doc.metadata["channel"], doc.metadata["thread_ts"])
+        scores[key] = scores.get(key, 0.0) + 1 / (RRF_K + rank)
+
+    return sorted(scores, key=lambda key: scores[key], reverse=True)[:k]
+
+def format_thread(channel: str, thread_ts: str, max_messages: int = 20) -> str:
+    with _db_lock:
+        rows = _connection().execute(
+            "SELECT user, text, ts_epoch FROM messages WHERE channel = ? AND thread_ts = ? ORDER BY ts_epoch",
+            (channel, thread_ts),
+        ).fetchall()
+    lines = [f"[{_format_time(ts_epoch)}] User {user}: {text}" for user, text, ts_epoch in rows[:max_messages]]
+    if len(rows) > max_messages:
+        lines.append(f"... {len(rows) - max_messages} more replies")
+    return "\n".join(lines)
+
+def recent_messages(limit: int = 20, days: Optional[float] = None, channels: Optional[list[str]] = None) -> list[tuple]:
+    """Latest top-level messages (oldest first), as the live API returned them before."""
+    channels = channels or SLACK_INDEX_CHANNELS
+    if not channels:
+        return []
+    cutoff = time.time() - days * 86400 if days else 0.0
+    with _db_lock:
+        rows = _connection().execute(
+            f"SELECT user, text, ts_epoch FROM messages WHERE thread_ts = ts AND ts_epoch >= ? "
+            f"AND channel IN ({','.join('?' * len(channels))}) ORDER BY ts_epoch DESC LIMIT ?",
+            (cutoff, *channels, limit),
+        ).fetchall()
+    return list(reversed(rows))
+
+def live_recent_messages(channels: list[str], limit: int = 20, days: Optional[float] = None) -> list[tuple]:
+    """Same as `recent_messages`, straight from conversations.history (channels not indexed yet)."""
+    from src.slack_client import get_slack_client
+    client = get_slack_client()
+    kwargs = {"oldest": str(time.time() - days * 86400)} if days else {}
+    rows = []
+    for channel in channels:
+        response = client.conversations_history(channel=channel, limit=limit, **kwargs)
+        rows += [(msg.get("user", "Unknown User"), msg.get("text", ""), float(msg["ts"])) for msg in response.get("messages", [])]
+    return sorted(rows, key=lambda row: row[2])[-limit:]
+
+def last_synced(channels: Optional[list[str]] = None) -> Optional[float]:
+    channels = channels or SLACK_INDEX_CHANNELS
+    if not channels:
+        return None
+    with _db_lock:
+        row = _connection().execute(
+            f"SELECT MIN(synced_at) FROM sync_state WHERE channel IN ({','.join('?' * len(channels))})", channels
+        ).fetchone()
+    return row[0] if row else None
@@ -1,18 +1,18 @@
 import os
 import sys
 import re
+import time
+import argparse
 import traceback
 import logging
 from pathlib import Path
 from typing import cast
 from dotenv import load_dotenv
-from flask import Flask, request, make_response
+from flask import Flask, request, make_response, jsonify
 from slack_bolt import App
 from slack_bolt.adapter.flask import SlackRequestHandler
 from langchain_core.runnables import RunnableConfig
 
-# Formatting and Styling
-from slackstyler import SlackStyler
 
 # 1. SETUP PATHS AND ENVIRONMENT
 project_root = Path.cwd()
@@ -34,30 +34,50 @@ langgraph_app = None
 try:
     # Import the compiled graph from your agent.py
     from agent import app as imported_app
+    from src.metrics import NodeUsageTracker
+    from src.slack_streaming import SlackStreamWriter, SLACK_STREAMING
     langgraph_app = imported_app
     print("✅ LangGraph Agent loaded successfully.")
 except Exception as e:
     print(f"❌ Failed to load agent.py: {e}")
 
 # 3. SETUP SLACK BOLT
-# We pass the token and secret to initialize the Bolt app
-app = App(token=bot_token, signing_secret=signing_secret)
+# Bolt builds a plain WebClient per request and injects it as `client`/`say`; handlers and workers
+# use the shared, pooled and rate-limited client (src/slack_client.py) instead
+from src.slack_client import get_slack_client
+app = App(client=get_slack_client(bot_token), signing_secret=signing_secret)
 handler = SlackRequestHandler(app)
 
+# Background job queue: events are acknowledged right away and answered by a bounded worker pool.
+# Jobs are keyed by Slack thread, so one thread is answered in order while threads run in parallel.
+from src.job_queue import KeyedJobQueue
+slack_jobs = KeyedJobQueue(
+    max_workers=int(os.environ.get("SLACK_WORKERS", 4)),
+    max_pending=int(os.environ.get("SLACK_MAX_PENDING", 100)),
+    name="slack"
+)
+
+# Idempotency: Slack retries slow events and DMs with an @mention fire two handlers; repeats are
+# dropped here, before anything is queued or sent to the LLM
+from src.slack_dedup import get_deduplicator, event_keys
+slack_dedup = get_deduplicator()
+
 # 4. SHARED MESSAGE LOGIC
-def process_message(event, client, say):
+def process_message(event):
     """
     Core logic to handle incoming messages.
-    Uses an initial 'Thinking' message that gets updated once the AI finishes.
+    Uses an initial 'Thinking' message that is progressively updated while the answer streams in.
     """
-    if langgraph_app is None:
-        say(text="⚠️ System Error: AI Engine is offline.", thread_ts=event.get("ts"))
-        return
-
+    started = time.perf_counter()
+    client = get_slack_client(bot_token)
     # Use thread_ts if available (replies in thread), otherwise use message ts
     thread_ts = event.get("thread_ts", event["ts"])
     channel_id = event["channel"]
 
+    if langgraph_app is None:
+        client.chat_postMessage(channel=channel_id, text="⚠️ System Error: AI Engine is offline.", thread_ts=event.get("ts"))
+        return
+
     try:
         # Step A: Post an initial 'Thinking' message to give immediate feedback
         # This prevents Slack from showing a 'dispatch failed' error if the AI is slow
@@ -73,44 +93,77 @@ def process_message(event, client, say):
         # Remove the @bot mention from the query string
         user_query = re.sub(r'<@U[A-Z0-9]+>', '', raw_text).strip()
         
-        # Configure LangGraph thread context
-        config = cast(RunnableConfig, {"configurable": {"thread_id": f"slack_{thread_ts}"}})
+        # Configure LangGraph thread context with per-node token/latency accounting
+        usage_tracker = NodeUsageTracker(thread_id=f"slack_{thread_ts}", source="slack")
+        config = cast(RunnableConfig, {
+            "configurable": {"thread_id": f"slack_{thread_ts}"},
+            "callbacks": [usage_tracker]
+        })
         
         print(f"🤖 Agent processing: '{user_query}'")
         
-        # Step C: Invoke the LangGraph (Running on CPU - might take a few seconds)
-        result = langgraph_app.invoke({"messages": [("human", user_query)]}, config=config)
-        
-        # Step D: Extract content and format it for Slack
-        raw_response = result["messages"][-1].content
-        styler = SlackStyler()
-        formatted_text = styler.convert(raw_response)
-        
-        # Step E: Update the initial 'Thinking' message with the actual AI response
-        client.chat_update(
-            channel=channel_id,
-            ts=thinking_msg_ts,
-            text=formatted_text
+        # Step C: Run the LangGraph, streaming agent tokens into the 'Thinking' message (throttled)
+        writer = SlackStreamWriter(client, channel_id, thinking_msg_ts, started=started)
+        inputs = {"messages": [("human", user_query)]}
+        if SLACK_STREAMING:
+            current_msg_id = None
+            for chunk, metadata in langgraph_app.stream(inputs, config=config, stream_mode="messages"):
+                # Only the worker agents write user-facing text (the supervisor emits routing JSON)
+                if metadata.get("langgraph_node") not in ("github_agent", "comms_agent"):
+                    continue
+                if not isinstance(chunk.content, str) or not chunk.content:
+                    continue
+                if chunk.id != current_msg_id:
+                    # A new LLM call started (e.g. after a tool round): show only the latest message
+                    current_msg_id = chunk.id
+                    writer.reset()
+                writer.append(chunk.content)
+            raw_response = langgraph_app.get_state(config).values["messages"][-1].content
+        else:
+            result = langgraph_app.invoke(inputs, config=config)
+            raw_response = result["messages"][-1].content
+
+        # Step D: Replace the message with the complete answer, formatted for Slack
+        writer.finish(raw_response)
+        usage = usage_tracker.finish(
+            streaming=SLACK_STREAMING, first_visible_s=writer.first_visible_s, slack_updates=writer.updates
+        )
+        print(
+            f"✅ Response updated and sent successfully ({usage['wall_time_s']:.1f}s, {usage['total_tokens']} tokens, "
+            f"first visible after {writer.first_visible_s or 0:.1f}s, {writer.updates} updates)."
         )
-        print("✅ Response updated and sent successfully.")
 
     except Exception as e:
         print(f"❌ Error in process_message: {str(e)}")
         traceback.print_exc()
         # Fallback: Tell the user something went wrong
-        say(text=f"⚠️ Agent Error: {str(e)}", thread_ts=thread_ts)
+        client.chat_postMessage(channel=channel_id, text=f"⚠️ Agent Error: {str(e)}", thread_ts=thread_ts)
+
+def enqueue_message(event, body, request):
+    """Hand the event to the background workers so the Bolt handler returns immediately."""
+    retry_num = request.headers.get("x-slack-retry-num", [None])[0]
+    if slack_dedup.check_and_mark(event_keys(event, body), retry_num=int(retry_num) if retry_num else None):
+        print(f"🔁 Duplicate Slack event suppressed ({body.get('event_id')}, retry {retry_num or 0})")
+        return
+    thread_ts = event.get("thread_ts", event["ts"])
+    if not slack_jobs.submit(f"{event['channel']}:{thread_ts}", process_message, event):
+        get_slack_client(bot_token).chat_postMessage(
+            channel=event["channel"],
+            text="⚠️ I'm handling too many questions right now, please try again in a minute.",
+            thread_ts=thread_ts
+        )
 
 # 5. SLACK EVENT HANDLERS
 @app.event("app_mention")
-def handle_mentions(event, client, say):
+def handle_mentions(event, body, request):
     """Triggered when the bot is @mentioned in a channel."""
-    process_message(event, client, say)
+    enqueue_message(event, body, request)
 
 @app.message(re.compile(".*"))
-def handle_direct_messages(event, client, say):
+def handle_direct_messages(event, body, request):
     """Triggered for all Direct Messages to the bot."""
     if event.get("channel_type") == "im":
-        process_message(event, client, say)
+        enqueue_message(event, body, request)
 
 # 6. FLASK ROUTING
 flask_app = Flask(__name__)
@@ -136,8 +189,50 @@ def health_check():
     """Simple GET route to check if the server is up."""
     return "🚀 Slack Bridge is ONLINE!", 200
 
+@flask_app.route("/ready", methods=["GET"])
+def readiness_check():
+    """Ready only once models, collections and BM25 indexes are warmed up (503 before that)."""
+    from src.warmup import warmup_state, is_ready
+    return jsonify(warmup_state), 200 if is_ready() else 503
+
+@flask_app.route("/metrics/queue", methods=["GET"])
+def queue_metrics():
+    """Queue depth, running jobs and wait times of the background Slack workers."""
+    return jsonify(slack_jobs.metrics()), 200
+
+@flask_app.route("/metrics/dedup", methods=["GET"])
+def dedup_metrics():
+    """Accepted and suppressed (duplicate or retried) Slack events."""
+    return jsonify(slack_dedup.metrics()), 200
+
+@flask_app.route("/metrics/slack", methods=["GET"])
+def slack_api_metrics():
+    """Slack Web API calls, cache hits and rate limiter waits per method."""
+    return jsonify(get_slack_client(bot_token).metrics()), 200
+
+@flask_app.route("/metrics/github_files", methods=["GET"])
+def github_file_metrics():
+    """Where read_github_file answers came from (mirror, fresh cache, 304, fetched)."""
+    from src.github_files import github_file_metrics as metrics
+    return jsonify(metrics()), 200
+
+@flask_app.route("/metrics/workers", methods=["GET"])
+def worker_metrics():
+    """Worker process count and memory per process (rss/uss/pss)."""
+    from src.prefork import worker_memory_report
+    return jsonify(worker_memory_report()), 200
+
+if os.environ.get("SLACK_BENCH_ROUTES") == "1":
+    @flask_app.route("/bench/retrieve", methods=["GET"])
+    def bench_retrieve():
+        """Benchmark-only: run the GitHub hybrid retriever for ?q= (see scripts/benchmark_slack_workers.py)."""
+        from src.retrievers import get_hybrid_retriever
+        retriever = get_hybrid_retriever(persist_dir="./github.db", collection_name="github_repos")
+        docs = retriever.invoke(request.args.get("q", "README"))
+        return jsonify({"pid": os.getpid(), "docs": len(docs)}), 200
+
 # 7. AUTOMATIC NGROK TUNNEL
-def start_ngrok():
+def start_ngrok(port=3000):
     """Start ngrok tunnel using the official Python SDK."""
     token = os.environ.get("NGROK_AUTHTOKEN")
     domain = os.environ.get("NGROK_DOMAIN")
@@ -146,16 +241,29 @@ def start_ngrok():
         return
     try:
         import ngrok
-        listener = ngrok.forward(addr=3000, authtoken=token, domain=domain)
-        print(f"✅ Tunnel ready: {listener.url()} -> localhost:3000")
+        listener = ngrok.forward(addr=port, authtoken=token, domain=domain)
+        print(f"✅ Tunnel ready: {listener.url()} -> localhost:{port}")
     except Exception as e:
         print(f"❌ Ngrok startup failed: {e}")
 
 # 8. STARTUP
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Slack bridge for the LangGraph agent")
+    parser.add_argument("--prod", action="store_true", help="Serve with gunicorn workers forked from a preloaded parent")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes in --prod mode")
+    parser.add_argument("--port", type=int, default=3000)
+    args = parser.parse_args()
+
     # Log level INFO ensures we see incoming requests in terminal
     logging.basicConfig(level=logging.INFO)
-    start_ngrok()
-    print("🚀 Server starting on port 3000...")
-    # use_reloader=False is required when running ngrok inside the script
-    flask_app.run(port=3000, host='0.0.0.0', debug=True, use_reloader=False)
+    start_ngrok(args.port)
+    if args.prod:
+        from src.prefork import serve, SLACK_SERVER_WORKERS
+        print(f"🚀 Production server starting on port {args.port} with {args.workers or SLACK_SERVER_WORKERS} workers...")
+        serve(flask_app, port=args.port, workers=args.workers or SLACK_SERVER_WORKERS)
+    else:
+        from src.warmup import start_warmup
+        start_warmup()
+        print(f"🚀 Server starting on port {args.port} (warming up, see /ready)...")
+        # use_reloader=False is required when running ngrok inside the script
+        flask_app.run(port=args.port, host='0.0.0.0', debug=True, use_reloader=False)
@@ -0,0 +1,110 @@
+import os
+import time
+import logging
+import threading
+from typing import Optional
+
+from slack_sdk.errors import SlackApiError
+from slackstyler import SlackStyler
+
+from src.slack_client import TokenBucket, process_share
+
+logger = logging.getLogger(__name__)
+
+# chat.update is a Tier 3 method (~50 calls/min per workspace); one update per second per message is safe
+SLACK_STREAM_UPDATE_INTERVAL = float(os.environ.get("SLACK_STREAM_UPDATE_INTERVAL", 1.0))
+# Partial updates per minute per channel, shared by every answer streaming into it (final answers always go out)
+SLACK_STREAM_CHANNEL_UPDATES_PER_MIN = float(os.environ.get("SLACK_STREAM_CHANNEL_UPDATES_PER_MIN", 20))
+# Streaming can be switched off to compare against the single final update
+SLACK_STREAMING = os.environ.get("SLACK_STREAMING", "1") != "0"
+# Shown after the partial answer while the model is still writing
+TYPING_MARKER = " ▍"
+
+
+_channel_buckets: dict[str, TokenBucket] = {}
+_channel_buckets_lock = threading.Lock()
+
+def channel_bucket(channel: str) -> TokenBucket:
+    """Partial-update budget of one channel, shared by the answers streaming into it."""
+    with _channel_buckets_lock:
+        bucket = _channel_buckets.get(channel)
+        if bucket is None:
+            bucket = _channel_buckets[channel] = TokenBucket(process_share(SLACK_STREAM_CHANNEL_UPDATES_PER_MIN))
+        return bucket
+
+
+class SlackStreamWriter:
+    """
+    Progressively edits one Slack message while an answer streams in.
+
+    Updates are throttled to `min_interval` seconds per message (backing off on rate limits)
+    and to SLACK_STREAM_CHANNEL_UPDATES_PER_MIN per channel: a partial update with no channel
+    budget left is skipped, the next token tries again. Pass the shared client from
+    `get_slack_client()` so chat.update also waits on its workspace-wide bucket. Markdown is
+    converted to Slack mrkdwn incrementally: completed paragraphs outside code fences are
+    converted once and cached, only the unfinished tail is sent raw. `finish` converts the
+    full text in one go so the final message is always exactly what SlackStyler produces.
+    """
+
+    def __init__(self, client, channel: str, ts: str, started: Optional[float] = None, min_interval: float = SLACK_STREAM_UPDATE_INTERVAL):
+        self.client = client
+        self.channel = channel
+        self.ts = ts
+        self.min_interval = min_interval
+        self.styler = SlackStyler()
+        self.started = started if started is not None else time.perf_counter()
+        self.first_visible_s: Optional[float] = None
+        self.updates = 0
+        self._text = ""
+        self._converted = ""  # mrkdwn of self._text[:self._converted_upto]
+        self._converted_upto = 0
+        self._last_update = 0.0
+
+    def reset(self):
+        """Start over for a new LLM message (e.g. the agent's final answer after a tool round)."""
+        self._text = ""
+        self._converted = ""
+        self._converted_upto = 0
+
+    def append(self, token: str):
+        self._text += token
+        if time.perf_counter() - self._last_update >= self.min_interval and channel_bucket(self.channel).try_acquire():
+            self._update(self._render_partial() + TYPING_MARKER)
+
+    def finish(self, final_text: str):
+        """Write the complete answer, converted as a whole."""
+        self._text = final_text
+        self._update(self.styler.convert(final_text), force=True)
+
+    def _render_partial(self) -> str:
+        """Convert newly completed paragraphs and append the raw unfinished tail."""
+        boundary = self._text.rfind("\n\n")
+        if boundary > self._converted_upto:
+            block = self._text[self._converted_upto:boundary]
+            # Don't split inside a code fence; wait until it is closed
+            if (self._text[:boundary].count("```") % 2) == 0:
+                self._converted += self.styler.convert(block).rstrip("\n") + "\n\n"
+                self._converted_upto = boundary + 2
+        return self._converted + self._text[self._converted_upto:]
+
+    def _update(self, text: str, force: bool = False):
+        if not text.strip():
+            return
+        try:
+            self.client.chat_update(channel=self.channel, ts=self.ts, text=text)
+        except SlackApiError as e:
+            if e.response.get("error") != "ratelimited":
+                raise
+            retry_after = float(e.response.headers.get("Retry-After", self.min_interval))
+            self.min_interval = max(self.min_interval * 2, retry_after)
+            logger.warning(f"chat.update rate limited, slowing updates to every {self.min_interval:.1f}s")
+            if not force:
+                self._last_update = time.perf_counter()
+                return
+            # The final answer must land: wait it out once and retry
+            time.sleep(retry_after)
+            self.client.chat_update(channel=self.channel, ts=self.ts, text=text)
+        self._last_update = time.perf_counter()
+        self.updates += 1
+        if self.first_visible_s is None:
+            self.first_visible_s = self._last_update - self.started
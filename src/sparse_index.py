@@ -0,0 +1,222 @@
+"""
+Inverted index of bge-m3 sparse (lexical) weights, for RETRIEVAL_MODE=bge_m3.
+
+Per collection, in SPARSE_INDEX_DIR/<collection>/:
+
+    weights.sqlite   chunk id -> token ids (int32) and weights (float16), written at ingestion
+    index/           CSR arrays built from it after each ingestion, memory-mapped by readers:
+        inv_indptr.npy, inv_rows.npy, inv_weights.npy   token -> rows holding it (search)
+        fwd_indptr.npy, fwd_terms.npy, fwd_weights.npy  row -> its tokens (scoring given chunks)
+        repo_indptr.npy, repo_ids.npy, repos.json       row -> repos it belongs to (repo filters)
+        ids.json, manifest.json
+
+A query only touches the posting lists of its own tokens, and a repo filter is applied
+before the top-k, so single-repo queries get their full share of sparse candidates.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Iterable, Optional
+
+import numpy as np
+
+from src.chunk_dedup import chunk_repos
+from src.mmap_index import replace_directory
+
+logger = logging.getLogger(__name__)
+
+SPARSE_INDEX_DIR = os.environ.get("SPARSE_INDEX_DIR", "./sparse_index")
+
+
+class SparseStore:
+    """Sparse weights of every chunk of a collection (the source the index is built from)."""
+
+    def __init__(self, collection_name: str, base_dir: str = SPARSE_INDEX_DIR):
+        self.dir = os.path.join(base_dir, collection_name)
+        os.makedirs(self.dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(self.dir, "weights.sqlite"))
+        self.conn.execute("CREATE TABLE IF NOT EXISTS chunks (id TEXT PRIMARY KEY, terms BLOB NOT NULL, weights BLOB NOT NULL)")
+
+    def upsert(self, ids: list[str], sparse: list[tuple[list[int], list[float]]]):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?)",
+                (
+                    (chunk_id, np.asarray(terms, dtype=np.int32).tobytes(), np.asarray(weights, dtype=np.float16).tobytes())
+                    for chunk_id, (terms, weights) in zip(ids, sparse)
+                ),
+            )
+
+    def delete(self, ids: list[str]):
+        with self.conn:
+            self.conn.executemany("DELETE FROM chunks WHERE id = ?", ((chunk_id,) for chunk_id in ids))
+
+    def ids(self) -> set[str]:
+        return {row[0] for row in self.conn.execute("SELECT id FROM chunks")}
+
+    def build_index(self, keep_ids: Optional[Iterable[str]] = None, repos: Optional[dict[str, list[str]]] = None) -> dict:
+        """
+        Write the CSR index from the stored weights (only `keep_ids`, e.g. the chunks still in
+        Chroma), with the repos of every chunk when `repos` (chunk id -> repos) is given.
+        """
+        started = time.perf_counter()
+        keep = set(keep_ids) if keep_ids is not None else None
+        ids, terms, weights = [], [], []
+        for chunk_id, term_bytes, weight_bytes in self.conn.execute("SELECT id, terms, weights FROM chunks ORDER BY id"):
+            if keep is not None and chunk_id not in keep:
+                continue
+            ids.append(chunk_id)
+            terms.append(np.frombuffer(term_bytes, dtype=np.int32))
+            weights.append(np.frombuffer(weight_bytes, dtype=np.float16))
+
+        row_repos = [repos.get(chunk_id, []) for chunk_id in ids] if repos is not None else None
+        manifest = write_csr_index(os.path.join(self.dir, "index"), ids, terms, weights, row_repos)
+        manifest["seconds"] = round(time.perf_counter() - started, 2)
+        logger.info(f"Sparse index {os.path.basename(self.dir)}: {len(ids)} chunks, {manifest['nnz']} postings")
+        return manifest
+
+
+def write_csr_index(out_dir: str, ids: Optional[list[str]], terms: list[np.ndarray], weights: list[np.ndarray], row_repos: Optional[list[list[str]]] = None) -> dict:
+    """
+    Write forward and inverted CSR arrays (unique term ids and float16 weights per chunk),
+    swapped in atomically. Without `ids`, results are row numbers into the caller's own store.
+    `row_repos` (repos of every row) enables `SparseIndex.repo_mask`.
+    """
+    lengths = [len(chunk_terms) for chunk_terms in terms]
+    fwd_terms = np.concatenate(terms).astype(np.int32) if terms else np.zeros(0, dtype=np.int32)
+    fwd_weights = np.concatenate(weights).astype(np.float16) if weights else np.zeros(0, dtype=np.float16)
+    fwd_indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    rows = np.repeat(np.arange(len(terms), dtype=np.int32), lengths)
+    order = np.argsort(fwd_terms, kind="stable")
+    vocab = int(fwd_terms.max()) + 1 if len(fwd_terms) else 0
+    inv_indptr = np.searchsorted(fwd_terms[order], np.arange(vocab + 1)).astype(np.int64)
+
+    tmp_dir = out_dir + ".tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    for name, array in (
+        ("fwd_indptr", fwd_indptr), ("fwd_terms", fwd_terms), ("fwd_weights", fwd_weights),
+        ("inv_indptr", inv_indptr), ("inv_rows", rows[order]), ("inv_weights", fwd_weights[order]),
+    ):
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+    if ids is not None:
+        with open(os.path.join(tmp_dir, "ids.json"), 'w') as f:
+            json.dump(ids, f)
+    if row_repos is not None:
+        names = sorted({repo for repos in row_repos for repo in repos})
+        number = {repo: i for i, repo in enumerate(names)}
+        np.save(os.path.join(tmp_dir, "repo_indptr.npy"), np.concatenate([[0], np.cumsum([len(r) for r in row_repos])]).astype(np.int64))
+        np.save(os.path.join(tmp_dir, "repo_ids.npy"), np.asarray([number[repo] for repos in row_repos for repo in repos], dtype=np.int32))
+        with open(os.path.join(tmp_dir, "repos.json"), 'w') as f:
+            json.dump(names, f)
+    manifest = {"count": len(terms), "nnz": int(len(fwd_terms)), "built_at": time.time()}
+    with open(os.path.join(tmp_dir, "manifest.json"), 'w') as f:
+        json.dump(manifest, f)
+    replace_directory(tmp_dir, out_dir)
+    return manifest
+
+
+class SparseIndex:
+    """Read-only, memory-mapped sparse index."""
+
+    def __init__(self, index_dir: str):
+        load = lambda name: np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r")
+        self.inv_indptr, self.inv_rows, self.inv_weights = load("inv_indptr"), load("inv_rows"), load("inv_weights")
+        self.fwd_indptr, self.fwd_terms, self.fwd_weights = load("fwd_indptr"), load("fwd_terms"), load("fwd_weights")
+        with open(os.path.join(index_dir, "manifest.json")) as f:
+            self.count = json.load(f)["count"]
+        self.ids, self.rows = [], {}
+        if os.path.exists(os.path.join(index_dir, "ids.json")):
+            with open(os.path.join(index_dir, "ids.json")) as f:
+                self.ids = json.load(f)
+            self.rows = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        self.repo_names, self.repo_rows, self.repo_ids = {}, None, None
+        if os.path.exists(os.path.join(index_dir, "repos.json")):
+            with open(os.path.join(index_dir, "repos.json")) as f:
+                self.repo_names = {repo: i for i, repo in enumerate(json.load(f))}
+            repo_indptr, self.repo_ids = load("repo_indptr"), load("repo_ids")
+            self.repo_rows = np.repeat(np.arange(self.count, dtype=np.int32), np.diff(repo_indptr))
+
+    def repo_mask(self, repos: Iterable[str]) -> Optional[np.ndarray]:
+        """Rows belonging to any of `repos`; None when no repos are given or the index has no repo columns."""
+        repos = list(repos)
+        if not repos or self.repo_rows is None:
+            return None
+        wanted = [self.repo_names[repo] for repo in repos if repo in self.repo_names]
+        mask = np.zeros(self.count, dtype=bool)
+        mask[self.repo_rows[np.isin(self.repo_ids, wanted)]] = True
+        return mask
+
+    def search(self, terms: list[int], weights: list[float], k: int, mask: Optional[np.ndarray] = None) -> list[tuple[str, float]]:
+        """Top-k chunks by lexical matching score (sum of query weight x chunk weight over shared tokens)."""
+        return [(self.ids[row], score) for row, score in self.search_rows(terms, weights, k, mask)]
+
+    def search_rows(self, terms: list[int], weights: list[float], k: int, mask: Optional[np.ndarray] = None) -> list[tuple[int, float]]:
+        """Same as `search`, as (row, score), among the rows where `mask` is True when given."""
+        scores = np.zeros(self.count, dtype=np.float32)
+        for term, weight in zip(terms, weights):
+            if term < 0 or term + 1 >= len(self.inv_indptr):
+                continue
+            start, end = self.inv_indptr[term], self.inv_indptr[term + 1]
+            scores[self.inv_rows[start:end]] += weight * self.inv_weights[start:end].astype(np.float32)
+        if mask is not None:
+            scores[~mask] = 0
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits])]
+        return [(int(row), float(scores[row])) for row in hits]
+
+    def score(self, ids: list[str], terms: list[int], weights: list[float]) -> list[float]:
+        """Lexical matching score of the given chunks (0 for chunks not in the index)."""
+        query = dict(zip(terms, weights))
+        scores = []
+        for chunk_id in ids:
+            row = self.rows.get(chunk_id)
+            if row is None:
+                scores.append(0.0)
+                continue
+            start, end = self.fwd_indptr[row], self.fwd_indptr[row + 1]
+            scores.append(float(sum(
+                query.get(int(term), 0.0) * float(weight)
+                for term, weight in zip(self.fwd_terms[start:end], self.fwd_weights[start:end])
+            )))
+        return scores
+
+
+def refresh_sparse_index(collection, collection_name: str, base_dir: str = SPARSE_INDEX_DIR) -> Optional[dict]:
+    """
+    Drop the weights of chunks no longer in the Chroma `collection` and rebuild the index
+    with every chunk's repos (after an ingestion or a GC). None when the collection has no
+    sparse weights.
+    """
+    if not os.path.exists(os.path.join(base_dir, collection_name, "weights.sqlite")):
+        return None
+    repos: dict[str, list[str]] = {}
+    for offset in range(0, collection.count(), 1000):
+        batch = collection.get(include=["metadatas"], limit=1000, offset=offset)
+        repos.update((chunk_id, chunk_repos(metadata or {})) for chunk_id, metadata in zip(batch["ids"], batch["metadatas"]))
+    store = SparseStore(collection_name, base_dir)
+    stale = store.ids() - repos.keys()
+    if stale:
+        store.delete(list(stale))
+    return store.build_index(repos.keys(), repos)
+
+_indexes: dict[str, tuple[float, SparseIndex]] = {}
+_indexes_lock = threading.Lock()
+
+def get_sparse_index(collection_name: str, base_dir: str = SPARSE_INDEX_DIR) -> Optional[SparseIndex]:
+    """The collection's sparse index (reloaded after a rebuild), or None if it was never built."""
+    index_dir = os.path.join(base_dir, collection_name, "index")
+    try:
+        mtime = os.path.getmtime(os.path.join(index_dir, "manifest.json"))
+    except OSError:
+        return None
+    with _indexes_lock:
+        cached = _indexes.get(collection_name)
+        if cached is None or cached[0] != mtime:
+            cached = _indexes[collection_name] = (mtime, SparseIndex(index_dir))
+        return cached[1]
@@ -1,7 +1,8 @@
+import os
 from .current_datetime import current_datetime
 from .retrieve_github_info import retrieve_github_info
 from .list_tracked_repositories import list_tracked_repositories
-# from .duckduckgo_web_search import duckduckgo_web_search
+from .duckduckgo_web_search import duckduckgo_web_search
 from .read_github_file import read_github_file
 from .retrieve_comms_info import retrieve_comms_info
 from .retrieve_slack_history import retrieve_slack_history
@@ -23,6 +24,9 @@ tool_dict = {tool.name: tool for tool in all_tools}
 
 # Tool groupings for multi-agent system
 shared_tools = [current_datetime]
+# Web search is opt-in (.env: WEB_SEARCH_ENABLED=1)
+if os.environ.get("WEB_SEARCH_ENABLED") == "1":
+    shared_tools.append(duckduckgo_web_search)
 github_tools = [retrieve_github_info, list_tracked_repositories, read_github_file]
 comms_tools = [retrieve_comms_info, retrieve_slack_history] 
 
@@ -1,14 +1,9 @@
 from langchain.tools import tool
-from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+from src.web_search import search_many, format_answers
 
-ddg_api = DuckDuckGoSearchAPIWrapper(max_results=3)
-
-@tool("web_search", description="Performs a websearch using DuckDuckGo. The LLM can choose what is relevant and how much information the reply should consist of depending on the query. Use this tool whenever you:- Need up-to-date information (news, current events, recent papers, prices, stats), don't already know the answer from training data- Want to verify / fact-check something. Use quotes for exact phrases, -exclude, site:domain.com, etc. when it helps.")
-def duckduckgo_web_search(query: str) -> str:
-    """ Simple web search using DuckDuckGo """
-    try:
-        # Use the standard wrapper for cleaner result handling
-        return ddg_api.run(query)
-    except Exception as e:
-        # Let the middleware handle the exception bubble-up
-        raise RuntimeError(f"Search failed for query '{query}': {str(e)}")
\ No newline at end of file
+@tool("web_search", description="Performs a websearch using DuckDuckGo. The LLM can choose what is relevant and how much information the reply should consist of depending on the query. Use this tool whenever you:- Need up-to-date information (news, current events, recent papers, prices, stats), don't already know the answer from training data- Want to verify / fact-check something. Use quotes for exact phrases, -exclude, site:domain.com, etc. when it helps. Pass several queries at once to search them in parallel.")
+def duckduckgo_web_search(queries: list[str]) -> str:
+    """ Cached web search; several queries run in parallel and slow ones are reported as timed out """
+    if not queries:
+        return "No search query given."
+    return format_answers(search_many(queries))
@@ -1,5 +1,6 @@
 from langchain.tools import tool
 from src.retrievers import get_hybrid_retriever
+from src.context_packer import pack_context, COMMS_CONTEXT_MAX_CHARS
 
 @tool("retrieve_comms_info", description="Retrieve information from PlanetIX announcements and AIXT news. Use this for project updates, news, or general community information.")
 def retrieve_comms_info(query: str) -> str:
@@ -15,13 +16,16 @@ def retrieve_comms_info(query: str) -> str:
         
         docs = retriever.invoke(query)
 
-        # Format output with URL and Title
-        context = "\n\n".join([
-            f"Source: {doc.metadata.get('url', 'Unknown URL')}\n"
-            f"Title: {doc.metadata.get('title', 'Unknown Title')}\n"
-            f"{doc.page_content}" 
-            for doc in docs
-        ])
+        # Format output with URL and Title once per page, merged chunks and a size budget
+        context = pack_context(
+            docs,
+            group_key=lambda doc: doc.metadata.get('url'),
+            header=lambda doc: (
+                f"Source: {doc.metadata.get('url', 'Unknown URL')} | "
+                f"Title: {doc.metadata.get('title', 'Unknown Title')}"
+            ),
+            max_chars=COMMS_CONTEXT_MAX_CHARS
+        )
         return context
     except Exception as e:
         return f"Comms Retrieval failed: {str(e)}"
@@ -1,41 +1,55 @@
 from langchain.tools import tool
 from src.retrievers import get_hybrid_retriever
-import json
+from src.context_packer import pack_context, GITHUB_CONTEXT_MAX_CHARS
+from src.repo_matcher import get_repo_matcher
+from src.chunk_dedup import chunk_locations, collapse_duplicates, prefer_repos
+from src.github_files import get_default_branch
+
+def _also_in(doc) -> str:
+    """Other repos/paths holding the same chunk (forks, vendored code, shared config)."""
+    others = [f"{loc['repo']}/{loc['source']}" for loc in chunk_locations(doc.metadata)[1:]]
+    if not others:
+        return ""
+    more = f" and {len(others) - 3} more" if len(others) > 3 else ""
+    return f"\nAlso in: {', '.join(others[:3])}{more}"
+
+def _blob_url(doc, branches: dict[str, str]) -> str:
+    """GitHub link to the chunk's file on the repo's default branch (not every repo uses main)."""
+    repo = doc.metadata.get('repo')
+    return f"https://github.com/{repo or 'unknown'}/blob/{branches.get(repo, 'main')}/{doc.metadata.get('source', 'unknown')}"
 
 @tool("retrieve_github_info", description="Retrieve technical information from GitHub repositories. Best for code, architecture, and file-specific questions. Automatically handles hyphen-matching for repo names.")
 def retrieve_github_info(query: str) -> str:
     """Retrieve technical context from the GitHub RAG database."""
     try:
-        # Load repo list to identify if a specific repo is mentioned in the query
-        with open('config/github_repositories.json', 'r') as f:
-            config = json.load(f)
-        known_repos = config['github_repos']
-
-        selected_repo = None
-        for repo in known_repos:
-            repo_short = repo.split('/')[-1]
-            repo_no_hyphen = repo_short.replace('-', '')
-            if repo_short in query.lower() or repo_no_hyphen in query.lower() or repo in query:
-                selected_repo = repo
-                break
+        # Every tracked repo mentioned in the query (matcher is rebuilt only when the config changes)
+        selected_repos = get_repo_matcher().find(query)
 
         # Initialize the shared hybrid retriever for GitHub
         retriever = get_hybrid_retriever(
             persist_dir="./github.db", 
             collection_name="github_repos", 
-            repo_filter=selected_repo, 
+            repo_filter=selected_repos, 
             top_n=5
         )
         
-        docs = retriever.invoke(query)
+        # Shared chunks are returned once, linked to a repo the query asked about
+        docs = collapse_duplicates(retriever.invoke(query))
+        for doc in docs:
+            prefer_repos(doc, selected_repos)
+        # Resolved once per repo for this call, not per header
+        branches = {repo: get_default_branch(repo) for repo in {doc.metadata.get('repo') for doc in docs} if repo}
 
-        # Format output with GitHub blob links
-        context = "\n\n".join([
-            f"Source: https://github.com{doc.metadata.get('repo', 'unknown')}/blob/main/{doc.metadata.get('source', 'unknown')}\n"
-            f"Language: {doc.metadata.get('language', 'unknown')}\n"
-            f"{doc.page_content}" 
-            for doc in docs
-        ])
+        # Format output with one GitHub blob link per file, merged chunks and a size budget
+        context = pack_context(
+            docs,
+            group_key=lambda doc: (doc.metadata.get('repo'), doc.metadata.get('source')),
+            header=lambda doc: (
+                f"Source: {_blob_url(doc, branches)}"
+                f" ({doc.metadata.get('language', 'unknown')}){_also_in(doc)}"
+            ),
+            max_chars=GITHUB_CONTEXT_MAX_CHARS
+        )
         return context
     except Exception as e:
         return f"GitHub Retrieval failed: {str(e)}"
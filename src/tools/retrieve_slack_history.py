@@ -1,6 +1,4 @@
-import os
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
+import time
 from langchain.tools import tool
 from dotenv import load_dotenv
 import logging
@@ -8,31 +6,52 @@ import logging
 load_dotenv()
 logging.basicConfig(level=logging.DEBUG)
 
-@tool("retrieve_slack_history", description="Fetches the latest messages from a specific Slack channel. Use this to summarize recent discussions, check for community questions, or stay updated on Slack activity.")
-def retrieve_slack_history(limit: int = 20) -> str:
-    """Fetches recent history from the Slack channel ai-bot-tester."""
-    client = WebClient(token=os.environ.get("SLACK_BOT_TOKEN"))
-    channel_id = os.environ.get("SLACK_CHANNEL_ID")
-    if not channel_id:
+@tool("retrieve_slack_history", description="Searches the Slack channel history (local index, synced incrementally). Leave query empty to get the latest messages, e.g. to summarize recent discussions or check for community questions. Give a query to find what was said about a topic, and days to limit the search to the last N days (e.g. days=30 for 'last month').")
+def retrieve_slack_history(query: str = "", days: int = 0, limit: int = 20) -> str:
+    """Answers from the local Slack message index (src/slack_index.py) instead of paging the API."""
+    from slack_sdk.errors import SlackApiError
+    from src import slack_index
+
+    if not slack_index.SLACK_INDEX_CHANNELS:
         return "SLACK_CHANNEL_ID environment variable not set. Please add it to your .env file."
-    
+
     try:
-        # Fetch history using the token's 'channels:history' scope
-        response = client.conversations_history(channel=channel_id, limit=limit)
-        messages = response["messages"]
-        
-        if not messages:
-            return "The channel history is empty."
-            
-        # Format the messages into a readable string for the Agent
-        formatted_history = []
-        for msg in reversed(messages):
-            user = msg.get("user", "Unknown User")
-            text = msg.get("text", "")
-            ts = msg.get("ts", "")
-            formatted_history.append(f"[{ts}] User {user}: {text}")
-            
-        return "\n".join(formatted_history)
-        
+        synced = slack_index.synced_channels()
+        missing = [channel for channel in slack_index.SLACK_INDEX_CHANNELS if channel not in synced]
+        if synced:
+            # Incremental sync of stale channels runs in the background; this answer uses the index as it is
+            slack_index.refresh_in_background()
+
+        if query.strip():
+            if not synced:
+                return "The Slack index is not built yet. Run `python scripts/sync_slack_index.py` to build it."
+            threads = slack_index.search_threads(query, days=days or None, k=5)
+            if not threads:
+                return f"No Slack messages found about '{query}'" + (f" in the last {days} days." if days else ".")
+            formatted_history = [slack_index.format_thread(channel, thread_ts) for channel, thread_ts in threads]
+            result = "\n\n---\n\n".join(formatted_history)
+        else:
+            messages = slack_index.recent_messages(limit=limit, days=days or None, channels=list(synced)) if synced else []
+            if missing:
+                # Channels without an index yet: one live conversations.history call, as before the index
+                live = slack_index.live_recent_messages(missing, limit=limit, days=days or None)
+                messages = sorted(messages + live, key=lambda message: message[2])[-limit:]
+            if not messages:
+                return "The channel history is empty."
+            # Format the messages into a readable string for the Agent
+            result = "\n".join(
+                f"[{time.strftime('%Y-%m-%d %H:%M', time.localtime(ts_epoch))}] User {user}: {text}"
+                for user, text, ts_epoch in messages
+            )
+
+        last_synced = slack_index.last_synced(list(synced)) if synced else None
+        if last_synced:
+            result += f"\n\n(Slack index last synced {time.strftime('%Y-%m-%d %H:%M', time.localtime(last_synced))})"
+        if missing and synced and query.strip():
+            result += f"\n(Index not built yet for {', '.join(missing)}: run scripts/sync_slack_index.py)"
+        return result
+
     except SlackApiError as e:
         return f"Error fetching Slack history: {e.response['error']}"
+    except Exception as e:
+        return f"Error searching the Slack index: {e}"
@@ -0,0 +1,100 @@
+import os
+import time
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Collections warmed up at startup (skipped when the database doesn't exist yet)
+WARMUP_COLLECTIONS = (
+    ("./github.db", "github_repos"),
+    ("./planetix_comms.db", "comms_docs"),
+)
+WARMUP_QUERY = "warm-up query"
+
+# Failed stages are retried with exponential backoff until they succeed (.env)
+WARMUP_RETRY_BASE_SECONDS = float(os.environ.get("WARMUP_RETRY_BASE_SECONDS", 2))
+WARMUP_RETRY_MAX_SECONDS = float(os.environ.get("WARMUP_RETRY_MAX_SECONDS", 60))
+
+# Shared status for the readiness endpoint: pending -> running -> ready, or failed (retrying) -> running
+warmup_state: dict = {"status": "pending", "stages": {}, "errors": {}, "attempts": 0, "next_retry_s": None, "total_s": None}
+_warmup_lock = threading.Lock()
+
+def _stage(name: str, fn: Callable[[], object]) -> bool:
+    """Run one warm-up stage and record its duration (errors are recorded, not raised)."""
+    start = time.perf_counter()
+    try:
+        fn()
+        ok = True
+        warmup_state["errors"].pop(name, None)
+    except Exception as e:
+        ok = False
+        warmup_state["errors"][name] = str(e)
+        logger.error(f"Warm-up stage {name} failed: {e}")
+    duration = time.perf_counter() - start
+    warmup_state["stages"][name] = round(duration, 3)
+    logger.info(f"Warm-up stage {name}: {duration:.2f}s")
+    return ok
+
+def _stages() -> list[tuple[str, Callable[[], object]]]:
+    from config.llm_config import embeddings
+    from src.retrievers import get_reranker_model, get_vectorstore, get_lexical_retriever, get_hybrid_retriever
+
+    stages = [
+        ("embedding_model", lambda: embeddings.embed_query(WARMUP_QUERY)),
+        ("reranker_model", lambda: get_reranker_model().score([(WARMUP_QUERY, WARMUP_QUERY)])),
+    ]
+    for persist_dir, collection_name in WARMUP_COLLECTIONS:
+        if not os.path.exists(persist_dir):
+            logger.warning(f"Warm-up: {persist_dir} not found, skipping {collection_name}")
+            continue
+        stages += [
+            (f"open:{collection_name}", lambda p=persist_dir, c=collection_name: get_vectorstore(p, c)),
+            (f"bm25:{collection_name}", lambda p=persist_dir, c=collection_name: get_lexical_retriever(p, c)),
+            (f"query:{collection_name}", lambda p=persist_dir, c=collection_name: get_hybrid_retriever(p, c).invoke(WARMUP_QUERY)),
+        ]
+    return stages
+
+def run_warmup() -> dict:
+    """
+    Pay every first-query cost up front: load models, open collections, build BM25 indexes
+    and run one dummy hybrid query per collection. Safe to call more than once.
+
+    Stages that fail (e.g. the inference service isn't up yet) are retried with backoff
+    until all succeed, so a transient failure doesn't keep the worker out of rotation.
+    """
+    with _warmup_lock:
+        if warmup_state["status"] in ("running", "ready"):
+            return warmup_state
+        warmup_state["status"] = "running"
+
+    started = time.perf_counter()
+    pending = _stages()
+    delay = WARMUP_RETRY_BASE_SECONDS
+    while True:
+        warmup_state["attempts"] += 1
+        pending = [(name, fn) for name, fn in pending if not _stage(name, fn)]
+        if not pending:
+            break
+        warmup_state["status"] = "failed"
+        warmup_state["next_retry_s"] = delay
+        logger.warning(f"Warm-up: {len(pending)} stage(s) failed, retrying in {delay:g}s")
+        time.sleep(delay)
+        delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+        warmup_state["status"] = "running"
+
+    warmup_state["next_retry_s"] = None
+    warmup_state["total_s"] = round(time.perf_counter() - started, 3)
+    warmup_state["status"] = "ready"
+    logger.info(f"Warm-up ready in {warmup_state['total_s']}s after {warmup_state['attempts']} attempt(s): {warmup_state['stages']}")
+    return warmup_state
+
+def start_warmup() -> threading.Thread:
+    """Run the warm-up in a background thread so the server can start listening right away."""
+    thread = threading.Thread(target=run_warmup, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+def is_ready() -> bool:
+    return warmup_state["status"] == "ready"
@@ -0,0 +1,144 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Backend (.env): "duckduckgo" (ddgs package) or the URL of a JSON search endpoint, e.g. a local
+# fake provider: GET <url>?q=<query>&n=<max_results> -> [{"title", "link", "snippet"}, ...]
+WEB_SEARCH_BACKEND = os.environ.get("WEB_SEARCH_BACKEND", "duckduckgo")
+WEB_SEARCH_MAX_RESULTS = int(os.environ.get("WEB_SEARCH_MAX_RESULTS", 3))
+# Whole fan-out deadline; queries still running then are reported as timed out
+WEB_SEARCH_TIMEOUT_SECONDS = float(os.environ.get("WEB_SEARCH_TIMEOUT_SECONDS", 8))
+WEB_SEARCH_MAX_CONCURRENCY = int(os.environ.get("WEB_SEARCH_MAX_CONCURRENCY", 4))
+WEB_SEARCH_CACHE_SECONDS = float(os.environ.get("WEB_SEARCH_CACHE_SECONDS", 3600))
+WEB_SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get("WEB_SEARCH_CACHE_MAX_ENTRIES", 500))
+
+SearchBackend = Callable[[str, int], list[dict]]
+
+
+# --- BACKENDS ---
+
+def duckduckgo_backend(query: str, max_results: int) -> list[dict]:
+    from ddgs import DDGS
+    results = DDGS(timeout=int(WEB_SEARCH_TIMEOUT_SECONDS)).text(query, max_results=max_results)
+    return [{"title": r.get("title", ""), "link": r.get("href", ""), "snippet": r.get("body", "")} for r in results]
+
+def http_json_backend(url: str) -> SearchBackend:
+    """Backend for any endpoint returning a JSON list of {title, link, snippet}."""
+    client = httpx.Client(timeout=WEB_SEARCH_TIMEOUT_SECONDS, trust_env=False)
+
+    def search(query: str, max_results: int) -> list[dict]:
+        response = client.get(url, params={"q": query, "n": max_results})
+        response.raise_for_status()
+        return response.json()[:max_results]
+    return search
+
+_backend: Optional[SearchBackend] = None
+
+def get_backend() -> SearchBackend:
+    global _backend
+    if _backend is None:
+        if WEB_SEARCH_BACKEND == "duckduckgo":
+            _backend = duckduckgo_backend
+        elif WEB_SEARCH_BACKEND.startswith(("http://", "https://")):
+            _backend = http_json_backend(WEB_SEARCH_BACKEND)
+        else:
+            raise ValueError(f"Unknown WEB_SEARCH_BACKEND '{WEB_SEARCH_BACKEND}' (expected duckduckgo or a URL)")
+    return _backend
+
+def set_backend(backend: Optional[SearchBackend]):
+    """Swap the search provider (e.g. a fake in tests); None goes back to WEB_SEARCH_BACKEND."""
+    global _backend
+    _backend = backend
+    clear_cache()
+
+
+# --- CACHE AND FAN-OUT ---
+
+_cache: OrderedDict[str, tuple[float, list[dict]]] = OrderedDict()
+_inflight: dict[str, Future] = {}
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=WEB_SEARCH_MAX_CONCURRENCY, thread_name_prefix="web-search")
+web_search_stats = {"queries": 0, "cache_hits": 0, "coalesced": 0, "searches": 0, "errors": 0, "timeouts": 0}
+
+def normalize_query(query: str) -> str:
+    """Cache key: case and whitespace don't change the results."""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+
+def _run_search(key: str, query: str, max_results: int) -> list[dict]:
+    try:
+        results = get_backend()(query, max_results)
+        with _lock:
+            _cache[key] = (time.monotonic(), results)
+            _cache.move_to_end(key)
+            while len(_cache) > WEB_SEARCH_CACHE_MAX_ENTRIES:
+                _cache.popitem(last=False)
+        return results
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+
+def _submit(query: str, max_results: int) -> Future:
+    """Cached result, the already running search for the same query, or a new search."""
+    key = f"{max_results}:{normalize_query(query)}"
+    with _lock:
+        web_search_stats["queries"] += 1
+        cached = _cache.get(key)
+        if cached and time.monotonic() - cached[0] < WEB_SEARCH_CACHE_SECONDS:
+            web_search_stats["cache_hits"] += 1
+            future: Future = Future()
+            future.set_result(cached[1])
+            return future
+        if key in _inflight:
+            web_search_stats["coalesced"] += 1
+            return _inflight[key]
+        web_search_stats["searches"] += 1
+        future = _inflight[key] = _executor.submit(_run_search, key, query, max_results)
+        return future
+
+def search_many(queries: list[str], max_results: int = WEB_SEARCH_MAX_RESULTS, timeout: float = WEB_SEARCH_TIMEOUT_SECONDS) -> list[dict]:
+    """
+    Run all queries in parallel and wait at most `timeout` seconds for the whole batch.
+
+    Returns one entry per query: {"query", "results"} or {"query", "error"}. Queries that
+    didn't finish in time are reported as timed out, the others are returned regardless;
+    a late result still lands in the cache for the next call.
+    """
+    futures = [(query, _submit(query, max_results)) for query in queries]
+    wait([future for _, future in futures], timeout=timeout)
+
+    answers = []
+    for query, future in futures:
+        if not future.done():
+            with _lock:
+                web_search_stats["timeouts"] += 1
+            answers.append({"query": query, "error": f"timed out after {timeout:g}s"})
+        elif future.exception():
+            with _lock:
+                web_search_stats["errors"] += 1
+            answers.append({"query": query, "error": str(future.exception())})
+        else:
+            answers.append({"query": query, "results": future.result()})
+    return answers
+
+def format_answers(answers: list[dict]) -> str:
+    sections = []
+    for answer in answers:
+        if "error" in answer:
+            sections.append(f"### {answer['query']}\nSearch failed: {answer['error']}")
+            continue
+        lines = [f"- {r.get('title', '')}: {r.get('snippet', '')} ({r.get('link', '')})" for r in answer["results"]]
+        sections.append(f"### {answer['query']}\n" + ("\n".join(lines) if lines else "No results."))
+    return "\n\n".join(sections)
@@ -0,0 +1,63 @@
+"""
+GC classification from the ingest ledger: only completed runs may supersede a chunk.
+"""
+
+from ingestion.compaction import load_ledger, record_run, classify_chunks
+
+
+class FakeCollection:
+    """The two Chroma collection calls classify_chunks reads through."""
+
+    def __init__(self, metadatas: dict[str, dict]):
+        self.metadatas = metadatas
+
+    def count(self) -> int:
+        return len(self.metadatas)
+
+    def get(self, include, limit, offset):
+        ids = list(self.metadatas)[offset:offset + limit]
+        return {"ids": ids, "metadatas": [self.metadatas[i] for i in ids]}
+
+
+def classify(tmp_path, metadatas: dict[str, dict], scope_field: str = "url") -> dict[str, list[str]]:
+    return classify_chunks(FakeCollection(metadatas), load_ledger(str(tmp_path))["docs"], scope_field)
+
+
+def test_unfinished_run_does_not_supersede(tmp_path):
+    record_run(str(tmp_path), "docs", "WebIngestor", "R1", {"a"}, ["a"])
+    groups = classify(tmp_path, {
+        "1": {"url": "a", "ingest_run": "R1"},
+        "2": {"url": "a", "ingest_run": "R2"},  # Upserted by a run that never completed
+    })
+    assert groups["live"] == ["1"]
+    assert groups["untracked"] == ["2"]
+    assert groups["superseded"] == []
+
+
+def test_earlier_completed_run_is_superseded(tmp_path):
+    record_run(str(tmp_path), "docs", "WebIngestor", "R1", {"a"}, ["a"])
+    record_run(str(tmp_path), "docs", "WebIngestor", "R3", {"a"}, ["a"])
+    groups = classify(tmp_path, {
+        "old": {"url": "a", "ingest_run": "R1"},
+        "new": {"url": "a", "ingest_run": "R3"},
+        "unstamped": {"url": "a"},
+        "aborted": {"url": "a", "ingest_run": "R2"},
+    })
+    assert groups["live"] == ["new"]
+    assert sorted(groups["superseded"]) == ["old", "unstamped"]
+    assert groups["untracked"] == ["aborted"]
+
+
+def test_unfinished_run_of_a_deduplicated_repo(tmp_path):
+    record_run(str(tmp_path), "repos", "GitHubIngestor", "R0", {"o/a", "o/b"}, ["o/a", "o/b"])
+    record_run(str(tmp_path), "repos", "GitHubIngestor", "R1", {"o/a", "o/b"}, ["o/a", "o/b"])
+    record_run(str(tmp_path), "repos", "GitHubIngestor", "R2", {"o/a"}, ["o/a", "o/b"])
+    locations = '[{"repo": "o/a", "source": "x.py"}, {"repo": "o/b", "source": "x.py"}]'
+    groups = classify_chunks(FakeCollection({
+        # o/a restamped by an unfinished run R3, o/b still at an older completed run
+        "1": {"repo": "o/a", "locations": locations, "run::o/a": "R3", "run::o/b": "R0"},
+        # Both repos at earlier completed runs
+        "2": {"repo": "o/a", "locations": locations, "run::o/a": "R1", "run::o/b": "R1"},
+    }), load_ledger(str(tmp_path))["repos"], "repo")
+    assert groups["untracked"] == ["1"]
+    assert groups["live"] == ["2"]  # R1 is still o/b's last completed run
@@ -0,0 +1,61 @@
+"""
+Default branch resolution: mirror manifest first, API lookups (and failures) cached.
+"""
+
+import httpx
+import pytest
+
+import src.github_files as github_files
+
+
+class CountingHttp:
+    def __init__(self, response=None):
+        self.response = response
+        self.requests = 0
+
+    def get(self, url, headers=None):
+        self.requests += 1
+        if self.response is None:
+            raise httpx.ConnectError("GitHub unreachable")
+        return self.response
+
+
+@pytest.fixture
+def isolated(monkeypatch, tmp_path):
+    monkeypatch.setattr(github_files, "GITHUB_MIRROR_DIR", str(tmp_path))
+    monkeypatch.setattr(github_files, "_manifest", None)
+    monkeypatch.setattr(github_files, "_default_branches", {})
+
+
+def test_failed_lookup_is_cached(isolated, monkeypatch):
+    http = CountingHttp()
+    monkeypatch.setattr(github_files, "_http", lambda: http)
+
+    assert github_files.get_default_branch("o/a") == "main"
+    assert github_files.get_default_branch("o/a") == "main"
+    assert http.requests == 1
+
+    monkeypatch.setattr(github_files, "GITHUB_DEFAULT_BRANCH_RETRY_SECONDS", 0)
+    github_files._default_branches.clear()
+    github_files.get_default_branch("o/a")
+    github_files.get_default_branch("o/a")
+    assert http.requests == 3  # Retried once the fallback expired
+
+
+def test_api_lookup_is_cached(isolated, monkeypatch):
+    request = httpx.Request("GET", "https://api.github.com/repos/o/a")
+    http = CountingHttp(httpx.Response(200, json={"default_branch": "develop"}, request=request))
+    monkeypatch.setattr(github_files, "_http", lambda: http)
+
+    assert github_files.get_default_branch("o/a") == "develop"
+    assert github_files.get_default_branch("o/a") == "develop"
+    assert http.requests == 1
+
+
+def test_mirror_manifest_needs_no_request(isolated, monkeypatch):
+    http = CountingHttp()
+    monkeypatch.setattr(github_files, "_http", lambda: http)
+    github_files.write_mirror_manifest({"o/a": {"default_branch": "trunk", "commit": "abc"}})
+
+    assert github_files.get_default_branch("o/a") == "trunk"
+    assert http.requests == 0
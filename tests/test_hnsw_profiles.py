@@ -0,0 +1,27 @@
+"""
+HNSW profiles are parsed once and re-read only after the file changes.
+"""
+
+import os
+
+import src.hnsw_profiles as hnsw_profiles
+from src.hnsw_profiles import get_profile, save_profile, DEFAULT_PROFILE
+
+
+def test_profiles_reloaded_on_mtime_change(tmp_path, monkeypatch):
+    path = str(tmp_path / "hnsw_profiles.json")
+    assert get_profile("docs", path) == DEFAULT_PROFILE
+
+    save_profile("docs", {**DEFAULT_PROFILE, "k": 25}, path)
+    assert get_profile("docs", path)["k"] == 25
+
+    loads = []
+    monkeypatch.setattr(hnsw_profiles, "load_profiles", lambda p: loads.append(p) or {})
+    for _ in range(3):
+        assert get_profile("docs", path)["k"] == 25
+    assert loads == []  # Served from the cache
+
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert get_profile("docs", path)["k"] == DEFAULT_PROFILE["k"]
+    assert loads == [path]
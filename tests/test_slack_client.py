@@ -0,0 +1,144 @@
+"""
+PooledSlackClient against a local Slack Web API stand-in (SLACK_API_BASE_URL).
+
+The client replaces slack_sdk's private urllib transport, so these tests catch a
+slack_sdk upgrade that changes how requests, retries or responses flow through it.
+"""
+
+import json
+import time
+import importlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class SlackStub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so connection reuse is observable
+
+    def do_POST(self):
+        server = self.server
+        method = self.path.rsplit("/", 1)[-1]
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with server.lock:
+            server.calls.append((method, self.client_address))
+            rate_limited = server.rate_limit_next.get(method, 0)
+            if rate_limited:
+                server.rate_limit_next[method] = rate_limited - 1
+            count = sum(1 for m, _ in server.calls if m == method)
+
+        if rate_limited:
+            status, headers, body = 429, {"Retry-After": "1"}, {"ok": False, "error": "ratelimited"}
+        else:
+            status, headers, body = 200, {}, {"ok": True, "messages": [{"ts": "1.0", "text": f"call {count}"}]}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def slack_api():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlackStub)
+    server.calls, server.rate_limit_next, server.lock = [], {}, threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_client(slack_api, monkeypatch):
+    monkeypatch.setenv("SLACK_API_BASE_URL", f"http://127.0.0.1:{slack_api.server_address[1]}/api/")
+    import src.slack_client as slack_client
+    slack_client = importlib.reload(slack_client)  # Picks up SLACK_API_BASE_URL
+    return lambda **kwargs: slack_client.PooledSlackClient(token="xoxb-test", **kwargs)
+
+
+def test_reuses_one_connection(slack_api, make_client):
+    client = make_client(history_cache_seconds=0)
+    for _ in range(3):
+        assert client.auth_test()["ok"]
+    client.conversations_history(channel="C1")
+
+    assert len(slack_api.calls) == 4
+    assert len({address for _, address in slack_api.calls}) == 1
+
+
+def test_retries_after_429(slack_api, make_client):
+    client = make_client(history_cache_seconds=0)
+    slack_api.rate_limit_next["conversations.history"] = 1
+
+    started = time.monotonic()
+    response = client.conversations_history(channel="C1")
+
+    assert response["ok"]
+    assert time.monotonic() - started >= 1  # Waited for Retry-After
+    assert [m for m, _ in slack_api.calls] == ["conversations.history", "conversations.history"]
+    assert client.metrics()["methods"]["conversations.history"]["rate_limited"] == 1
+
+
+def test_history_cache_hits_and_expiry(slack_api, make_client):
+    client = make_client(history_cache_seconds=0.3)
+
+    first = client.conversations_history(channel="C1")
+    second = client.conversations_history(channel="C1")
+    assert second["messages"] == first["messages"]
+    assert len(slack_api.calls) == 1
+    assert client.metrics()["methods"]["conversations.history"]["cache_hits"] == 1
+
+    client.conversations_history(channel="C2")  # Different params, not cached
+    assert len(slack_api.calls) == 2
+
+    time.sleep(0.4)
+    third = client.conversations_history(channel="C1")
+    assert third["messages"] != first["messages"]
+    assert len(slack_api.calls) == 3
+
+
+def test_uncached_bypasses_cache(slack_api, make_client):
+    client = make_client(history_cache_seconds=60)
+    client.conversations_history(channel="C1")
+
+    with client.uncached():
+        client.conversations_history(channel="C1")
+        client.conversations_replies(channel="C1", ts="1.0")
+    assert len(slack_api.calls) == 3
+
+    client.conversations_history(channel="C1")  # Cached again outside the block
+    assert len(slack_api.calls) == 3
+
+
+def test_token_bucket_allows_burst_then_paces():
+    from src.slack_client import TokenBucket
+    bucket = TokenBucket(rate_per_min=600, burst=2)  # One token every 0.1s
+
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    started = time.monotonic()
+    wait = bucket.acquire()
+    assert 0.05 < wait <= 0.1
+    assert time.monotonic() - started >= wait
+
+
+def test_calls_wait_on_the_method_bucket(slack_api, make_client):
+    client = make_client(history_cache_seconds=0)
+    from src.slack_client import TokenBucket
+    client._buckets["auth.test"] = TokenBucket(rate_per_min=600, burst=1)
+
+    for _ in range(3):
+        client.auth_test()
+
+    stats = client.metrics()["methods"]["auth.test"]
+    assert stats["calls"] == 3
+    assert stats["throttled"] == 2
+    assert stats["throttle_wait_s"] >= 0.15
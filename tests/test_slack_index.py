@@ -0,0 +1,37 @@
+"""
+Latest messages of channels that were never synced come from one live history call.
+"""
+
+import src.slack_client as slack_client
+import src.slack_index as slack_index
+
+
+class FakeClient:
+    def __init__(self, history: dict[str, list[dict]]):
+        self.history = history
+        self.calls = []
+
+    def conversations_history(self, channel, limit, **kwargs):
+        self.calls.append((channel, limit, kwargs))
+        return {"messages": self.history[channel][:limit]}  # Newest first, like Slack
+
+
+def test_live_recent_messages(monkeypatch):
+    client = FakeClient({
+        "C1": [{"user": "U1", "text": "third", "ts": "30.0"}, {"user": "U2", "text": "first", "ts": "10.0"}],
+        "C2": [{"text": "second", "ts": "20.0"}],
+    })
+    monkeypatch.setattr(slack_client, "get_slack_client", lambda token=None: client)
+
+    rows = slack_index.live_recent_messages(["C1", "C2"], limit=2)
+    assert rows == [("Unknown User", "second", 20.0), ("U1", "third", 30.0)]  # Oldest first, newest `limit`
+    assert [(channel, limit) for channel, limit, _ in client.calls] == [("C1", 2), ("C2", 2)]
+
+    slack_index.live_recent_messages(["C1"], days=1)
+    assert "oldest" in client.calls[-1][2]
+
+
+def test_synced_channels_on_a_fresh_index(monkeypatch, tmp_path):
+    monkeypatch.setattr(slack_index, "SLACK_INDEX_PATH", str(tmp_path / "slack_index.sqlite"))
+    monkeypatch.setattr(slack_index, "_conn", None)
+    assert slack_index.synced_channels(["C1"]) == set()
@@ -0,0 +1,41 @@
+"""
+SlackStreamWriter throttling: per message, and per channel across concurrent answers.
+"""
+
+import src.slack_streaming as slack_streaming
+from src.slack_client import TokenBucket
+from src.slack_streaming import SlackStreamWriter
+
+
+class RecordingClient:
+    def __init__(self):
+        self.updates = []
+
+    def chat_update(self, channel, ts, text):
+        self.updates.append((channel, ts, text))
+
+
+def test_partial_updates_share_the_channel_budget(monkeypatch):
+    monkeypatch.setattr(slack_streaming, "_channel_buckets", {"C1": TokenBucket(rate_per_min=1, burst=3)})
+    client = RecordingClient()
+    writers = [SlackStreamWriter(client, "C1", ts, min_interval=0) for ts in ("1.0", "2.0")]
+
+    for i in range(5):
+        for writer in writers:
+            writer.append(f"token {i} ")
+    assert len(client.updates) == 3  # Both answers together, not 3 each
+
+    for writer in writers:
+        writer.finish("done")
+    assert [text.strip() for _, _, text in client.updates[-2:]] == ["done", "done"]  # Final answers always land
+
+
+def test_channels_are_capped_separately(monkeypatch):
+    monkeypatch.setattr(slack_streaming, "_channel_buckets", {})
+    monkeypatch.setattr(slack_streaming, "SLACK_STREAM_CHANNEL_UPDATES_PER_MIN", 6)  # Burst of 1
+    client = RecordingClient()
+    for channel in ("C1", "C2"):
+        writer = SlackStreamWriter(client, channel, "1.0", min_interval=0)
+        writer.append("a ")
+        writer.append("b ")
+    assert [channel for channel, _, _ in client.updates] == ["C1", "C2"]
@@ -0,0 +1,45 @@
+"""
+Sparse index repo filters: candidates are restricted to the repos before the top-k.
+"""
+
+from src.sparse_index import SparseStore, SparseIndex, refresh_sparse_index
+
+
+class FakeCollection:
+    def __init__(self, metadatas: dict[str, dict]):
+        self.metadatas = metadatas
+
+    def count(self) -> int:
+        return len(self.metadatas)
+
+    def get(self, include, limit, offset):
+        ids = list(self.metadatas)[offset:offset + limit]
+        return {"ids": ids, "metadatas": [self.metadatas[i] for i in ids]}
+
+
+def build(tmp_path) -> SparseIndex:
+    # Repo o/big matches the query token strongly in every chunk, o/small only weakly
+    metadatas = {f"big{i}": {"repo": "o/big"} for i in range(20)}
+    metadatas |= {f"small{i}": {"repo": "o/small"} for i in range(3)}
+    metadatas["shared"] = {"repo": "o/big", "locations": '[{"repo": "o/big", "source": "a"}, {"repo": "o/small", "source": "a"}]'}
+    store = SparseStore("repos", str(tmp_path))
+    store.upsert(list(metadatas), [([7], [1.0 if chunk_id.startswith(("big", "shared")) else 0.1]) for chunk_id in metadatas])
+    refresh_sparse_index(FakeCollection(metadatas), "repos", str(tmp_path))
+    return SparseIndex(str(tmp_path / "repos" / "index"))
+
+
+def test_repo_mask_filters_before_top_k(tmp_path):
+    index = build(tmp_path)
+
+    unfiltered = [chunk_id for chunk_id, _ in index.search([7], [1.0], k=5)]
+    assert not any(chunk_id.startswith("small") for chunk_id in unfiltered)
+
+    filtered = [chunk_id for chunk_id, _ in index.search([7], [1.0], k=5, mask=index.repo_mask(["o/small"]))]
+    assert filtered[0] == "shared"  # Deduplicated chunk counts for each of its repos
+    assert sorted(filtered[1:]) == ["small0", "small1", "small2"]
+
+
+def test_repo_mask_edge_cases(tmp_path):
+    index = build(tmp_path)
+    assert index.repo_mask([]) is None
+    assert not index.repo_mask(["o/unknown"]).any()
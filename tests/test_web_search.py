@@ -0,0 +1,106 @@
+"""
+Web search fan-out against fake providers: the cache, coalescing and the batch deadline.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+import src.web_search as web_search
+
+
+class FakeBackend:
+    """Answers every query after `delay` seconds (per query, optional), counting calls."""
+
+    def __init__(self, delays: dict[str, float] | None = None):
+        self.delays = delays or {}
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+        self._lock = threading.Lock()
+
+    def __call__(self, query: str, max_results: int) -> list[dict]:
+        with self._lock:
+            self.calls.append(query)
+        self.release.wait()
+        if query in self.delays:
+            threading.Event().wait(self.delays[query])
+        return [{"title": query, "link": f"https://example.com/{len(self.calls)}", "snippet": "..."}][:max_results]
+
+
+@pytest.fixture
+def backend():
+    fake = FakeBackend()
+    web_search.set_backend(fake)
+    yield fake
+    fake.release.set()
+    web_search.set_backend(None)
+
+
+def test_cache_hit_by_normalized_query(backend):
+    first = web_search.search_many(["Python  GIL"])
+    second = web_search.search_many(["  python gil "])
+
+    assert backend.calls == ["Python  GIL"]
+    assert second[0]["results"] == first[0]["results"]
+    assert second[0]["query"] == "  python gil "
+
+
+def test_inflight_duplicates_are_coalesced(backend):
+    backend.release.clear()  # Hold the first search until both callers asked
+    answers = {}
+    callers = [
+        threading.Thread(target=lambda i=i: answers.__setitem__(i, web_search.search_many(["same query"], timeout=5)))
+        for i in range(2)
+    ]
+    callers[0].start()
+    while not backend.calls:
+        threading.Event().wait(0.01)
+    coalesced = web_search.web_search_stats["coalesced"]
+    callers[1].start()
+    while web_search.web_search_stats["coalesced"] == coalesced:
+        threading.Event().wait(0.01)
+    backend.release.set()
+    for caller in callers:
+        caller.join()
+
+    assert backend.calls == ["same query"]
+    assert answers[0] == answers[1]
+
+
+def test_partial_results_when_one_query_times_out(backend):
+    backend.delays["slow"] = 1.0
+    answers = web_search.search_many(["fast", "slow"], timeout=0.3)
+
+    assert answers[0]["results"][0]["title"] == "fast"
+    assert "timed out" in answers[1]["error"]
+    assert "Search failed: timed out" in web_search.format_answers(answers)
+
+
+def test_http_json_backend_against_a_local_provider():
+    class Provider(BaseHTTPRequestHandler):
+        def do_GET(self):
+            params = parse_qs(urlparse(self.path).query)
+            body = json.dumps([{"title": params["q"][0], "link": f"https://example.com/{i}", "snippet": ""} for i in range(5)]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Provider)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        web_search.set_backend(web_search.http_json_backend(f"http://127.0.0.1:{server.server_address[1]}/search"))
+        answers = web_search.search_many(["local fake"], max_results=2)
+        assert [r["title"] for r in answers[0]["results"]] == ["local fake", "local fake"]
+    finally:
+        web_search.set_backend(None)
+        server.shutdown()
+        server.server_close()